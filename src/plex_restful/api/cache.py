@@ -0,0 +1,142 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from flask import Blueprint, Response, current_app, g, request
+
+from ..config import APIConfig
+from ..database.models import DatabaseGeneration
+from .pagination import wants_ndjson
+
+CachedResponse = Tuple[bytes, int, List[Tuple[str, str]]]
+
+
+class ResponseCache:
+    """
+    LRU of serialized API responses, valid for a single database generation.
+
+    Entries are keyed by request path, query string and representation. The first lookup made under a
+    newer generation drops every entry, since any of them may describe data that has since changed. A
+    request that read an older generation, because it started before a sync committed, neither resets
+    the cache nor is served from or stored in it.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, generation: int, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key) if self._check_generation(generation) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, generation: int, key: str, entry: CachedResponse) -> None:
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._check_generation(generation):
+                return
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key)[0])
+            self._entries[key] = entry
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _check_generation(self, generation: int) -> bool:
+        # Returns whether the generation is the current one, moving the cache forward to a newer one
+        if self._generation is not None and generation < self._generation:
+            return False
+        if generation != self._generation:
+            self._entries.clear()
+            self._size = 0
+            self._generation = generation
+        return True
+
+
+response_cache = ResponseCache(APIConfig.RESPONSE_CACHE_ENTRIES, APIConfig.RESPONSE_CACHE_MAX_BYTES)
+
+
+def register_response_cache(blueprint: Blueprint, cache: ResponseCache = response_cache) -> None:
+    """
+    Gives every GET on the blueprint a weak ETag derived from the database generation, answers a
+    matching If-None-Match with 304, and serves repeated requests from the response cache. Views
+    marked uncached are skipped.
+    """
+
+    @blueprint.before_request
+    def _serve_conditional_or_cached():
+        if request.method != "GET" or getattr(
+            current_app.view_functions.get(request.endpoint), "uncached", False
+        ):
+            return None
+
+        g.db_generation = DatabaseGeneration.current()
+        g.cache_key = _make_cache_key()
+        g.etag = _make_etag(g.db_generation, g.cache_key)
+        if request.if_none_match.contains_weak(g.etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(g.etag, weak=True)
+            return response
+
+        entry = cache.get(g.db_generation, g.cache_key)
+        if entry is None:
+            return None
+        body, status, headers = entry
+        g.from_response_cache = True
+        response = current_app.response_class(body, status=status, headers=headers)
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    @blueprint.after_request
+    def _store_response(response: Response) -> Response:
+        if request.method != "GET" or response.status_code != 200 or "etag" not in g:
+            return response
+        if g.get("from_response_cache"):
+            return response
+
+        response.set_etag(g.etag, weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+        response.vary.add("Accept")
+        if not response.is_streamed:
+            headers = [(name, value) for name, value in response.headers if name != "Set-Cookie"]
+            cache.put(g.db_generation, g.cache_key, (response.get_data(), 200, headers))
+            response.headers["X-Cache"] = "MISS"
+        return response
+
+
+def uncached(view: Callable) -> Callable:
+    """
+    Leaves a GET view out of the response cache and its generation ETags, for data that changes
+    without a database generation bump.
+    """
+    view.uncached = True
+    return view
+
+
+def _make_cache_key() -> str:
+    # JSON and NDJSON renderings of the same URL are different responses
+    return f"{request.full_path} ndjson" if wants_ndjson() else request.full_path
+
+
+def _make_etag(generation: int, cache_key: str) -> str:
+    return f"{generation}-{zlib.crc32(cache_key.encode()):08x}"
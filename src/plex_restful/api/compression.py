@@ -0,0 +1,96 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+from ..config import APIConfig
+
+try:
+    import brotli
+except ImportError:  # brotli is an optional speedup; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/html", "text/plain"}
+
+
+class _GzipCompressor:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=5)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+_COMPRESSORS = {"br": _BrotliCompressor, "gzip": _GzipCompressor}
+
+
+def register_compression(app: Flask, min_size: Optional[int] = None) -> None:
+    """
+    Compresses JSON, NDJSON and HTML responses with brotli or gzip, whichever the client prefers.
+
+    Buffered bodies below min_size bytes are sent as they are, since compressing them saves less
+    than it costs. Streamed bodies are compressed chunk by chunk and flushed after every chunk, so
+    NDJSON rows still reach the client as they are produced.
+    """
+    min_size = APIConfig.COMPRESS_MIN_SIZE if min_size is None else min_size
+
+    @app.after_request
+    def _compress_response(response: Response) -> Response:
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+
+        encoding = _negotiate_encoding()
+        if encoding is None:
+            return response
+        compressor = _COMPRESSORS[encoding]()
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, compressor)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compressor.process(data) + compressor.finish())
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def _negotiate_encoding() -> Optional[str]:
+    available = [encoding for encoding in _COMPRESSORS if encoding != "br" or brotli is not None]
+    return request.accept_encodings.best_match(available)
+
+
+def _compress_stream(chunks: Iterable[bytes], compressor) -> Iterator[bytes]:
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
@@ -1,58 +1,171 @@
 from flask import Blueprint, jsonify, request
 
-from ..database.models import Playlist
+from ..database.extensions import db
+from ..database.models import (
+    PLAYLIST_ITEM_FIELDS,
+    Playlist,
+    SyncRun,
+    Track,
+    playlist_item_types,
+    playlist_items_select,
+    playlist_track,
+)
+from ..database.search import SearchUnavailable, search_items
+from .cache import register_response_cache, uncached
+from .pagination import (
+    QueryArgumentError,
+    page_or_stream,
+    page_response,
+    parse_fields,
+    parse_page_args,
+)
 
 api_bp = Blueprint("api", __name__)
+register_response_cache(api_bp)
+
+
+PLAYLIST_FIELDS = {
+    "id": Playlist.id,
+    "rating_key": Playlist.rating_key,
+    "title": Playlist.title,
+    "playlist_type": Playlist.playlist_type,
+    "duration": Playlist.duration,
+    "thumbnail": Playlist.thumbnail,
+    "item_count": Playlist.item_count,
+    "track_count": Playlist.track_count,
+    "episode_count": Playlist.episode_count,
+    "movie_count": Playlist.movie_count,
+    "photo_count": Playlist.photo_count,
+    "created_at": Playlist.created_at,
+    "updated_at": Playlist.updated_at,
+}
+DEFAULT_PLAYLIST_FIELDS = ("id", "title", "playlist_type", "duration", "thumbnail")
+
+TRACK_FIELDS = {
+    "id": Track.id,
+    "rating_key": Track.rating_key,
+    "title": Track.title,
+    "track_number": Track.track_number,
+    "duration": Track.duration,
+    "album_title": Track.album_title,
+    "album_year": Track.album_year,
+    "artist_name": Track.artist_name,
+}
+DEFAULT_TRACK_FIELDS = ("track_number", "title", "duration")
+
+DEFAULT_ITEM_FIELDS = ("type", "id", "rating_key", "title", "duration", "thumbnail")
+
+SEARCH_FIELDS = PLAYLIST_ITEM_FIELDS + ("score",)
+DEFAULT_SEARCH_FIELDS = ("type", "id", "rating_key", "title", "artist_name", "album_title", "show_title")
+
+DEFAULT_SUMMARY_FIELDS = ("id", "title", "playlist_type", "item_count") + tuple(
+    f"{item_type}_count" for item_type in playlist_item_types.values()
+)
+
+# Newest sync runs listed by default, and at most
+SYNC_RUNS_LIMIT = 50
+MAX_SYNC_RUNS_LIMIT = 500
+
+
+@api_bp.errorhandler(QueryArgumentError)
+def handle_query_argument_error(error):
+    return jsonify({"error": str(error)}), 400
+
+
+@api_bp.errorhandler(SearchUnavailable)
+def handle_search_unavailable(error):
+    return jsonify({"error": str(error)}), 503
 
 
 # Example endpoint to fetch playlists
 @api_bp.route("/playlists", methods=["GET"])
 def get_playlists():
+    limit, after = parse_page_args()
+    fields = parse_fields(PLAYLIST_FIELDS, DEFAULT_PLAYLIST_FIELDS)
+
+    query = Playlist.query
     playlist_type = request.args.get("type")
     if playlist_type:
-        playlists = Playlist.query.filter_by(section_type=playlist_type).all()
-    else:
-        playlists = Playlist.query.all()
-
-    result = []
-    for playlist in playlists:
-        result.append(
-            {
-                "id": playlist.id,
-                "title": playlist.title,
-                "playlist_type": playlist.section_type,
-                "duration": playlist.duration,
-                "thumbnail": playlist.thumbnail,
-            }
-        )
+        query = query.filter(Playlist.playlist_type == playlist_type)
 
-    return jsonify(result)
+    return page_or_stream(query, Playlist.id, PLAYLIST_FIELDS, fields, limit, after)
 
 
 @api_bp.route("/playlists/<int:playlist_id>/tracks", methods=["GET"])
 def get_playlist_tracks(playlist_id):
-    playlist = Playlist.query.get(playlist_id)
+    limit, after = parse_page_args()
+    fields = parse_fields(TRACK_FIELDS, DEFAULT_TRACK_FIELDS)
 
-    if not playlist:
+    if not Playlist.query.with_entities(Playlist.id).filter(Playlist.id == playlist_id).first():
         return jsonify({"error": "Playlist not found"}), 404
 
-    tracks_result = []
-    for track in playlist.tracks:
-        tracks_result.append(
-            {
-                "track_number": track.track_number,
-                "title": track.title,
-                "duration": track.duration,
-            }
+    # Keyed on the association table so the (playlist_id, track_id) primary key serves each page
+    query = Track.query.join(playlist_track, playlist_track.c.track_id == Track.id).filter(
+        playlist_track.c.playlist_id == playlist_id
+    )
+    return page_or_stream(query, playlist_track.c.track_id, TRACK_FIELDS, fields, limit, after)
+
+
+@api_bp.route("/playlists/<int:playlist_id>/items", methods=["GET"])
+def get_playlist_items(playlist_id):
+    limit, after = parse_page_args()
+    fields = parse_fields(dict.fromkeys(PLAYLIST_ITEM_FIELDS), DEFAULT_ITEM_FIELDS)
+
+    if not Playlist.query.with_entities(Playlist.id).filter(Playlist.id == playlist_id).first():
+        return jsonify({"error": "Playlist not found"}), 404
+
+    # Tracks, episodes, movies and photos come back from one UNION ALL query per page
+    items = playlist_items_select(playlist_id).subquery()
+    columns = {name: items.c[name] for name in PLAYLIST_ITEM_FIELDS}
+    return page_or_stream(db.session.query(items), items.c.item_key, columns, fields, limit, after)
+
+
+@api_bp.route("/playlists/summary", methods=["GET"])
+def get_playlists_summary():
+    limit, after = parse_page_args()
+    fields = parse_fields(PLAYLIST_FIELDS, DEFAULT_SUMMARY_FIELDS)
+
+    # Item counts are stored on the playlists, so the association tables are never read here
+    query = Playlist.query
+    playlist_type = request.args.get("type")
+    if playlist_type:
+        query = query.filter(Playlist.playlist_type == playlist_type)
+
+    return page_or_stream(query, Playlist.id, PLAYLIST_FIELDS, fields, limit, after)
+
+
+@api_bp.route("/search", methods=["GET"])
+def search():
+    query = request.args.get("q", "").strip()
+    if not query:
+        raise QueryArgumentError("q is required")
+    item_type = request.args.get("type")
+    if item_type is not None and item_type not in playlist_item_types.values():
+        raise QueryArgumentError(
+            f"Unknown type: {item_type}. Allowed types: {', '.join(playlist_item_types.values())}"
         )
 
-    return jsonify(tracks_result)
+    # Results are ranked rather than keyed, so after counts the results already returned
+    limit, after = parse_page_args()
+    fields = parse_fields(dict.fromkeys(SEARCH_FIELDS), DEFAULT_SEARCH_FIELDS)
+    offset = after or 0
+
+    results, has_more = search_items(query, limit, offset, item_type)
+    page = [{field: result[field] for field in fields} for result in results]
+    return page_response(page, offset + limit if has_more else None)
 
 
 @api_bp.route("/playlist_types", methods=["GET"])
 def get_playlist_types():
-    playlist_types = Playlist.query.with_entities(Playlist.section_type).distinct()
-    result = []
-    for p_type in playlist_types:
-        result.append({"id": p_type.id, "name": p_type.name})
-    return jsonify(result)
+    playlist_types = (
+        Playlist.query.with_entities(Playlist.playlist_type).distinct().order_by(Playlist.playlist_type)
+    )
+    return jsonify([{"name": playlist_type} for (playlist_type,) in playlist_types])
+
+
+@api_bp.route("/sync_runs", methods=["GET"])
+@uncached
+def get_sync_runs():
+    limit = min(max(request.args.get("limit", SYNC_RUNS_LIMIT, type=int), 1), MAX_SYNC_RUNS_LIMIT)
+    sync_runs = SyncRun.query.order_by(SyncRun.started_at.desc()).limit(limit).all()
+    return jsonify([sync_run.to_dict() for sync_run in sync_runs])
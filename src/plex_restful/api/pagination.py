@@ -0,0 +1,149 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app, jsonify, request, stream_with_context, url_for
+from sqlalchemy import ColumnElement
+from sqlalchemy.orm import Query
+
+from ..config import APIConfig
+from .serialization import dumps_bytes
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+class QueryArgumentError(ValueError):
+    pass
+
+
+def parse_page_args() -> Tuple[int, Optional[int]]:
+    """
+    Reads the limit and after query arguments of a keyset-paginated request.
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+        after = request.args.get("after")
+        after = int(after) if after is not None else None
+    except ValueError as e:
+        raise QueryArgumentError("limit and after must be integers") from e
+
+    if not 1 <= limit <= MAX_LIMIT:
+        raise QueryArgumentError(f"limit must be between 1 and {MAX_LIMIT}")
+    return limit, after
+
+
+def parse_fields(allowed: Dict[str, ColumnElement], default: Sequence[str]) -> List[str]:
+    """
+    Reads the comma-separated fields query argument, falling back to the default fields.
+    """
+    fields_arg = request.args.get("fields")
+    if not fields_arg:
+        return list(default)
+
+    fields = [field.strip() for field in fields_arg.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise QueryArgumentError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}"
+        )
+    return fields
+
+
+def paginate(
+    query: Query,
+    key_column: ColumnElement,
+    columns: Dict[str, ColumnElement],
+    fields: Sequence[str],
+    limit: int,
+    after: Optional[int],
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Runs one page of a keyset-paginated query, selecting only the requested columns.
+
+    Rows are ordered by key_column and start after the given key, so every page is an index range
+    scan no matter how deep it is. One extra row is fetched to tell whether another page follows.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[int]]: The page's rows as dicts of the requested fields,
+            and the key to pass as after for the next page, or None on the last page.
+    """
+    rows = _select_page(query, key_column, columns, fields, after).limit(limit + 1).all()
+
+    next_after = rows[limit - 1]._key if len(rows) > limit else None
+    return [{field: getattr(row, field) for field in fields} for row in rows[:limit]], next_after
+
+
+def page_response(items: List[Dict[str, Any]], next_after: Optional[int]):
+    """
+    Returns the page as a JSON array, with a Link header pointing at the next page if there is one.
+    """
+    response = jsonify(items)
+    if next_after is not None:
+        next_args = {**request.args.to_dict(), "after": next_after}
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **next_args)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-After"] = str(next_after)
+    return response
+
+
+def wants_ndjson() -> bool:
+    """
+    Returns whether the client asked for newline-delimited JSON over a JSON array.
+    """
+    accept = request.accept_mimetypes
+    return accept.quality(NDJSON_MIMETYPE) > accept.quality("application/json")
+
+
+def page_or_stream(
+    query: Query,
+    key_column: ColumnElement,
+    columns: Dict[str, ColumnElement],
+    fields: Sequence[str],
+    limit: int,
+    after: Optional[int],
+):
+    """
+    Returns one page of the query as a JSON array, or streams it as NDJSON if the client accepts
+    application/x-ndjson.
+
+    An NDJSON response holds one object per line and carries every row after the given key, or only
+    the first limit rows if limit was passed explicitly. Rows are read from the cursor in batches of
+    APIConfig.NDJSON_BATCH and each batch is sent as soon as it is encoded, so memory stays bounded
+    by the batch size no matter how large the playlist is.
+    """
+    if not wants_ndjson():
+        items, next_after = paginate(query, key_column, columns, fields, limit, after)
+        return page_response(items, next_after)
+
+    query = _select_page(query, key_column, columns, fields, after)
+    if "limit" in request.args:
+        query = query.limit(limit)
+    rows = query.execution_options(yield_per=APIConfig.NDJSON_BATCH)
+
+    def generate() -> Iterator[bytes]:
+        lines = []
+        for row in rows:
+            lines.append(dumps_bytes({field: getattr(row, field) for field in fields}))
+            if len(lines) == APIConfig.NDJSON_BATCH:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+    return current_app.response_class(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def _select_page(
+    query: Query,
+    key_column: ColumnElement,
+    columns: Dict[str, ColumnElement],
+    fields: Sequence[str],
+    after: Optional[int],
+) -> Query:
+    query = query.with_entities(
+        key_column.label("_key"), *(columns[field].label(field) for field in fields)
+    )
+    if after is not None:
+        query = query.filter(key_column > after)
+    return query.order_by(key_column)
@@ -1,23 +1,52 @@
+from typing import Any, Dict, Optional
+
 from flask import Flask
 from flask_cors import CORS
 
+from .api.compression import register_compression
 from .api.endpoints import api_bp
+from .api.serialization import FastJSONProvider
 from .apps.refresh.routes import main
 from .config import DBConfig, ServerConfig, SocketioConfig
+from .database.extensions import init_db
 
-socketio = SocketioConfig.socketio
+_app = None
 
 
-def create_app():
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     CORS(app)
     app.config.from_object(DBConfig)
+    if config:
+        app.config.update(config)
+    init_db(app)
+    SocketioConfig.get_socketio().init_app(app)
 
     app.register_blueprint(main)
     app.register_blueprint(api_bp, url_prefix="/api")
+    register_compression(app)
     return app
 
 
-app = create_app()
+def get_app() -> Flask:
+    """
+    Returns the app of this process, creating it on first use.
+    """
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name):
+    # `flask run` looks the app up as plex_restful.app:app; build it then instead of on import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
-    socketio.run(app, host=ServerConfig.HOST, port=ServerConfig.PORT, debug=ServerConfig.DEBUG)
+    SocketioConfig.get_socketio().run(
+        get_app(), host=ServerConfig.HOST, port=ServerConfig.PORT, debug=ServerConfig.DEBUG
+    )
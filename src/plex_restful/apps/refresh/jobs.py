@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from ...config import SocketioConfig, SyncConfig
+from ...database.extensions import db
+from ...database.models import SyncRun
+from ...database.progress import SyncProgress
+
+logger = logging.getLogger("app_logger")
+
+# Held by every database sync, so only one ever writes at a time whatever started it.
+sync_lock = threading.Lock()
+
+_populator = None
+
+
+def get_populator():
+    """
+    Returns the shared DatabasePopulator, creating it on the first sync.
+    """
+    global _populator
+    if _populator is None:
+        from ...database import DatabasePopulator
+
+        progress = SyncProgress(
+            _emit_sync_progress,
+            min_interval=SyncConfig.PROGRESS_INTERVAL,
+            max_batch=SyncConfig.PROGRESS_BATCH,
+        )
+        _populator = DatabasePopulator(progress=progress)
+    return _populator
+
+
+def _emit_sync_progress(events: List[Dict[str, Any]]) -> None:
+    socketio = SocketioConfig.socketio
+    # Syncs run from the CLI have no Socket.IO server to send to
+    if socketio is not None and socketio.server is not None:
+        socketio.emit("sync_progress", {"events": events})
+
+
+def run_sync(trigger: str) -> SyncRun:
+    """
+    Runs one incremental sync under sync_lock and records its duration and change counts in the
+    sync_runs table. Must be called inside an app context.
+
+    Args:
+        trigger (str): What started the sync (startup, manual, scheduled, cli).
+
+    Returns:
+        SyncRun: The recorded run. A failed sync is recorded and its exception re-raised.
+    """
+    with sync_lock:
+        started_at = datetime.now(timezone.utc)
+        start_time = time.perf_counter()
+        stats: Dict[str, int] = {}
+        error: Optional[Exception] = None
+        try:
+            stats = get_populator().run_db_population()
+        except Exception as e:
+            error = e
+
+        sync_run = SyncRun(
+            trigger=trigger,
+            status="failed" if error else "succeeded",
+            started_at=started_at,
+            duration=time.perf_counter() - start_time,
+            error=str(error)[:1024] if error else None,
+            **stats,
+        )
+        # The playlist data is unchanged by recording the run, so the generation is not bumped;
+        # /api/sync_runs is left out of the response cache instead
+        db.session.add(sync_run)
+        db.session.commit()
+
+        if error:
+            raise error
+        return sync_run
+
+
+class RefreshJob:
+    """
+    State of one background database refresh.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex
+        self.status = self.QUEUED
+        self.message: Optional[str] = None
+        self.error: Optional[str] = None
+        self.coalesced = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "message": self.message,
+            "error": self.error,
+            "coalesced": self.coalesced,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RefreshJobRunner:
+    """
+    Runs database refreshes on a background thread, one at a time.
+
+    A refresh requested while another is queued or running is coalesced into it: the caller gets the
+    in-flight job back instead of starting an overlapping sync.
+    """
+
+    def __init__(self, run: Callable[[], Optional[str]], max_history: int = 50) -> None:
+        """
+        Args:
+            run (Callable[[], Optional[str]]): Performs one refresh inside an app context, normally
+                through run_sync, and returns a completion message.
+            max_history (int): Number of finished jobs kept for the status endpoint.
+        """
+        self._run = run
+        self._max_history = max_history
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._current: Optional[RefreshJob] = None
+
+    def submit(self, app: Flask) -> Tuple[RefreshJob, bool]:
+        """
+        Starts a refresh, or joins the one already in flight.
+
+        Returns:
+            Tuple[RefreshJob, bool]: The job and whether it was newly started.
+        """
+        with self._lock:
+            if self._current is not None and not self._current.done:
+                self._current.coalesced += 1
+                logger.info(f"Refresh already in flight, coalescing into job {self._current.id}")
+                return self._current, False
+
+            job = RefreshJob()
+            self._current = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._max_history:
+                self._jobs.popitem(last=False)
+
+        thread = threading.Thread(
+            target=self._work, args=(app, job), name=f"refresh-{job.id[:8]}", daemon=True
+        )
+        thread.start()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def current(self) -> Optional[RefreshJob]:
+        with self._lock:
+            return self._current
+
+    def _work(self, app: Flask, job: RefreshJob) -> None:
+        job.status = RefreshJob.RUNNING
+        job.started_at = time.time()
+        logger.info(f"Refresh job {job.id} started")
+        try:
+            with app.app_context():
+                job.message = self._run()
+            job.status = RefreshJob.SUCCEEDED
+        except Exception as e:
+            logger.error(f"Refresh job {job.id} failed", exc_info=True)
+            job.error = str(e)
+            job.status = RefreshJob.FAILED
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Refresh job {job.id} {job.status}")
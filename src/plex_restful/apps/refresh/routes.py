@@ -1,15 +1,25 @@
-import time
-
-from flask import Blueprint, current_app, jsonify, render_template
+from flask import Blueprint, current_app, jsonify, render_template, url_for
 
 from ...config import SocketioConfig
-from ...database import DatabasePopulator
+from .jobs import RefreshJobRunner, run_sync
 
-populator = DatabasePopulator()
-socketio = SocketioConfig.socketio
 main = Blueprint("main", __name__)
 
 
+def run_refresh() -> str:
+    """
+    Runs one database refresh and announces its completion. Called on the job runner's thread.
+    """
+    current_app.logger.info("Refreshing database")
+    sync_run = run_sync("manual")
+    completed_message = f"Refresh executed in {sync_run.duration:.2f} seconds"
+    SocketioConfig.get_socketio().emit("log_message", {"message": completed_message})
+    return completed_message
+
+
+refresh_jobs = RefreshJobRunner(run_refresh)
+
+
 @main.route("/")
 def index():
     return render_template("index.html")
@@ -17,11 +27,16 @@ def index():
 
 @main.route("/refresh", methods=["POST"])
 def refresh():
-    current_app.logger.info("Refreshing database")
-    start_time = time.time()
-    populator.run_db_population()
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    completed_message = f"Refresh executed in {elapsed_time:.2f} seconds"
-    socketio.emit("log_message", {"message": completed_message})
-    return jsonify({"message": completed_message})
+    job, started = refresh_jobs.submit(current_app._get_current_object())
+    message = "Refresh started" if started else "Refresh already in progress"
+    response = jsonify({**job.to_dict(), "message": message})
+    response.headers["Location"] = url_for("main.refresh_status", job_id=job.id)
+    return response, 202
+
+
+@main.route("/refresh/<job_id>", methods=["GET"])
+def refresh_status(job_id):
+    job = refresh_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Refresh job not found"}), 404
+    return jsonify(job.to_dict())
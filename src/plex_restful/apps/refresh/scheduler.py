@@ -0,0 +1,121 @@
+import logging
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+from flask import Flask
+
+from ...config import SyncConfig
+from .jobs import run_sync
+
+logger = logging.getLogger("app_logger")
+
+_INTERVAL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Doubling stops here; MAX_BACKOFF caps the delay well before it matters
+_MAX_BACKOFF_LEVEL = 16
+
+
+def parse_interval(value: str) -> float:
+    """
+    Parses an interval such as "900", "30s", "15m" or "1h" into seconds.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid interval: {value!r} (expected e.g. 900, 30s, 15m or 1h)")
+    return float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+class SyncScheduler:
+    """
+    Runs incremental syncs on an interval, randomized by a jitter fraction.
+
+    A sync that fails or takes longer than slow_run doubles the next delay, up to max_backoff,
+    until a healthy run resets it. Runs go through run_sync, so they share the sync lock with
+    manual refreshes and are recorded in sync_runs.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        interval: Optional[float] = None,
+        jitter: Optional[float] = None,
+        slow_run: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        trigger: str = "scheduled",
+    ) -> None:
+        self.app = app
+        self.interval = interval if interval is not None else SyncConfig.INTERVAL
+        self.jitter = jitter if jitter is not None else SyncConfig.JITTER
+        self.slow_run = slow_run if slow_run is not None else SyncConfig.SLOW_RUN
+        self.max_backoff = max_backoff if max_backoff is not None else SyncConfig.MAX_BACKOFF
+        self.trigger = trigger
+        self.backoff_level = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def next_delay(self, duration: float, failed: bool) -> float:
+        """
+        Returns the seconds to wait after a run, updating the backoff level from its outcome.
+        """
+        if failed or duration > self.slow_run:
+            self.backoff_level = min(self.backoff_level + 1, _MAX_BACKOFF_LEVEL)
+        else:
+            self.backoff_level = 0
+
+        delay = min(self.interval * 2**self.backoff_level, max(self.interval, self.max_backoff))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_once(self) -> float:
+        """
+        Runs one sync and returns the delay before the next one.
+        """
+        start_time = time.perf_counter()
+        failed = False
+        try:
+            with self.app.app_context():
+                sync_run = run_sync(self.trigger)
+                logger.info(
+                    f"Sync finished in {sync_run.duration:.2f}s: {sync_run.playlists_updated} "
+                    f"playlists updated, {sync_run.items_added} items added, "
+                    f"{sync_run.items_removed} removed"
+                )
+        except Exception:
+            logger.error("Scheduled sync failed", exc_info=True)
+            failed = True
+
+        delay = self.next_delay(time.perf_counter() - start_time, failed)
+        logger.info(f"Next sync in {delay:.0f}s (backoff level {self.backoff_level})")
+        return delay
+
+    def run_forever(self, initial_delay: float = 0.0) -> None:
+        """
+        Runs syncs until stop() is called, starting after initial_delay seconds.
+        """
+        delay = initial_delay
+        while not self._stop.wait(delay):
+            delay = self.run_once()
+
+    def start(self, initial_delay: Optional[float] = None) -> None:
+        """
+        Runs the schedule on a daemon thread. The first sync waits one interval by default, since
+        the server syncs once at startup.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever,
+            args=(self.interval if initial_delay is None else initial_delay,),
+            name="sync-scheduler",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"Sync scheduler started with a {self.interval:.0f}s interval")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,389 @@
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+from xml.sax.saxutils import quoteattr
+
+import click
+from flask import Flask
+from sqlalchemy import event, func, select
+
+from .database.extensions import db, init_db
+from .database.models import Playlist, Track, playlist_track
+from .database.populate import DatabasePopulator
+from .plex import iter_media_container
+from .testing import (
+    FakePlexServer,
+    SyntheticLibrary,
+    fake_plex_environment,
+    membership_differences,
+)
+
+# Entry points whose cold start is guarded: the `cmd` CLI and the API app
+IMPORT_TARGETS = ("plex_restful.main", "plex_restful.app")
+# Modules the entry points must not load at import time
+FORBIDDEN_IMPORTS = ("plexapi", "aiohttp", "socketio", "plex_restful.database.populate")
+
+# DatabasePopulator options of each fetch path; "cached" also replays its cache offline afterwards
+SYNC_MODES = {
+    "threads": {"async_fetch": False, "stream_items": False},
+    "stream": {"async_fetch": False, "stream_items": True},
+    "async": {"async_fetch": True, "stream_items": False},
+    "cached": {"async_fetch": False, "stream_items": False},
+}
+
+
+def create_benchmark_app(database_uri: str = "sqlite://") -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    init_db(app)
+    return app
+
+
+@contextmanager
+def measure(engine):
+    """
+    Counts the statements sent to the database and the wall time spent inside the block.
+    """
+    result = {"statements": 0, "seconds": 0.0}
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        result["statements"] += 1
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    start_time = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start_time
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+
+def _create_playlist_with_tracks(item_count: int):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    playlist = Playlist(rating_key=1, title="benchmark", playlist_type="audio")
+    tracks = _build_tracks(item_count)
+    db.session.add(playlist)
+    db.session.add_all(tracks)
+    db.session.commit()
+    return playlist, tracks
+
+
+def measure_import_time(module: str) -> Dict[str, int]:
+    """
+    Imports a module in a fresh interpreter with -X importtime and returns the cumulative import
+    time of every module it loaded, in microseconds.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def _build_tracks(item_count: int, rating_key_offset: int = 1000):
+    return [
+        Track(
+            rating_key=rating_key_offset + i,
+            title=f"Track {i}",
+            track_number=i % 20 + 1,
+            album_title=f"Album {i // 20}",
+            artist_name=f"Artist {i // 200}",
+        )
+        for i in range(item_count)
+    ]
+
+
+def _build_container_xml(item_count: int) -> bytes:
+    # Track elements shaped like a /playlists/{key}/items response; every 100th title carries a
+    # control character that is illegal in XML, as Plex sometimes sends, so both readers must clean.
+    rows = []
+    for i in range(item_count):
+        title = f"Track {i}" + ("\x0b" if i % 100 == 0 else "")
+        rows.append(
+            f'<Track ratingKey="{1000 + i}" key="/library/metadata/{1000 + i}" '
+            f'parentRatingKey="{i // 20}" grandparentRatingKey="{i // 200}" type="track" '
+            f'title={quoteattr(title)} parentTitle="Album {i // 20}" '
+            f'grandparentTitle="Artist {i // 200}" index="{i % 20 + 1}" duration="{180000 + i}" '
+            f'playlistItemID="{i + 1}" addedAt="1700000000" updatedAt="1700000000">'
+            f'<Media id="{i}" duration="{180000 + i}" bitrate="320" audioChannels="2" audioCodec="mp3">'
+            f'<Part id="{i}" key="/library/parts/{i}/file.mp3" duration="{180000 + i}" '
+            f'file="/music/Artist {i // 200}/Album {i // 20}/{i % 20 + 1:02d}.mp3" size="7340032"/>'
+            f"</Media></Track>"
+        )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<MediaContainer size="{item_count}" '
+        f'leafCount="{item_count}" playlistType="audio" title="benchmark">'
+        f"{''.join(rows)}</MediaContainer>"
+    ).encode()
+
+
+def _read_with_plexapi(data: bytes) -> List[object]:
+    from plexapi import utils as plex_utils
+    from plexapi.base import PlexObject
+    from plexapi.server import PlexServer
+
+    # An unconnected server is enough for findItems to build the objects, as playlist.items() does
+    server = PlexServer.__new__(PlexServer)
+    server._server = None
+    initpath = "/playlists/1/items"
+    return PlexObject.findItems(server, plex_utils.parseXMLString(data.decode()), initpath=initpath)
+
+
+def _read_with_stream(data: bytes) -> List[object]:
+    chunk_size = 64 * 1024
+    return list(iter_media_container(data[i : i + chunk_size] for i in range(0, len(data), chunk_size)))
+
+
+def _measure_reader(read: Callable[[bytes], List[object]], data: bytes) -> Dict[str, float]:
+    start_time = time.perf_counter()
+    items = read(data)
+    seconds = time.perf_counter() - start_time
+    count = len(items)
+    del items
+
+    tracemalloc.start()
+    read(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"items": count, "seconds": seconds, "peak": peak}
+
+
+def _run_sync(label: str, server: FakePlexServer, library: SyntheticLibrary, **options) -> bool:
+    requests_before = sum(server.requests.values())
+    with measure(db.engine) as result:
+        stats = DatabasePopulator(**options).run_db_population()
+    db.session.expire_all()
+
+    differing = len(membership_differences(library))
+    click.echo(
+        f"{label:>18}: +{stats['playlists_added']}/-{stats['playlists_removed']} playlists, "
+        f"+{stats['items_added']}/-{stats['items_removed']} items, "
+        f"{sum(server.requests.values()) - requests_before} requests, "
+        f"{result['statements']} statements, {result['seconds']:.2f}s, "
+        + ("in sync" if not differing else f"{differing} playlists differ")
+    )
+    return not differing
+
+
+def _associate_legacy(playlist, tracks) -> None:
+    # Per-item membership check and append on the dynamic relationship, as the populator used to.
+    for track in tracks:
+        if track not in playlist.tracks:
+            playlist.tracks.append(track)
+    db.session.add(playlist)
+    db.session.commit()
+
+
+def _associate_bulk(playlist, tracks) -> None:
+    populator = DatabasePopulator()
+    populator.db_playlists = {playlist.rating_key: playlist}
+    populator.associate_items_with_playlists({playlist: tracks}, "tracks")
+    db.session.commit()
+
+
+@click.group()
+def main():
+    """Benchmarks for the database sync stages."""
+
+
+@main.command()
+@click.option("-n", "--items", default=10000, help="Number of tracks in the playlist.")
+@click.option("--legacy/--no-legacy", default=True, help="Also run the per-item association path.")
+def associate(items, legacy):
+    """Compare per-item and bulk association of a playlist's tracks."""
+    app = create_benchmark_app()
+    runs = [("bulk", _associate_bulk)]
+    if legacy:
+        runs.insert(0, ("per-item", _associate_legacy))
+
+    with app.app_context():
+        for label, associate_tracks in runs:
+            playlist, tracks = _create_playlist_with_tracks(items)
+            with measure(db.engine) as result:
+                associate_tracks(playlist, tracks)
+            rows = db.session.scalar(select(func.count()).select_from(playlist_track))
+            click.echo(
+                f"{label:>8}: {items} tracks, {rows} rows, {result['statements']} statements, "
+                f"{result['seconds']:.2f}s"
+            )
+
+
+@main.command()
+@click.option("-n", "--items", default=10000, help="Number of new tracks to write.")
+def upsert(items):
+    """Measure the ratingKey upsert of new tracks, then of the same tracks written again."""
+    app = create_benchmark_app()
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        populator = DatabasePopulator()
+        for label, rating_key_offset in (("insert", 1000), ("update", 1000)):
+            playlist = Playlist(rating_key=1, title="benchmark", playlist_type="audio")
+            with measure(db.engine) as result:
+                populator.save_new_items({playlist: _build_tracks(items, rating_key_offset)})
+                db.session.commit()
+            rows = db.session.scalar(select(func.count()).select_from(Track))
+            click.echo(
+                f"{label:>8}: {items} tracks, {rows} rows, {result['statements']} statements, "
+                f"{result['seconds']:.2f}s"
+            )
+
+
+@main.command()
+@click.option("-n", "--items", default=50000, help="Number of tracks in the generated container.")
+@click.option(
+    "-f",
+    "--file",
+    "path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Recorded MediaContainer XML response to read instead of a generated one.",
+)
+def xmlparse(items, path):
+    """Compare plexapi object construction with the streaming record reader on one container."""
+    if path:
+        with open(path, "rb") as f:
+            data = f.read()
+    else:
+        data = _build_container_xml(items)
+    click.echo(f"container: {len(data) / 1024 / 1024:.1f} MiB")
+
+    for label, read in (("plexapi", _read_with_plexapi), ("stream", _read_with_stream)):
+        result = _measure_reader(read, data)
+        click.echo(
+            f"{label:>8}: {result['items']} items, {result['seconds']:.2f}s, "
+            f"{result['items'] / result['seconds']:,.0f} items/s, "
+            f"peak {result['peak'] / 1024 / 1024:.1f} MiB"
+        )
+
+
+@main.command()
+@click.option("--max-ms", default=1000, help="Fail if an entry point takes longer to import.")
+@click.option(
+    "--forbid",
+    multiple=True,
+    default=FORBIDDEN_IMPORTS,
+    help="Module that must not be loaded at import time; may be repeated.",
+)
+@click.option("--top", default=5, help="Number of slowest top-level imports to show.")
+def importtime(max_ms, forbid, top):
+    """Guard the cold-start import time of the CLI and the API app."""
+    failures = []
+    for target in IMPORT_TARGETS:
+        times = measure_import_time(target)
+        total_ms = times[target] / 1000
+        click.echo(f"{target}: {total_ms:.0f}ms, {len(times)} modules")
+
+        top_level = {}
+        for name, cumulative in times.items():
+            root = name.split(".")[0]
+            top_level[root] = max(top_level.get(root, 0), cumulative)
+        for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[1 : top + 1]:
+            click.echo(f"  {name:<24} {cumulative / 1000:.0f}ms")
+
+        if total_ms > max_ms:
+            failures.append(f"{target} took {total_ms:.0f}ms (limit {max_ms}ms)")
+        loaded = [module for module in forbid if module in times]
+        if loaded:
+            failures.append(f"{target} loaded {', '.join(loaded)} at import time")
+
+    if failures:
+        raise click.ClickException("; ".join(failures))
+
+
+@main.command()
+@click.option("-p", "--playlists", default=20, help="Number of playlists in the synthetic library.")
+@click.option("-n", "--items", default=500, help="Number of items in each playlist.")
+@click.option(
+    "--rounds", default=3, help="Number of syncs; the library is mutated before each after the first."
+)
+@click.option("--changes", default=10, help="Number of mutations applied between syncs.")
+@click.option(
+    "-m",
+    "--mode",
+    "modes",
+    type=click.Choice(list(SYNC_MODES)),
+    multiple=True,
+    default=tuple(SYNC_MODES),
+    help="Fetch path to sync with; may be repeated. Defaults to all of them.",
+)
+@click.option("--latency", default=0.0, help="Seconds the fake server waits before every response.")
+@click.option("--seed", default=0, help="Seed of the synthetic library and its mutations.")
+def sync(playlists, items, rounds, changes, modes, latency, seed):
+    """Sync a synthetic library from a local fake Plex server through each fetch path."""
+    failures = []
+    for mode in modes:
+        library = SyntheticLibrary.generate(playlists, items, seed=seed)
+        app = create_benchmark_app()
+        with app.app_context(), tempfile.TemporaryDirectory() as cache_dir:
+            db.create_all()
+            cache_config = {"RESPONSE_CACHE": mode == "cached", "RESPONSE_CACHE_DIR": cache_dir}
+            with FakePlexServer(library, latency=latency) as server:
+                with fake_plex_environment(server, **cache_config):
+                    for round_number in range(1, rounds + 1):
+                        if round_number > 1:
+                            library.mutate(changes)
+                        if not _run_sync(f"{mode} {round_number}", server, library, **SYNC_MODES[mode]):
+                            failures.append(f"{mode} round {round_number}")
+
+            if mode == "cached":
+                # The server is gone; a fresh database must be rebuilt from the cached responses alone
+                db.session.remove()
+                db.drop_all()
+                db.create_all()
+                with fake_plex_environment(server, OFFLINE=True, **cache_config):
+                    if not _run_sync("offline replay", server, library, **SYNC_MODES[mode]):
+                        failures.append("offline replay")
+
+    if failures:
+        raise click.ClickException(f"Database out of sync with the library after: {', '.join(failures)}")
+
+
+@main.command()
+@click.option("-p", "--playlists", default=20, help="Number of playlists in the synthetic library.")
+@click.option("-n", "--items", default=500, help="Number of items in each playlist.")
+@click.option("--port", default=32400, help="Port to listen on.")
+@click.option("--token", default="fake-token", help="X-Plex-Token the server accepts.")
+@click.option("--latency", default=0.0, help="Seconds the server waits before every response.")
+@click.option(
+    "--mutate-every", default=0.0, help="Apply random mutations every this many seconds; 0 never does."
+)
+@click.option("--changes", default=10, help="Number of mutations applied each time.")
+@click.option("--seed", default=0, help="Seed of the synthetic library and its mutations.")
+def fakeplex(playlists, items, port, token, latency, mutate_every, changes, seed):
+    """Serve a synthetic library as a local Plex server, for running the sync against."""
+    library = SyntheticLibrary.generate(playlists, items, seed=seed)
+    server = FakePlexServer(library, token=token, port=port, latency=latency)
+    click.echo(" ".join(f"{name}={value}" for name, value in server.environ().items()))
+    if not mutate_every:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    with server:
+        try:
+            while True:
+                time.sleep(mutate_every)
+                for change in library.mutate(changes):
+                    click.echo(change)
+        except KeyboardInterrupt:
+            pass
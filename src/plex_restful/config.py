@@ -1,12 +1,21 @@
 import os
 
-from flask_socketio import SocketIO
-
 
 class DBConfig:
-    DB_PATH = "sqlite:///src/instance/plex_restful.db"
-    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///plex_restful.db")
+    INSTANCE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "instance")
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        "DATABASE_URL", f"sqlite:///{os.path.join(INSTANCE_PATH, 'plex_restful.db')}"
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Applied to every new SQLite connection; WAL lets API reads run alongside a sync write.
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64 * 1024)),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+    }
 
 
 class PlexConfig:
@@ -14,6 +23,50 @@ class PlexConfig:
     CRED_PATH = os.path.join(
         os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "tests/.plex_cred/credentials.json"
     )
+    FETCH_WORKERS = int(os.getenv("PLEX_FETCH_WORKERS", 8))
+    # Fetch playlist items with the asyncio client (needs aiohttp) instead of plexapi threads
+    ASYNC_FETCH = os.getenv("PLEX_ASYNC_FETCH", "0") == "1"
+    # Read playlist items from the streamed XML as compact records instead of plexapi objects
+    STREAM_ITEMS = os.getenv("PLEX_STREAM_ITEMS", "0") == "1"
+    ASYNC_CONCURRENCY = int(os.getenv("PLEX_ASYNC_CONCURRENCY", 16))
+    PAGE_SIZE = int(os.getenv("PLEX_PAGE_SIZE", 500))
+    REQUEST_TIMEOUT = float(os.getenv("PLEX_REQUEST_TIMEOUT", 30))
+    # Pooled keep-alive connections and retries of the shared Plex HTTP session
+    POOL_SIZE = int(os.getenv("PLEX_POOL_SIZE", 16))
+    MAX_RETRIES = int(os.getenv("PLEX_MAX_RETRIES", 3))
+    RETRY_BACKOFF = float(os.getenv("PLEX_RETRY_BACKOFF", 0.5))
+    # A server handle idle for longer than this is probed before it is reused
+    HEALTH_CHECK_INTERVAL = float(os.getenv("PLEX_HEALTH_CHECK_INTERVAL", 60))
+    # Opt-in on-disk cache of Plex responses; offline mode answers every request from it
+    OFFLINE = os.getenv("PLEX_OFFLINE", "0") == "1"
+    RESPONSE_CACHE = OFFLINE or os.getenv("PLEX_RESPONSE_CACHE", "0") == "1"
+    RESPONSE_CACHE_DIR = os.getenv(
+        "PLEX_RESPONSE_CACHE_DIR", os.path.join(DBConfig.INSTANCE_PATH, "plex_cache")
+    )
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("PLEX_RESPONSE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class SyncConfig:
+    # Seconds between scheduled syncs in the server process; 0 disables the scheduler
+    INTERVAL = float(os.getenv("PLEX_SYNC_INTERVAL", 900))
+    # Each delay is randomized by up to this fraction so syncs do not align across instances
+    JITTER = float(os.getenv("PLEX_SYNC_JITTER", 0.1))
+    # A run slower than this many seconds counts as Plex being slow and backs the schedule off
+    SLOW_RUN = float(os.getenv("PLEX_SYNC_SLOW_RUN", 120))
+    MAX_BACKOFF = float(os.getenv("PLEX_SYNC_MAX_BACKOFF", 3600))
+    # Progress events are sent over Socket.IO in batches at most this often (seconds)
+    PROGRESS_INTERVAL = float(os.getenv("PLEX_SYNC_PROGRESS_INTERVAL", 0.25))
+    PROGRESS_BATCH = int(os.getenv("PLEX_SYNC_PROGRESS_BATCH", 200))
+
+
+class APIConfig:
+    # In-process cache of serialized API responses, dropped whenever the database generation changes
+    RESPONSE_CACHE_ENTRIES = int(os.getenv("API_RESPONSE_CACHE_ENTRIES", 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("API_RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    # Responses smaller than this are sent uncompressed
+    COMPRESS_MIN_SIZE = int(os.getenv("API_COMPRESS_MIN_SIZE", 1024))
+    # Rows read from the cursor and sent per chunk of a streamed NDJSON response
+    NDJSON_BATCH = int(os.getenv("API_NDJSON_BATCH", 500))
 
 
 class ServerConfig:
@@ -23,4 +76,13 @@ class ServerConfig:
 
 
 class SocketioConfig:
-    socketio = SocketIO()
+    # Created on first use, so importing the config does not load Flask-SocketIO
+    socketio = None
+
+    @classmethod
+    def get_socketio(cls):
+        if cls.socketio is None:
+            from flask_socketio import SocketIO
+
+            cls.socketio = SocketIO()
+        return cls.socketio
@@ -1,3 +1,12 @@
 # src/db_tester/database/__init__.py
 
-from .populate import DatabasePopulator  # noqa: F401
+__all__ = ["DatabasePopulator"]
+
+
+def __getattr__(name):
+    # The populator pulls in plexapi; import it on first use so the models and API load without it.
+    if name == "DatabasePopulator":
+        from .populate import DatabasePopulator
+
+        return DatabasePopulator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,55 @@
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, select, update
+
+from .extensions import db
+from .models import DatabaseGeneration, Playlist, playlist_count_expressions
+
+logger = logging.getLogger("app_logger")
+
+COUNT_COLUMNS = ("item_count", "track_count", "episode_count", "movie_count", "photo_count")
+
+
+def check_playlist_counts(fix: bool = False) -> List[Dict[str, Any]]:
+    """
+    Recomputes every playlist's item counts from the association tables and reports the playlists
+    whose stored counts drifted from them.
+
+    Args:
+        fix (bool): Whether to overwrite the drifted counts with the recomputed ones and commit.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per drifted playlist with its id, title and, for every count
+            that differs, the stored and actual values.
+    """
+    counts = playlist_count_expressions()
+    rows = db.session.execute(
+        select(
+            Playlist.id,
+            Playlist.title,
+            *(getattr(Playlist, name) for name in COUNT_COLUMNS),
+            *(counts[name].label(f"actual_{name}") for name in COUNT_COLUMNS),
+        ).order_by(Playlist.id)
+    )
+
+    drift = []
+    for row in rows:
+        differences = {
+            name: {"stored": getattr(row, name), "actual": getattr(row, f"actual_{name}")}
+            for name in COUNT_COLUMNS
+            if getattr(row, name) != getattr(row, f"actual_{name}")
+        }
+        if differences:
+            drift.append({"id": row.id, "title": row.title, "counts": differences})
+            logger.warning(f"Playlist '{row.title}' has drifted item counts: {differences}")
+
+    if fix and drift:
+        db.session.execute(
+            update(Playlist.__table__).where(Playlist.id == bindparam("playlist_id")).values(**counts),
+            [{"playlist_id": entry["id"]} for entry in drift],
+        )
+        DatabaseGeneration.bump()
+        db.session.commit()
+        logger.info(f"Fixed item counts of {len(drift)} playlists")
+    return drift
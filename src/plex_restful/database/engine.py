@@ -0,0 +1,77 @@
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from ..config import DBConfig
+
+logger = logging.getLogger("app_logger")
+
+
+def create_db_engine(
+    database_uri: Optional[str] = None, pragmas: Optional[Dict[str, Any]] = None, **options: Any
+) -> Engine:
+    """
+    Creates an engine for the configured database with the SQLite pragmas applied on connect.
+
+    Args:
+        database_uri (Optional[str]): Database URI. Defaults to DBConfig.SQLALCHEMY_DATABASE_URI.
+        pragmas (Optional[Dict[str, Any]]): SQLite pragmas. Defaults to DBConfig.SQLITE_PRAGMAS.
+        **options: Extra keyword arguments passed to sqlalchemy.create_engine.
+
+    Returns:
+        Engine: The configured engine.
+    """
+    engine = create_engine(database_uri or DBConfig.SQLALCHEMY_DATABASE_URI, **options)
+    return configure_engine(engine, pragmas)
+
+
+def configure_engine(engine: Engine, pragmas: Optional[Dict[str, Any]] = None) -> Engine:
+    """
+    Registers the connect and begin listeners of a SQLite engine and creates the directory of its
+    database file. Other dialects are left untouched.
+
+    Every new connection gets the pragmas, and pysqlite's own transaction handling is switched off
+    so BEGIN is emitted by SQLAlchemy. pysqlite defers BEGIN until the first write and never emits
+    it before a SAVEPOINT, so releasing the first savepoint of a sync run would otherwise commit it.
+
+    Args:
+        engine (Engine): Engine to configure, before it has opened any connection.
+        pragmas (Optional[Dict[str, Any]]): SQLite pragmas. Defaults to DBConfig.SQLITE_PRAGMAS.
+
+    Returns:
+        Engine: The same engine.
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    if engine.url.database and engine.url.database != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(engine.url.database)), exist_ok=True)
+    pragmas = DBConfig.SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            dbapi_connection.isolation_level = None
+        _apply_pragmas(dbapi_connection, pragmas)
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def _apply_pragmas(dbapi_connection, pragmas: Dict[str, Any]) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if value is None:
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+            logger.debug(f"SQLite pragma {name} = {value}")
+    finally:
+        cursor.close()
@@ -1,8 +1,8 @@
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData, create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.orm import DeclarativeBase
 
-from ..config import DBConfig
+from .engine import configure_engine
 
 
 # Define the base class for SQLAlchemy models
@@ -13,17 +13,17 @@ class Base(DeclarativeBase):
 # Initialize Flask extensions
 db = SQLAlchemy(model_class=Base)
 
-# Database configuration
-# db_path = "sqlite:///src/instance/plex_restful.db"
-db_path = DBConfig.DB_PATH
 
-# Create an engine and connect to the database
-engine = create_engine(db_path)
+def init_db(app: Flask) -> None:
+    """
+    Binds the database to the app, configures its engines like create_db_engine does, and has
+    create_all build the search index.
+    """
+    # Imported here since the search index is defined over the models, which need db
+    from .search import register_search_index
 
-# Reflect the database schema
-metadata = MetaData()
-metadata.reflect(bind=engine)
-
-# Create a session
-Session = sessionmaker(bind=engine)
-session = Session()
+    db.init_app(app)
+    register_search_index(db.metadata)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config.get("SQLITE_PRAGMAS"))
@@ -1,165 +1,221 @@
 import logging
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
 
 # from ..app import app
-from ..plex import plex_exceptions
 
 logger = logging.getLogger("app_logger")
 
 
-def get_playlists_to_add_and_remove(db_playlists, plex_playlists):
-    db_playlist_titles = {db_playlist.title for db_playlist in db_playlists}
-    plex_playlist_titles = {plex_playlist.title for plex_playlist in plex_playlists}
+class PlexParentCache:
+    """
+    Per-run memo of Plex parent objects (albums, artists, seasons, shows) keyed by ratingKey.
+
+    Parent titles and indexes are normally read straight off the item; this cache only backs the
+    album()/artist()/season()/show() round-trips needed when an item lacks them.
+    """
+
+    def __init__(self) -> None:
+        self._parents: Dict[int, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, rating_key: Optional[int], fetch: Callable[[], Any]) -> Any:
+        if rating_key is not None and rating_key in self._parents:
+            self.hits += 1
+            return self._parents[rating_key]
+
+        self.misses += 1
+        parent = fetch()
+        if rating_key is not None:
+            self._parents[rating_key] = parent
+        return parent
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        self._parents.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class TransactionCounter:
+    """
+    Counts the commits, rollbacks and savepoints issued on an engine while the block runs.
+
+    SQLite does not report its fsyncs, so the commit count stands in for them: every commit is one
+    durable write of the journal, while savepoints are released without syncing.
+    """
+
+    EVENTS = ("commit", "rollback", "savepoint", "rollback_savepoint")
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.counts: Dict[str, int] = dict.fromkeys(self.EVENTS, 0)
+        self._listeners: Dict[str, Callable[..., None]] = {}
+
+    def __enter__(self) -> "TransactionCounter":
+        for name in self.EVENTS:
+            self._listeners[name] = lambda *args, name=name: self._count(name)
+            event.listen(self.engine, name, self._listeners[name])
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for name, listener in self._listeners.items():
+            event.remove(self.engine, name, listener)
+        self._listeners.clear()
+
+    def _count(self, name: str) -> None:
+        self.counts[name] += 1
+
+    def summary(self) -> str:
+        return (
+            f"{self.counts['commit']} commits (fsyncs), {self.counts['rollback']} rollbacks, "
+            f"{self.counts['savepoint']} savepoints ({self.counts['rollback_savepoint']} rolled back)"
+        )
+
+
+class ItemRenameCounter:
+    """
+    Counts the stored items whose title is changed in place while the block runs.
+
+    The sync refreshes the title of a known item that was renamed on Plex wherever it meets one, in
+    the diff as well as in the parsers, even when nothing else about its playlists changed.
+    """
 
-    add_playlists = plex_playlist_titles - db_playlist_titles
-    remove_playlists = db_playlist_titles - plex_playlist_titles
+    def __init__(self, models: Iterable[type]) -> None:
+        self.models = tuple(models)
+        self.renamed: Set[Tuple[type, int]] = set()
+
+    def __enter__(self) -> "ItemRenameCounter":
+        for model in self.models:
+            event.listen(model.title, "set", self._on_set)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for model in self.models:
+            event.remove(model.title, "set", self._on_set)
+
+    @property
+    def count(self) -> int:
+        return len(self.renamed)
+
+    def _on_set(self, target: Any, value: Any, oldvalue: Any, initiator: Any) -> None:
+        # New items get their title set too, when they are built
+        if value != oldvalue and inspect(target).persistent:
+            self.renamed.add((type(target), target.id))
+
+
+def get_track_parent_titles(plex_track, parent_cache: PlexParentCache) -> Tuple[str, str]:
+    album_title = plex_track.parentTitle
+    if album_title is None:
+        album_title = parent_cache.get(plex_track.parentRatingKey, plex_track.album).title
+
+    artist_name = plex_track.grandparentTitle
+    if artist_name is None:
+        artist_name = parent_cache.get(plex_track.grandparentRatingKey, plex_track.artist).title
+
+    return album_title, artist_name
+
+
+def get_episode_parent_info(plex_episode, parent_cache: PlexParentCache) -> Tuple[int, str]:
+    season_number = plex_episode.parentIndex
+    if season_number is None:
+        season_number = parent_cache.get(plex_episode.parentRatingKey, plex_episode.season).index
+
+    show_title = plex_episode.grandparentTitle
+    if show_title is None:
+        show_title = parent_cache.get(plex_episode.grandparentRatingKey, plex_episode.show).title
+
+    return season_number, show_title
+
+
+def get_episode_show_year(plex_episode, parent_cache: PlexParentCache) -> Optional[int]:
+    # Episodes carry no show year attribute, so this always goes through the cache.
+    return parent_cache.get(plex_episode.grandparentRatingKey, plex_episode.show).year
+
+
+def get_playlists_to_add_and_remove(db_playlists, plex_snapshot):
+    db_playlist_keys = {db_playlist.rating_key for db_playlist in db_playlists}
+    plex_playlist_keys = plex_snapshot.rating_keys()
+
+    add_playlists = plex_playlist_keys - db_playlist_keys
+    remove_playlists = db_playlist_keys - plex_playlist_keys
 
     return add_playlists, remove_playlists
 
 
-def get_out_of_date_data(db_playlists, plex_playlists):
+def get_renamed_playlists(db_playlist_dict, plex_snapshot):
+    """
+    Returns (db_playlist, plex_playlist) pairs for playlists whose title changed on the Plex server.
+    """
+    renamed_playlists = []
+    for plex_playlist in plex_snapshot:
+        db_playlist = db_playlist_dict.get(plex_playlist.ratingKey)
+        if db_playlist and db_playlist.title != plex_playlist.title:
+            renamed_playlists.append((db_playlist, plex_playlist))
+    return renamed_playlists
+
+
+def get_changed_playlists(db_playlist_dict, plex_snapshot):
+    """
+    Returns the Plex playlists that are new or whose stored fingerprint no longer matches.
+    """
+    changed_playlists = []
+    for plex_playlist in plex_snapshot:
+        db_playlist = db_playlist_dict.get(plex_playlist.ratingKey)
+        if db_playlist and db_playlist.fingerprint and db_playlist.fingerprint.matches(plex_playlist):
+            continue
+        changed_playlists.append(plex_playlist)
+
+    logger.info(
+        f"{len(changed_playlists)} of {len(plex_snapshot)} playlists changed since the last sync."
+    )
+    return changed_playlists
+
+
+def get_out_of_date_data(db_playlists, plex_snapshot):
     logger.info("Starting to check for out-of-date playlists.")
     out_of_date_data = {}
-    plex_playlist_dict = {pl.title: pl for pl in plex_playlists}
 
     for db_playlist in db_playlists:
-        try:
-            plex_playlist = plex_playlist_dict.get(db_playlist.title)
-            if not plex_playlist:
-                continue
-
-            plex_playlist_items = plex_playlist.items()
-            plex_playlist_items_len = len(plex_playlist_items)
-            db_playlist_duration = db_playlist.duration
-
-            if db_playlist.playlist_type == "audio":
-                db_tracks_count = db_playlist.tracks.count()
-                if (
-                    db_tracks_count != plex_playlist_items_len
-                    or db_playlist_duration != plex_playlist.duration
-                ):
-                    add_remove = _get_add_remove_playlist_items(db_playlist, plex_playlist_items)
-                    out_of_date_data[db_playlist] = add_remove
-                    logger.debug(f"Audio playlist '{db_playlist.title}' needs update: {add_remove}")
-
-            elif db_playlist.playlist_type == "video":
-                db_episodes_count = db_playlist.episodes.count()
-                db_movies_count = db_playlist.movies.count()
-                video_count = db_episodes_count + db_movies_count
-                if (
-                    video_count != plex_playlist_items_len
-                    or db_playlist_duration != plex_playlist.duration
-                ):
-                    add_remove = _get_add_remove_playlist_items(db_playlist, plex_playlist_items)
-                    out_of_date_data[db_playlist] = add_remove
-                    logger.debug(f"Video playlist '{db_playlist.title}' needs update: {add_remove}")
-
-            elif db_playlist.playlist_type == "photo":
-                db_photos_count = db_playlist.photos.count()
-                if db_photos_count != plex_playlist_items_len:
-                    add_remove = _get_add_remove_playlist_items(db_playlist, plex_playlist_items)
-                    out_of_date_data[db_playlist] = add_remove
-                    logger.debug(f"Photo playlist '{db_playlist.title}' needs update: {add_remove}")
-
-        except plex_exceptions.NotFound:
-            logger.error(f"Skipping playlist: {db_playlist.title} (not found on Plex server)")
+        plex_playlist = plex_snapshot.get(db_playlist.rating_key)
+        # plexapi playlists define __len__ as len(items()), so truthiness would fetch their items
+        if plex_playlist is None or not plex_snapshot.has_items(db_playlist.rating_key):
+            continue
+
+        add_items, remove_items = _get_add_remove_playlist_items(
+            db_playlist,
+            plex_snapshot.get_items(db_playlist.rating_key),
+            plex_snapshot.get_item_keys(db_playlist.rating_key),
+        )
+        if add_items or remove_items or db_playlist.duration != plex_playlist.duration:
+            out_of_date_data[db_playlist] = (add_items, remove_items)
+            logger.debug(
+                f"{db_playlist.playlist_type.capitalize()} playlist '{db_playlist.title}' needs update: "
+                f"{len(add_items)} to add, {len(remove_items)} to remove"
+            )
 
     logger.info(f"Total out-of-date playlists: {len(out_of_date_data)}")
     return out_of_date_data
 
 
-def __get_add_remove_playlist_items(db_playlist, plex_playlist_items):
-    if db_playlist.playlist_type == "audio":
-        db_track_titles = {track.title for track in db_playlist.tracks}
-        plex_track_titles = {track.title for track in plex_playlist_items}
-        add_tracks = [track for track in plex_playlist_items if track.title not in db_track_titles]
-        remove_tracks = [track for track in db_playlist.tracks if track.title not in plex_track_titles]
-        return add_tracks, remove_tracks
-
-    elif db_playlist.playlist_type == "video":
-        db_episode_keys = {
-            (episode.title, episode.season_number, episode.show_title)
-            for episode in db_playlist.episodes
-        }
-        db_movie_keys = {(movie.title, movie.year) for movie in db_playlist.movies}
-        add_videos = []
-
-        for plex_video in plex_playlist_items:
-            if plex_video.type == "episode":
-                episode_key = (plex_video.title, plex_video.season().index, plex_video.show().title)
-                if episode_key not in db_episode_keys:
-                    add_videos.append(plex_video)
-                else:
-                    db_episode_keys.remove(episode_key)
-            elif plex_video.type == "movie":
-                movie_key = (plex_video.title, plex_video.year)
-                if movie_key not in db_movie_keys:
-                    add_videos.append(plex_video)
-                else:
-                    db_movie_keys.remove(movie_key)
-
-        remove_episodes = [
-            episode
-            for episode in db_playlist.episodes
-            if (episode.title, episode.season_number, episode.show_title) in db_episode_keys
-        ]
-        remove_movies = [
-            movie for movie in db_playlist.movies if (movie.title, movie.year) in db_movie_keys
-        ]
-        return add_videos, (remove_episodes + remove_movies)
-
-    elif db_playlist.playlist_type == "photo":
-        db_photo_titles = {photo.title for photo in db_playlist.photos}
-        plex_photo_titles = {photo.title for photo in plex_playlist_items}
-        add_photos = [photo for photo in plex_playlist_items if photo.title not in db_photo_titles]
-        remove_photos = [photo for photo in db_playlist.photos if photo.title not in plex_photo_titles]
-        return add_photos, remove_photos
-
-
-def _get_add_remove_playlist_items(db_playlist, plex_playlist_items):
-    if db_playlist.playlist_type == "audio":
-        db_track_titles = {track.title for track in db_playlist.tracks}
-        add_tracks = [track for track in plex_playlist_items if track.title not in db_track_titles]
-        remove_tracks = [
-            track
-            for track in db_playlist.tracks
-            if track.title not in {track.title for track in plex_playlist_items}
-        ]
-        return add_tracks, remove_tracks
-
-    elif db_playlist.playlist_type == "video":
-        db_episode_keys, db_movie_keys = db_playlist.get_indexed_titles()
-        add_videos = []
-
-        for plex_video in plex_playlist_items:
-            if plex_video.type == "episode":
-                episode_key = (plex_video.title, plex_video.season().index, plex_video.show().title)
-                if episode_key not in db_episode_keys:
-                    add_videos.append(plex_video)
-                else:
-                    db_episode_keys.remove(episode_key)
-            elif plex_video.type == "movie":
-                movie_key = (plex_video.title, plex_video.year)
-                if movie_key not in db_movie_keys:
-                    add_videos.append(plex_video)
-                else:
-                    db_movie_keys.remove(movie_key)
-
-        remove_episodes = [
-            episode
-            for episode in db_playlist.episodes
-            if (episode.title, episode.season_number, episode.show_title) in db_episode_keys
-        ]
-        remove_movies = [
-            movie for movie in db_playlist.movies if (movie.title, movie.year) in db_movie_keys
-        ]
-        return add_videos, remove_episodes + remove_movies
-
-    elif db_playlist.playlist_type == "photo":
-        db_photo_titles = {photo.title for photo in db_playlist.photos}
-        add_photos = [photo for photo in plex_playlist_items if photo.title not in db_photo_titles]
-        remove_photos = [
-            photo
-            for photo in db_playlist.photos
-            if photo.title not in {photo.title for photo in plex_playlist_items}
-        ]
-        return add_photos, remove_photos
+def _get_add_remove_playlist_items(db_playlist, plex_playlist_items, plex_item_keys):
+    db_items = db_playlist.get_items_by_rating_key()
+    add_items = []
+
+    for plex_item in plex_playlist_items:
+        db_item = db_items.get(plex_item.ratingKey)
+        if db_item is None:
+            add_items.append(plex_item)
+        elif db_item.title != plex_item.title:
+            logger.debug(f"Renaming {db_item.title} -> {plex_item.title}")
+            db_item.title = plex_item.title
+
+    remove_items = [db_items[rating_key] for rating_key in db_items.keys() - plex_item_keys]
+    return add_items, remove_items
@@ -1,7 +1,24 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Table, func
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    func,
+    literal,
+    null,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.selectable import CompoundSelect
 
 from .extensions import db
 
@@ -37,10 +54,18 @@ playlist_photo = Table(
 class Playlist(db.Model):
     __tablename__ = "playlists"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    title: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
+    rating_key: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
+    # Not unique: a playlist can be recreated, or two playlists swap titles, between syncs
+    title: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     playlist_type: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     thumbnail: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Membership counts, kept in step with the association tables by each sync's write stage
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    track_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    episode_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    movie_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    photo_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[DateTime] = mapped_column(
         DateTime, nullable=False, default=func.current_timestamp()
     )
@@ -63,26 +88,76 @@ class Playlist(db.Model):
     photos: Mapped[List["Photo"]] = relationship(
         "Photo", secondary=playlist_photo, back_populates="playlists", lazy="dynamic"
     )
+    fingerprint: Mapped[Optional["PlaylistFingerprint"]] = relationship(
+        "PlaylistFingerprint",
+        back_populates="playlist",
+        uselist=False,
+        cascade="all, delete-orphan",
+        lazy="joined",
+    )
 
     def total_items(self) -> int:
-        return self.tracks.count() + self.episodes.count() + self.movies.count() + self.photos.count()
+        return self.item_count
 
-    def get_indexed_titles(self):
+    def get_items_by_rating_key(self) -> Dict[int, Union["Track", "Episode", "Movie", "Photo"]]:
+        if not self.item_count:
+            return {}
         if self.playlist_type == "audio":
-            return {track.title for track in self.tracks}
+            return {track.rating_key: track for track in self.tracks}
         elif self.playlist_type == "video":
-            episode_keys = {(ep.title, ep.season_number, ep.show_title) for ep in self.episodes}
-            movie_keys = {(mv.title, mv.year) for mv in self.movies}
-            return episode_keys, movie_keys
+            items = {episode.rating_key: episode for episode in self.episodes}
+            items.update((movie.rating_key, movie) for movie in self.movies)
+            return items
         elif self.playlist_type == "photo":
-            return {photo.title for photo in self.photos}
+            return {photo.rating_key: photo for photo in self.photos}
         else:
-            return set()
+            return {}
+
+
+class PlaylistFingerprint(db.Model):
+    __tablename__ = "playlist_fingerprints"
+    playlist_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("playlists.id", ondelete="CASCADE"), primary_key=True
+    )
+    rating_key: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    plex_updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True)
+    leaf_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+    )
+
+    playlist: Mapped["Playlist"] = relationship("Playlist", back_populates="fingerprint")
+
+    def matches(self, plex_playlist) -> bool:
+        return (
+            self.rating_key == plex_playlist.ratingKey
+            and self.plex_updated_at == plex_playlist.updatedAt
+            and self.leaf_count == plex_playlist.leafCount
+            and self.duration == plex_playlist.duration
+        )
+
+    def update_from(self, plex_playlist) -> None:
+        self.rating_key = plex_playlist.ratingKey
+        self.plex_updated_at = plex_playlist.updatedAt
+        self.leaf_count = plex_playlist.leafCount
+        self.duration = plex_playlist.duration
+
+    def __repr__(self) -> str:
+        return f"<PlaylistFingerprint(rating_key={self.rating_key}, updated_at={self.plex_updated_at}, leaf_count={self.leaf_count}, duration={self.duration})>"
 
 
 class Track(db.Model):
     __tablename__ = "tracks"
+    natural_key = ("title", "track_number", "album_title", "artist_name")
+    # Indexed for lookups but not unique: items are identified by rating_key, and distinct Plex
+    # items can share a natural key (the same track on two copies of an album, two untitled photos)
+    __table_args__ = (Index("ix_tracks_natural_key", *natural_key),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    rating_key: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     track_number: Mapped[int] = mapped_column(Integer, nullable=False)
     duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
@@ -109,7 +184,10 @@ class Track(db.Model):
 
 class Episode(db.Model):
     __tablename__ = "episodes"
+    natural_key = ("title", "episode_number", "season_number", "show_title")
+    __table_args__ = (Index("ix_episodes_natural_key", *natural_key),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    rating_key: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     episode_number: Mapped[int] = mapped_column(Integer, nullable=False)
     season_number: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -136,7 +214,10 @@ class Episode(db.Model):
 
 class Movie(db.Model):
     __tablename__ = "movies"
+    natural_key = ("title", "year", "duration")
+    __table_args__ = (Index("ix_movies_natural_key", *natural_key),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    rating_key: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     year: Mapped[int] = mapped_column(Integer, nullable=False)
     duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
@@ -161,7 +242,10 @@ class Movie(db.Model):
 
 class Photo(db.Model):
     __tablename__ = "photos"
+    natural_key = ("title", "file")
+    __table_args__ = (Index("ix_photos_natural_key", *natural_key),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    rating_key: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     thumbnail: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     file: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -181,3 +265,165 @@ class Photo(db.Model):
 
     def __repr__(self) -> str:
         return f"<Photo(title={self.title})>"
+
+
+class SyncRun(db.Model):
+    __tablename__ = "sync_runs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    trigger: Mapped[str] = mapped_column(String(32), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    started_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False, index=True)
+    duration: Mapped[float] = mapped_column(Float, nullable=False)
+    playlists_added: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    playlists_removed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    playlists_renamed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    playlists_updated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    playlists_skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    items_added: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    items_removed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    items_renamed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    commits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            column.name: getattr(self, column.name).isoformat()
+            if column.name == "started_at"
+            else getattr(self, column.name)
+            for column in self.__table__.columns
+        }
+
+    def __repr__(self) -> str:
+        return f"<SyncRun(trigger={self.trigger}, status={self.status}, started_at={self.started_at}, duration={self.duration:.2f})>"
+
+
+class DatabaseGeneration(db.Model):
+    """
+    Single-row counter bumped in the same transaction as every committed data change, so readers
+    can tell whether anything changed since they last looked.
+    """
+
+    __tablename__ = "db_generation"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+    )
+
+    @classmethod
+    def bump(cls) -> None:
+        statement = sqlite_insert(cls).values(id=1, generation=1)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[cls.id],
+                set_={"generation": cls.generation + 1, "updated_at": func.current_timestamp()},
+            )
+        )
+
+    @classmethod
+    def current(cls) -> int:
+        return db.session.scalar(select(cls.generation).where(cls.id == 1)) or 0
+
+
+# Association table and item column for each playlist item model
+playlist_item_tables = {
+    Track: (playlist_track, "track_id"),
+    Episode: (playlist_episode, "episode_id"),
+    Movie: (playlist_movie, "movie_id"),
+    Photo: (playlist_photo, "photo_id"),
+}
+playlist_item_types = {Track: "track", Episode: "episode", Movie: "movie", Photo: "photo"}
+
+# Columns of the unified playlist item rows; an item type without a column selects NULL for it
+PLAYLIST_ITEM_FIELDS = (
+    "type",
+    "id",
+    "rating_key",
+    "title",
+    "duration",
+    "thumbnail",
+    "track_number",
+    "album_title",
+    "album_year",
+    "artist_name",
+    "episode_number",
+    "season_number",
+    "show_title",
+    "show_year",
+    "year",
+    "file",
+)
+
+
+def playlist_items_select(playlist_id: Optional[int] = None) -> CompoundSelect:
+    """
+    Returns a UNION ALL of every playlist membership joined to its item, optionally for one playlist.
+
+    Each row has playlist_id, an item_key that orders items by type and then id, and every
+    PLAYLIST_ITEM_FIELDS column.
+    """
+    selects = []
+    for model, (table, item_column) in playlist_item_tables.items():
+        statement = select(table.c.playlist_id.label("playlist_id"), *_item_columns(model)).join_from(
+            table, model, table.c[item_column] == model.id
+        )
+        if playlist_id is not None:
+            statement = statement.where(table.c.playlist_id == playlist_id)
+        selects.append(statement)
+    return union_all(*selects)
+
+
+def items_select(ids_by_model: Dict[type, List[int]]) -> CompoundSelect:
+    """
+    Returns a UNION ALL of the given items of each model, with the same item_key and
+    PLAYLIST_ITEM_FIELDS columns as playlist_items_select.
+    """
+    return union_all(
+        *(
+            select(*_item_columns(model)).where(model.id.in_(ids))
+            for model, ids in ids_by_model.items()
+            if ids
+        )
+    )
+
+
+def item_key(model: type, item_id: int) -> int:
+    """
+    Returns the key that identifies an item across the four item tables: the model's position in
+    playlist_item_tables in the high bits and its id in the low 32 bits.
+    """
+    return (list(playlist_item_tables).index(model) << 32) + item_id
+
+
+def split_item_key(key: int) -> Tuple[type, int]:
+    return list(playlist_item_tables)[key >> 32], key & 0xFFFFFFFF
+
+
+def _item_columns(model: type) -> List[ColumnElement]:
+    columns = [
+        (literal(item_key(model, 0)) + model.id).label("item_key"),
+        literal(playlist_item_types[model]).label("type"),
+    ]
+    for name in PLAYLIST_ITEM_FIELDS[1:]:
+        column = getattr(model, name, None)
+        columns.append((column if column is not None else null()).label(name))
+    return columns
+
+
+def playlist_count_expressions() -> Dict[str, ColumnElement[int]]:
+    """
+    Returns correlated subqueries that count a playlist's rows in each association table, keyed by
+    the Playlist count column they recompute.
+    """
+    counts = {
+        f"{playlist_item_types[model]}_count": select(func.count())
+        .select_from(table)
+        .where(table.c.playlist_id == Playlist.id)
+        .scalar_subquery()
+        for model, (table, _) in playlist_item_tables.items()
+    }
+    counts["item_count"] = sum(counts.values())
+    return counts
@@ -1,67 +1,84 @@
 import logging
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 # from ..app import app
 from .extensions import db
+from .helpers import (
+    PlexParentCache,
+    get_episode_parent_info,
+    get_episode_show_year,
+    get_track_parent_titles,
+)
 from .models import Episode, Movie, Photo, Playlist, Track
+from .snapshot import PlexSnapshot
 
 logger = logging.getLogger("app_logger")
 
 
 def parse_playlists(
-    playlists_to_add: List[str],
-    playlists_to_remove: List[str],
-    plex_playlists: List[object],
-    db_playlist_dict: Dict[str, Playlist],
-    db_tracks_dict: Dict[Tuple[str, int, str, str], Track],
+    playlists_to_add: Set[int],
+    playlists_to_remove: Set[int],
+    plex_snapshot: PlexSnapshot,
+    db_playlist_dict: Dict[int, Playlist],
+    db_tracks_dict: Dict[int, Track],
     playlist_tracks_dict: Dict[Playlist, List[Track]],
-    db_episode_dict: Dict[Tuple[str, int, int, str], Episode],
-    db_movie_dict: Dict[Tuple[str, int, int], Movie],
+    db_episode_dict: Dict[int, Episode],
+    db_movie_dict: Dict[int, Movie],
     playlist_videos_dict: Dict[Playlist, List[Union[Episode, Movie]]],
-    db_photo_dict: Dict[Tuple[str, str], Photo],
+    db_photo_dict: Dict[int, Photo],
     playlist_photos_dict: Dict[Playlist, List[Photo]],
+    parent_cache: PlexParentCache,
+    skipped_playlists: Set[int],
 ) -> None:
     """
     Parses playlists to add and remove.
+
+    Each new playlist is parsed inside its own savepoint; one that fails is rolled back, left out of
+    the sync and its ratingKey added to skipped_playlists.
     """
 
     try:
         if playlists_to_add:
             logger.info("Starting to parse playlists.")
-            for plex_playlist_title in playlists_to_add:
-                logger.debug(f"Processing playlist to add: {plex_playlist_title}")
-                plex_playlist = next(
-                    (pl for pl in plex_playlists if pl.title == plex_playlist_title), None
-                )
-                if not plex_playlist:
-                    logger.warning(f"Playlist {plex_playlist_title} not found on Plex server.")
+            for plex_playlist_key in playlists_to_add:
+                logger.debug(f"Processing playlist to add: {plex_playlist_key}")
+                plex_playlist = plex_snapshot.get(plex_playlist_key)
+                if plex_playlist is None:
+                    logger.warning(f"Playlist {plex_playlist_key} not found on Plex server.")
+                    continue
+                plex_items = plex_snapshot.get_items(plex_playlist_key)
+                if plex_items is None:
+                    logger.warning(f"Playlist {plex_playlist.title} items could not be fetched.")
                     continue
 
                 logger.debug(
                     f"Found playlist: {plex_playlist.title} with type: {plex_playlist.playlistType}"
                 )
 
-                if plex_playlist.playlistType == "audio":
-                    logger.debug(f"Parsing audio playlist: {plex_playlist.title}")
-                    _parse_audio_playlist(
-                        db_playlist_dict, db_tracks_dict, playlist_tracks_dict, plex_playlist
-                    )
-                elif plex_playlist.playlistType == "video":
-                    logger.debug(f"Parsing video playlist: {plex_playlist.title}")
-                    _parse_video_playlist(
-                        db_playlist_dict,
-                        db_episode_dict,
-                        db_movie_dict,
-                        playlist_videos_dict,
-                        plex_playlist,
+                try:
+                    with db.session.begin_nested():
+                        _parse_playlist(
+                            db_playlist_dict,
+                            db_tracks_dict,
+                            playlist_tracks_dict,
+                            db_episode_dict,
+                            db_movie_dict,
+                            playlist_videos_dict,
+                            db_photo_dict,
+                            playlist_photos_dict,
+                            plex_playlist,
+                            plex_items,
+                            parent_cache,
+                        )
+                except Exception:
+                    logger.error(
+                        f"Skipping playlist: {plex_playlist.title} (parsing failed)", exc_info=True
                     )
-                elif plex_playlist.playlistType == "photo":
-                    logger.debug(f"Parsing photo playlist: {plex_playlist.title}")
-                    _parse_photo_playlist(
-                        db_playlist_dict, db_photo_dict, playlist_photos_dict, plex_playlist
+                    db_playlist = db_playlist_dict.pop(plex_playlist_key, None)
+                    _discard_playlist(
+                        db_playlist, playlist_tracks_dict, playlist_videos_dict, playlist_photos_dict
                     )
-                else:
-                    logger.warning(f"Unknown playlist type: {plex_playlist.playlistType}")
+                    skipped_playlists.add(plex_playlist_key)
 
         if playlists_to_remove:
             logger.info("Starting to remove playlists.")
@@ -76,49 +93,53 @@ def parse_playlists(
 
 def parse_playlist_item_updates(
     update_data: Dict[Playlist, Tuple[List[object], List[object]]],
-    db_tracks_dict: Dict[Tuple[str, int, str, str], Track],
+    db_tracks_dict: Dict[int, Track],
     playlist_tracks_dict: Dict[Playlist, List[Track]],
-    db_episode_dict: Dict[Tuple[str, int, int, str], Episode],
-    db_movie_dict: Dict[Tuple[str, int, int], Movie],
+    db_episode_dict: Dict[int, Episode],
+    db_movie_dict: Dict[int, Movie],
     playlist_videos_dict: Dict[Playlist, List[Union[Episode, Movie]]],
-    db_photo_dict: Dict[Tuple[str, str], Photo],
+    db_photo_dict: Dict[int, Photo],
     playlist_photos_dict: Dict[Playlist, List[Photo]],
     remove_item_dict: Dict[Playlist, List[Union[Track, Episode, Movie, Photo]]],
-    plex_playlists: List[object],
+    plex_snapshot: PlexSnapshot,
+    parent_cache: PlexParentCache,
+    skipped_playlists: Set[int],
 ) -> bool:
     """
     Parses playlist item updates.
+
+    Each playlist is updated inside its own savepoint; one that fails is rolled back, left out of
+    the sync and its ratingKey added to skipped_playlists.
     """
     try:
         logger.info("Starting to parse playlist item updates.")
         for db_playlist, add_remove_items in update_data.items():
-            remove_item_dict[db_playlist] = []
-            playlist_tracks_dict[db_playlist] = []
-            playlist_videos_dict[db_playlist] = []
-            playlist_photos_dict[db_playlist] = []
-
-            if db_playlist.playlist_type == "audio":
-                _update_audio_playlist(
-                    add_remove_items, db_tracks_dict, playlist_tracks_dict, remove_item_dict, db_playlist
-                )
-            elif db_playlist.playlist_type == "video":
-                _update_video_playlist(
-                    add_remove_items,
-                    db_episode_dict,
-                    db_movie_dict,
+            try:
+                with db.session.begin_nested():
+                    _update_playlist(
+                        add_remove_items,
+                        db_tracks_dict,
+                        playlist_tracks_dict,
+                        db_episode_dict,
+                        db_movie_dict,
+                        playlist_videos_dict,
+                        db_photo_dict,
+                        playlist_photos_dict,
+                        remove_item_dict,
+                        db_playlist,
+                        plex_snapshot,
+                        parent_cache,
+                    )
+            except Exception:
+                logger.error(f"Skipping playlist: {db_playlist.title} (update failed)", exc_info=True)
+                _discard_playlist(
+                    db_playlist,
+                    playlist_tracks_dict,
                     playlist_videos_dict,
+                    playlist_photos_dict,
                     remove_item_dict,
-                    db_playlist,
                 )
-            elif db_playlist.playlist_type == "photo":
-                _update_photo_playlist(
-                    add_remove_items, db_photo_dict, playlist_photos_dict, remove_item_dict, db_playlist
-                )
-            else:
-                logger.warning(f"Unknown playlist type: {db_playlist.playlist_type}")
-
-            _update_playlist_duration(db_playlist, plex_playlists)
-            logger.debug(f"Updated playlist: {db_playlist.title} with duration: {db_playlist.duration}")
+                skipped_playlists.add(db_playlist.rating_key)
 
         return True
 
@@ -128,133 +149,191 @@ def parse_playlist_item_updates(
         raise e
 
 
+def _parse_playlist(
+    db_playlist_dict: Dict[int, Playlist],
+    db_tracks_dict: Dict[int, Track],
+    playlist_tracks_dict: Dict[Playlist, List[Track]],
+    db_episode_dict: Dict[int, Episode],
+    db_movie_dict: Dict[int, Movie],
+    playlist_videos_dict: Dict[Playlist, List[Union[Episode, Movie]]],
+    db_photo_dict: Dict[int, Photo],
+    playlist_photos_dict: Dict[Playlist, List[Photo]],
+    plex_playlist: object,
+    plex_items: List[object],
+    parent_cache: PlexParentCache,
+) -> None:
+    """
+    Parses a new playlist according to its type.
+    """
+    if plex_playlist.playlistType == "audio":
+        logger.debug(f"Parsing audio playlist: {plex_playlist.title}")
+        _parse_audio_playlist(
+            db_playlist_dict,
+            db_tracks_dict,
+            playlist_tracks_dict,
+            plex_playlist,
+            plex_items,
+            parent_cache,
+        )
+    elif plex_playlist.playlistType == "video":
+        logger.debug(f"Parsing video playlist: {plex_playlist.title}")
+        _parse_video_playlist(
+            db_playlist_dict,
+            db_episode_dict,
+            db_movie_dict,
+            playlist_videos_dict,
+            plex_playlist,
+            plex_items,
+            parent_cache,
+        )
+    elif plex_playlist.playlistType == "photo":
+        logger.debug(f"Parsing photo playlist: {plex_playlist.title}")
+        _parse_photo_playlist(
+            db_playlist_dict, db_photo_dict, playlist_photos_dict, plex_playlist, plex_items
+        )
+    else:
+        logger.warning(f"Unknown playlist type: {plex_playlist.playlistType}")
+
+
+def _update_playlist(
+    add_remove_items: Tuple[List[object], List[object]],
+    db_tracks_dict: Dict[int, Track],
+    playlist_tracks_dict: Dict[Playlist, List[Track]],
+    db_episode_dict: Dict[int, Episode],
+    db_movie_dict: Dict[int, Movie],
+    playlist_videos_dict: Dict[Playlist, List[Union[Episode, Movie]]],
+    db_photo_dict: Dict[int, Photo],
+    playlist_photos_dict: Dict[Playlist, List[Photo]],
+    remove_item_dict: Dict[Playlist, List[Union[Track, Episode, Movie, Photo]]],
+    db_playlist: Playlist,
+    plex_snapshot: PlexSnapshot,
+    parent_cache: PlexParentCache,
+) -> None:
+    """
+    Updates the items and duration of an existing playlist according to its type.
+    """
+    remove_item_dict[db_playlist] = []
+    playlist_tracks_dict[db_playlist] = []
+    playlist_videos_dict[db_playlist] = []
+    playlist_photos_dict[db_playlist] = []
+
+    if db_playlist.playlist_type == "audio":
+        _update_audio_playlist(
+            add_remove_items,
+            db_tracks_dict,
+            playlist_tracks_dict,
+            remove_item_dict,
+            db_playlist,
+            parent_cache,
+        )
+    elif db_playlist.playlist_type == "video":
+        _update_video_playlist(
+            add_remove_items,
+            db_episode_dict,
+            db_movie_dict,
+            playlist_videos_dict,
+            remove_item_dict,
+            db_playlist,
+            parent_cache,
+        )
+    elif db_playlist.playlist_type == "photo":
+        _update_photo_playlist(
+            add_remove_items, db_photo_dict, playlist_photos_dict, remove_item_dict, db_playlist
+        )
+    else:
+        logger.warning(f"Unknown playlist type: {db_playlist.playlist_type}")
+
+    _update_playlist_duration(db_playlist, plex_snapshot)
+    logger.debug(f"Updated playlist: {db_playlist.title} with duration: {db_playlist.duration}")
+
+
+def _discard_playlist(db_playlist: Optional[Playlist], *playlist_dicts: Dict[Playlist, List]) -> None:
+    """
+    Drops a skipped playlist from the dictionaries the write stage reads.
+    """
+    for playlist_dict in playlist_dicts:
+        playlist_dict.pop(db_playlist, None)
+
+
 def _parse_audio_playlist(
-    db_playlist_dict: Dict[str, Playlist],
-    db_tracks_dict: Dict[Tuple[str, int, str, str], Track],
+    db_playlist_dict: Dict[int, Playlist],
+    db_tracks_dict: Dict[int, Track],
     playlist_tracks_dict: Dict[Playlist, List[Track]],
     plex_playlist: object,
+    plex_tracks: List[object],
+    parent_cache: PlexParentCache,
 ) -> None:
     """
     Parses an audio playlist.
     """
     try:
         db_playlist = _get_or_create_playlist(db_playlist_dict, plex_playlist)
-        plex_tracks = plex_playlist.items()
-        playlist_tracks_dict[db_playlist] = []
-
-        for plex_track in plex_tracks:
-            plex_album = plex_track.album()
-            plex_artist = plex_track.artist()
-            track_key = (plex_track.title, plex_track.trackNumber, plex_album.title, plex_artist.title)
-            if track_key not in db_tracks_dict:
-                db_tracks_dict[track_key] = Track(
-                    title=plex_track.title,
-                    track_number=plex_track.trackNumber,
-                    album_title=plex_album.title,
-                    artist_name=plex_artist.title,
-                    duration=plex_track.duration,
-                )
-
-            db_track = db_tracks_dict[track_key]
-            playlist_tracks_dict[db_playlist].append(db_track)
+        playlist_tracks_dict[db_playlist] = [
+            _get_or_create_track(db_tracks_dict, plex_track, parent_cache) for plex_track in plex_tracks
+        ]
 
     except Exception as e:
         logger.error("An error occurred while parsing audio playlist.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
 def _parse_photo_playlist(
-    db_playlist_dict: Dict[str, Playlist],
-    db_photo_dict: Dict[Tuple[str, str], Photo],
+    db_playlist_dict: Dict[int, Playlist],
+    db_photo_dict: Dict[int, Photo],
     playlist_photos_dict: Dict[Playlist, List[Photo]],
     plex_playlist: object,
+    plex_photos: List[object],
 ) -> None:
     """
     Parses a photo playlist.
     """
     try:
         db_playlist = _get_or_create_playlist(db_playlist_dict, plex_playlist)
-        plex_photos = plex_playlist.items()
-        playlist_photos_dict[db_playlist] = []
-
-        for plex_photo in plex_photos:
-            photo_key = (plex_photo.title, plex_photo.thumb)
-            if photo_key not in db_photo_dict:
-                db_photo_dict[photo_key] = Photo(
-                    title=plex_photo.title,
-                    thumbnail=plex_photo.thumb,
-                    file=plex_photo.media[0].parts[0].file,
-                )
-            db_photo = db_photo_dict[photo_key]
-            playlist_photos_dict[db_playlist].append(db_photo)
+        playlist_photos_dict[db_playlist] = [
+            _get_or_create_photo(db_photo_dict, plex_photo) for plex_photo in plex_photos
+        ]
 
     except Exception as e:
         logger.error("An error occurred while parsing photo playlist.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
 def _parse_video_playlist(
-    db_playlist_dict: Dict[str, Playlist],
-    db_episode_dict: Dict[Tuple[str, int, int, str], Episode],
-    db_movie_dict: Dict[Tuple[str, int, int], Movie],
+    db_playlist_dict: Dict[int, Playlist],
+    db_episode_dict: Dict[int, Episode],
+    db_movie_dict: Dict[int, Movie],
     playlist_videos_dict: Dict[Playlist, List[Union[Episode, Movie]]],
     plex_playlist: object,
+    plex_videos: List[object],
+    parent_cache: PlexParentCache,
 ) -> None:
     """
     Parses a video playlist.
     """
     try:
         db_playlist = _get_or_create_playlist(db_playlist_dict, plex_playlist)
-        plex_videos = plex_playlist.items()
         playlist_videos_dict[db_playlist] = []
 
         for plex_video in plex_videos:
             if plex_video.type == "episode":
-                plex_show = plex_video.show()
-                plex_season = plex_video.season()
-                episode_key = (
-                    plex_video.title,
-                    plex_video.index,
-                    plex_season.index,
-                    plex_show.title,
-                )
-                if episode_key not in db_episode_dict:
-                    db_episode_dict[episode_key] = Episode(
-                        title=plex_video.title,
-                        episode_number=plex_video.index,
-                        duration=plex_video.duration,
-                        season_number=plex_season.index,
-                        show_title=plex_show.title,
-                        show_year=plex_show.year,
-                    )
-                db_episode = db_episode_dict[episode_key]
+                db_episode = _get_or_create_episode(db_episode_dict, plex_video, parent_cache)
                 playlist_videos_dict[db_playlist].append(db_episode)
             elif plex_video.type == "movie":
-                movie_key = (plex_video.title, plex_video.year, plex_video.duration)
-                if movie_key not in db_movie_dict:
-                    db_movie_dict[movie_key] = Movie(
-                        title=plex_video.title,
-                        year=plex_video.year,
-                        duration=plex_video.duration,
-                        thumbnail=plex_video.thumb,
-                    )
-                db_movie = db_movie_dict[movie_key]
+                db_movie = _get_or_create_movie(db_movie_dict, plex_video)
                 playlist_videos_dict[db_playlist].append(db_movie)
 
     except Exception as e:
         logger.error("An error occurred while parsing video playlist.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
 def _update_audio_playlist(
     add_remove_items: Tuple[List[object], List[Track]],
-    db_tracks_dict: Dict[Tuple[str, int, str, str], Track],
+    db_tracks_dict: Dict[int, Track],
     playlist_tracks_dict: Dict[Playlist, List[Track]],
     remove_item_dict: Dict[Playlist, List[Union[Track, Episode, Movie, Photo]]],
     db_playlist: Playlist,
+    parent_cache: PlexParentCache,
 ) -> None:
     """
     Updates an audio playlist.
@@ -262,17 +341,7 @@ def _update_audio_playlist(
     try:
         add_plex_tracks, remove_db_tracks = add_remove_items
         for plex_track in add_plex_tracks:
-            plex_album = plex_track.album()
-            plex_artist = plex_track.artist()
-            track_key = (plex_track.title, plex_track.trackNumber, plex_album.title, plex_artist.title)
-            db_track = db_tracks_dict.get(track_key) or Track(
-                title=plex_track.title,
-                track_number=plex_track.trackNumber,
-                album_title=plex_album.title,
-                artist_name=plex_artist.title,
-                duration=plex_track.duration,
-            )
-            db_tracks_dict[track_key] = db_track
+            db_track = _get_or_create_track(db_tracks_dict, plex_track, parent_cache)
             playlist_tracks_dict[db_playlist].append(db_track)
 
         for db_track in remove_db_tracks:
@@ -280,13 +349,12 @@ def _update_audio_playlist(
 
     except Exception as e:
         logger.error("An error occurred in update_audio_playlist.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
 def _update_photo_playlist(
-    add_remove_items: Tuple[List[Photo], List[Photo]],
-    db_photo_dict: Dict[Tuple[str, str], Photo],
+    add_remove_items: Tuple[List[object], List[Photo]],
+    db_photo_dict: Dict[int, Photo],
     playlist_photos_dict: Dict[Playlist, List[Photo]],
     remove_item_dict: Dict[Playlist, List[Union[Track, Episode, Movie, Photo]]],
     db_playlist: Playlist,
@@ -295,33 +363,27 @@ def _update_photo_playlist(
     Updates a photo playlist.
     """
     try:
-        add_photos, remove_photos = add_remove_items
-        for db_photo in add_photos:
-            photo_key = (db_photo.title, db_photo.thumbnail)
-            db_photo = db_photo_dict.get(photo_key) or Photo(
-                title=db_photo.title,
-                thumbnail=db_photo.thumbnail,
-                file=db_photo.file,
-            )
-            db_photo_dict[photo_key] = db_photo
+        add_plex_photos, remove_db_photos = add_remove_items
+        for plex_photo in add_plex_photos:
+            db_photo = _get_or_create_photo(db_photo_dict, plex_photo)
             playlist_photos_dict[db_playlist].append(db_photo)
 
-        for db_photo in remove_photos:
+        for db_photo in remove_db_photos:
             remove_item_dict[db_playlist].append(db_photo)
 
     except Exception as e:
         logger.error("An error occurred in update_photo_playlist.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
 def _update_video_playlist(
     add_remove_items: Tuple[List[object], List[Union[Episode, Movie]]],
-    db_episode_dict: Dict[Tuple[str, int, int, str], Episode],
-    db_movie_dict: Dict[Tuple[str, int, int], Movie],
+    db_episode_dict: Dict[int, Episode],
+    db_movie_dict: Dict[int, Movie],
     playlist_videos_dict: Dict[Playlist, List[Union[Episode, Movie]]],
     remove_item_dict: Dict[Playlist, List[Union[Track, Episode, Movie, Photo]]],
     db_playlist: Playlist,
+    parent_cache: PlexParentCache,
 ) -> None:
     """
     Updates a video playlist.
@@ -330,29 +392,10 @@ def _update_video_playlist(
         add_plex_videos, remove_db_videos = add_remove_items
         for plex_video in add_plex_videos:
             if plex_video.type == "episode":
-                episode_key = (
-                    plex_video.title,
-                    plex_video.index,
-                    plex_video.seasonNumber,
-                    plex_video.title,
-                )
-                db_episode = db_episode_dict.get(episode_key) or Episode(
-                    title=plex_video.title,
-                    episode_number=plex_video.index,
-                    season_number=plex_video.seasonNumber,
-                    show_title=plex_video.title,
-                    duration=plex_video.duration,
-                )
-                db_episode_dict[episode_key] = db_episode
+                db_episode = _get_or_create_episode(db_episode_dict, plex_video, parent_cache)
                 playlist_videos_dict[db_playlist].append(db_episode)
             elif plex_video.type == "movie":
-                movie_key = (plex_video.title, plex_video.year, plex_video.duration)
-                db_movie = db_movie_dict.get(movie_key) or Movie(
-                    title=plex_video.title,
-                    year=plex_video.year,
-                    duration=plex_video.duration,
-                )
-                db_movie_dict[movie_key] = db_movie
+                db_movie = _get_or_create_movie(db_movie_dict, plex_video)
                 playlist_videos_dict[db_playlist].append(db_movie)
 
         for db_video in remove_db_videos:
@@ -360,60 +403,138 @@ def _update_video_playlist(
 
     except Exception as e:
         logger.error("An error occurred in update_video_playlist.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
 def _update_remove_playlists(
-    playlists_to_remove: List[str], db_playlist_dict: Dict[str, Playlist]
+    playlists_to_remove: Set[int], db_playlist_dict: Dict[int, Playlist]
 ) -> None:
     """
     Removes playlists from the database.
     """
     try:
-        for playlist in playlists_to_remove:
-            logger.info(f"Removing playlist: {playlist} from the database")
-            db_playlist = db_playlist_dict[playlist]
+        for playlist_key in playlists_to_remove:
+            db_playlist = db_playlist_dict[playlist_key]
+            logger.info(f"Removing playlist: {db_playlist.title} from the database")
             db.session.delete(db_playlist)
-        db.session.commit()
     except Exception as e:
         logger.error("An error occurred while removing playlists.", exc_info=True)
-        db.session.rollback()
         raise e
 
 
-def _update_playlist_duration(db_playlist: Playlist, plex_playlists: List[object]) -> None:
+def _update_playlist_duration(db_playlist: Playlist, plex_snapshot: PlexSnapshot) -> None:
     """
     Updates the duration of a playlist.
     """
     try:
-        plex_playlist = next(
-            (playlist for playlist in plex_playlists if playlist.title == db_playlist.title), None
-        )
-        if plex_playlist:
+        plex_playlist = plex_snapshot.get(db_playlist.rating_key)
+        if plex_playlist is not None:
             db_playlist.duration = plex_playlist.duration
             db.session.add(db_playlist)
-            db.session.commit()
         else:
             logger.warning(f"Skipping playlist: {db_playlist.title} (not found on Plex server)")
     except Exception as e:
         logger.error("Error in update_playlist_duration", exc_info=True)
-        db.session.rollback()
         raise e
 
 
-def _get_or_create_playlist(db_playlist_dict: Dict[str, Playlist], plex_playlist: object) -> Playlist:
+def _get_or_create_playlist(db_playlist_dict: Dict[int, Playlist], plex_playlist: object) -> Playlist:
     """
     Gets or creates a playlist.
     """
-    if plex_playlist.title not in db_playlist_dict:
+    if plex_playlist.ratingKey not in db_playlist_dict:
         db_playlist = Playlist(
+            rating_key=plex_playlist.ratingKey,
             title=plex_playlist.title,
             playlist_type=plex_playlist.playlistType,
             duration=plex_playlist.duration,
             thumbnail=plex_playlist.thumb,
         )
-        db_playlist_dict[plex_playlist.title] = db_playlist
+        db_playlist_dict[plex_playlist.ratingKey] = db_playlist
     else:
-        db_playlist = db_playlist_dict[plex_playlist.title]
+        db_playlist = db_playlist_dict[plex_playlist.ratingKey]
     return db_playlist
+
+
+def _get_or_create_track(
+    db_tracks_dict: Dict[int, Track], plex_track: object, parent_cache: PlexParentCache
+) -> Track:
+    """
+    Gets or creates a track, refreshing the title of a known track that was renamed on Plex.
+    """
+    db_track = db_tracks_dict.get(plex_track.ratingKey)
+    if db_track is None:
+        album_title, artist_name = get_track_parent_titles(plex_track, parent_cache)
+        db_track = Track(
+            rating_key=plex_track.ratingKey,
+            title=plex_track.title,
+            track_number=plex_track.trackNumber,
+            album_title=album_title,
+            artist_name=artist_name,
+            duration=plex_track.duration,
+        )
+        db_tracks_dict[plex_track.ratingKey] = db_track
+    elif db_track.title != plex_track.title:
+        db_track.title = plex_track.title
+    return db_track
+
+
+def _get_or_create_episode(
+    db_episode_dict: Dict[int, Episode], plex_episode: object, parent_cache: PlexParentCache
+) -> Episode:
+    """
+    Gets or creates an episode, refreshing the title of a known episode that was renamed on Plex.
+    """
+    db_episode = db_episode_dict.get(plex_episode.ratingKey)
+    if db_episode is None:
+        season_number, show_title = get_episode_parent_info(plex_episode, parent_cache)
+        db_episode = Episode(
+            rating_key=plex_episode.ratingKey,
+            title=plex_episode.title,
+            episode_number=plex_episode.index,
+            duration=plex_episode.duration,
+            season_number=season_number,
+            show_title=show_title,
+            show_year=get_episode_show_year(plex_episode, parent_cache),
+        )
+        db_episode_dict[plex_episode.ratingKey] = db_episode
+    elif db_episode.title != plex_episode.title:
+        db_episode.title = plex_episode.title
+    return db_episode
+
+
+def _get_or_create_movie(db_movie_dict: Dict[int, Movie], plex_movie: object) -> Movie:
+    """
+    Gets or creates a movie, refreshing the title of a known movie that was renamed on Plex.
+    """
+    db_movie = db_movie_dict.get(plex_movie.ratingKey)
+    if db_movie is None:
+        db_movie = Movie(
+            rating_key=plex_movie.ratingKey,
+            title=plex_movie.title,
+            year=plex_movie.year,
+            duration=plex_movie.duration,
+            thumbnail=plex_movie.thumb,
+        )
+        db_movie_dict[plex_movie.ratingKey] = db_movie
+    elif db_movie.title != plex_movie.title:
+        db_movie.title = plex_movie.title
+    return db_movie
+
+
+def _get_or_create_photo(db_photo_dict: Dict[int, Photo], plex_photo: object) -> Photo:
+    """
+    Gets or creates a photo, refreshing the title of a known photo that was renamed on Plex.
+    """
+    db_photo = db_photo_dict.get(plex_photo.ratingKey)
+    if db_photo is None:
+        db_photo = Photo(
+            rating_key=plex_photo.ratingKey,
+            title=plex_photo.title,
+            thumbnail=plex_photo.thumb,
+            file=plex_photo.media[0].parts[0].file,
+        )
+        db_photo_dict[plex_photo.ratingKey] = db_photo
+    elif db_photo.title != plex_photo.title:
+        db_photo.title = plex_photo.title
+    return db_photo
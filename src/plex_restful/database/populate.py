@@ -1,119 +1,338 @@
 import logging
 import traceback
-from typing import Dict, List, Optional, Tuple
-
-from ..plex import get_server
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Table, delete, func, insert, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..config import PlexConfig
+from ..plex import (
+    AsyncPlexClient,
+    CachingSession,
+    fetch_playlist_records,
+    get_server,
+    playlist_items_path,
+    plex_exceptions,
+)
 
 # from ..app import app
 from .extensions import db
-from .helpers import get_out_of_date_data, get_playlists_to_add_and_remove
-from .models import Episode, Movie, Photo, Playlist, Track
+from .helpers import (
+    ItemRenameCounter,
+    PlexParentCache,
+    TransactionCounter,
+    get_changed_playlists,
+    get_out_of_date_data,
+    get_playlists_to_add_and_remove,
+    get_renamed_playlists,
+)
+from .models import (
+    DatabaseGeneration,
+    Episode,
+    Movie,
+    Photo,
+    Playlist,
+    PlaylistFingerprint,
+    Track,
+    playlist_count_expressions,
+    playlist_item_tables,
+)
 from .parsers import parse_playlist_item_updates, parse_playlists
+from .progress import SyncProgress
+from .snapshot import PlexSnapshot
 
 logger = logging.getLogger("app_logger")
 
+# Stay below SQLite's default limit of 999 bound parameters per statement
+SQLITE_MAX_IN_PARAMS = 900
+
+# Counters reported by run_db_population for every sync run
+SYNC_STATS = (
+    "playlists_added",
+    "playlists_removed",
+    "playlists_renamed",
+    "playlists_updated",
+    "playlists_skipped",
+    "items_added",
+    "items_removed",
+    "items_renamed",
+    "commits",
+)
+
+# Counters of changes to the data served by the API; a run that changes none keeps the generation
+DATA_CHANGE_STATS = (
+    "playlists_added",
+    "playlists_removed",
+    "playlists_renamed",
+    "playlists_updated",
+    "items_added",
+    "items_removed",
+    "items_renamed",
+)
+
 
 class DatabasePopulator:
     """
     Class responsible for populating the database with data from the Plex server.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        fetch_workers: Optional[int] = None,
+        progress: Optional[SyncProgress] = None,
+        async_fetch: Optional[bool] = None,
+        stream_items: Optional[bool] = None,
+    ):
         """
         Initializes the DatabasePopulator with empty dictionaries and None values for server and playlists.
+
+        Args:
+            fetch_workers (Optional[int]): Number of threads used to fetch playlist items from Plex.
+                Defaults to PlexConfig.FETCH_WORKERS; 1 fetches serially.
+            progress (Optional[SyncProgress]): Receives the per-stage and per-playlist progress
+                events of each run. Defaults to a reporter without a sink.
+            async_fetch (Optional[bool]): Whether to fetch playlist items with AsyncPlexClient
+                instead of plexapi threads. Defaults to PlexConfig.ASYNC_FETCH.
+            stream_items (Optional[bool]): Whether the threaded fetch reads playlist items as
+                PlexItemRecords from the streamed XML instead of building plexapi objects.
+                Defaults to PlexConfig.STREAM_ITEMS.
         """
-        self.db_tracks_dict: Dict[Tuple[str, int, str, str], Track] = {}
-        self.db_episode_dict: Dict[Tuple[str, int, int, str], Episode] = {}
-        self.db_movie_dict: Dict[Tuple[str, int, int], Movie] = {}
-        self.db_photo_dict: Dict[Tuple[str, str], Photo] = {}
+        self.fetch_workers = fetch_workers if fetch_workers is not None else PlexConfig.FETCH_WORKERS
+        self.async_fetch = async_fetch if async_fetch is not None else PlexConfig.ASYNC_FETCH
+        self.stream_items = stream_items if stream_items is not None else PlexConfig.STREAM_ITEMS
+        self.progress = progress if progress is not None else SyncProgress()
+        self.db_tracks_dict: Dict[int, Track] = {}
+        self.db_episode_dict: Dict[int, Episode] = {}
+        self.db_movie_dict: Dict[int, Movie] = {}
+        self.db_photo_dict: Dict[int, Photo] = {}
         self.playlist_tracks_dict: Dict[Playlist, List[Track]] = {}
         self.playlist_videos_dict: Dict[Playlist, List[Episode | Movie]] = {}
         self.playlist_photos_dict: Dict[Playlist, List[Photo]] = {}
         self.remove_item_dict: Dict[Playlist, List[Track | Episode | Movie | Photo]] = {}
 
         self.plex_server: Optional[object] = None
-        self.plex_playlists: Optional[List[Playlist]] = None
+        self.plex_snapshot: Optional[PlexSnapshot] = None
         self.db_playlists: Optional[List[Playlist]] = None
-        self.db_playlist_dict: Optional[Dict[str, Playlist]] = None
+        self.db_playlist_dict: Optional[Dict[int, Playlist]] = None
+        self.changed_plex_playlists: List[object] = []
+        self.skipped_playlists: Set[int] = set()
+        self.parent_cache = PlexParentCache()
+        self.sync_stats: Dict[str, int] = dict.fromkeys(SYNC_STATS, 0)
+        self.playlist_changes: Dict[int, Dict[str, int]] = {}
 
     def initialize_globals(self) -> None:
         """
-        Initializes global variables by fetching data from the Plex server and the database.
+        Initializes global variables by fetching playlists from the Plex server and the database.
+
+        The Plex playlists are indexed once into a PlexSnapshot that every later stage reads from.
         """
         self.plex_server = get_server()
-        self.plex_playlists = self.plex_server.playlists()
+        self.plex_snapshot = PlexSnapshot(self.plex_server.playlists())
 
         self.db_playlists = db.session.query(Playlist).all()
-        db_tracks = db.session.query(Track).all()
-        db_episodes = db.session.query(Episode).all()
-        db_movies = db.session.query(Movie).all()
-        db_photos = db.session.query(Photo).all()
-
-        self.db_playlist_dict = {db_playlist.title: db_playlist for db_playlist in self.db_playlists}
-        self.db_tracks_dict = {
-            (db_track.title, db_track.track_number, db_track.album_title, db_track.artist_name): db_track
-            for db_track in db_tracks
-        }
-        self.db_episode_dict = {
-            (
-                db_episode.title,
-                db_episode.episode_number,
-                db_episode.season_number,
-                db_episode.show_title,
-            ): db_episode
-            for db_episode in db_episodes
-        }
-        self.db_movie_dict = {
-            (db_movie.title, db_movie.year, db_movie.duration): db_movie for db_movie in db_movies
+        self.db_playlist_dict = {
+            db_playlist.rating_key: db_playlist for db_playlist in self.db_playlists
         }
-        self.db_photo_dict = {(db_photo.title, db_photo.thumbnail): db_photo for db_photo in db_photos}
 
+        self.changed_plex_playlists = []
+        self.skipped_playlists.clear()
+        self.sync_stats = dict.fromkeys(SYNC_STATS, 0)
+        self.playlist_changes = defaultdict(lambda: {"items_added": 0, "items_removed": 0})
         self.playlist_tracks_dict.clear()
         self.playlist_videos_dict.clear()
         self.playlist_photos_dict.clear()
         self.remove_item_dict.clear()
+        self.parent_cache.clear()
 
-    def run_db_population(self) -> None:
+    def load_db_items(self) -> None:
         """
-        Runs the database population process by initializing globals, getting out-of-date data, and committing changes to the database.
+        Loads the existing tracks, episodes, movies and photos, keyed by their Plex ratingKey.
         """
+        self.db_tracks_dict = {track.rating_key: track for track in db.session.query(Track)}
+        self.db_episode_dict = {episode.rating_key: episode for episode in db.session.query(Episode)}
+        self.db_movie_dict = {movie.rating_key: movie for movie in db.session.query(Movie)}
+        self.db_photo_dict = {photo.rating_key: photo for photo in db.session.query(Photo)}
 
-        try:
-            logger.info("Starting database population process.")
-            self.initialize_globals()
-            logger.debug("Globals initialized")
+    def prefetch_playlist_items(self) -> None:
+        """
+        Fetches the items of every changed Plex playlist before the diff and parse stages run.
 
-            playlists_to_add, playlists_to_remove = self.get_playlists_to_add_and_remove()
-            new_playlist_check = self.check_and_parse_playlists(playlists_to_add, playlists_to_remove)
-            new_data_check = self.check_and_parse_out_of_date_data()
+        Each playlist's items() call is an independent round-trip to the Plex server, so they are
+        issued from a bounded thread pool. Playlists whose fingerprint is unchanged are not fetched,
+        and playlists that are no longer found on the server get no items in the snapshot.
 
-            if new_playlist_check or new_data_check:
-                self.commit_changes_to_db()
+        With async_fetch, AsyncPlexClient fetches every playlist in container pages over asyncio
+        instead, unless Plex responses are cached. It falls back to the thread pool if aiohttp is not
+        installed. With stream_items, the threads read compact records from the streamed XML instead
+        of calling items().
+        """
+        plex_playlists = self.changed_plex_playlists
+        session = getattr(self.plex_server, "_session", None)
+        if isinstance(session, CachingSession):
+            # A cached body recorded under the playlist's current updatedAt is still its content
+            for plex_playlist in plex_playlists:
+                session.hint_updated_at(playlist_items_path(plex_playlist), plex_playlist.updatedAt)
+
+        # The async client has its own connections, which the response cache does not cover
+        if self.async_fetch and plex_playlists and not isinstance(session, CachingSession):
+            try:
+                client = AsyncPlexClient(self.plex_server)
+            except RuntimeError as e:
+                logger.warning(f"{e}; fetching with plexapi threads instead")
+            else:
+                logger.info(f"Fetching items for {len(plex_playlists)} playlists with the async client")
+                self._store_playlist_items(plex_playlists, client.fetch_playlist_items(plex_playlists))
+                return
+
+        workers = max(1, min(self.fetch_workers, len(plex_playlists)))
+        logger.info(f"Fetching items for {len(plex_playlists)} playlists with {workers} workers")
+        fetch = (
+            partial(_fetch_playlist_records, self.plex_server)
+            if self.stream_items
+            else _fetch_playlist_items
+        )
 
-        except Exception as e:
-            logger.error("An error occurred during the database population process.", exc_info=True)
-            traceback.print_exc()
-            raise e
+        if workers == 1:
+            self._store_playlist_items(plex_playlists, map(fetch, plex_playlists))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plex-fetch") as executor:
+                self._store_playlist_items(plex_playlists, executor.map(fetch, plex_playlists))
 
-    def get_playlists_to_add_and_remove(self) -> Tuple[List[Playlist], List[Playlist]]:
+    def _store_playlist_items(
+        self, plex_playlists: List[object], results: Iterable[Optional[List[object]]]
+    ) -> None:
+        # Results arrive in order as each fetch completes, so progress is reported as it happens
+        for plex_playlist, items in zip(plex_playlists, results):
+            if items is not None:
+                self.plex_snapshot.set_items(plex_playlist.ratingKey, items)
+            self.progress.playlist(
+                "fetch",
+                plex_playlist.title,
+                items_processed=len(items) if items is not None else 0,
+                found=items is not None,
+            )
+
+    def run_db_population(self) -> Dict[str, int]:
+        """
+        Runs the database population process by initializing globals, getting out-of-date data, and committing changes to the database.
+
+        The whole run is one transaction, committed once at the end; each playlist is parsed inside
+        a savepoint so a failing one is rolled back and skipped without aborting the others.
+
+        Returns:
+            Dict[str, int]: The SYNC_STATS counters of the run.
+        """
+
+        renamed_items = ItemRenameCounter(playlist_item_tables)
+        with TransactionCounter(db.engine) as transactions, renamed_items:
+            try:
+                logger.info("Starting database population process.")
+                self.progress.start_run()
+                self.initialize_globals()
+                logger.debug("Globals initialized")
+
+                playlists_to_add, playlists_to_remove = self.get_playlists_to_add_and_remove()
+                renamed_check = self.rename_playlists()
+                self.changed_plex_playlists = get_changed_playlists(
+                    self.db_playlist_dict, self.plex_snapshot
+                )
+                if not self.changed_plex_playlists and not playlists_to_remove:
+                    if renamed_check:
+                        DatabaseGeneration.bump()
+                        db.session.commit()
+                    logger.info("No playlists changed since the last sync.")
+                else:
+                    self.load_db_items()
+                    with self.progress.stage("fetch", playlists=len(self.changed_plex_playlists)):
+                        self.prefetch_playlist_items()
+
+                    with self.progress.stage("diff") as diff_results:
+                        logger.info("Getting out of date data")
+                        update_data = get_out_of_date_data(self.db_playlists, self.plex_snapshot)
+                        diff_results.update(
+                            playlists_to_add=len(playlists_to_add),
+                            playlists_to_remove=len(playlists_to_remove),
+                            playlists_out_of_date=len(update_data),
+                        )
+
+                    with self.progress.stage("parse") as parse_results:
+                        new_playlist_check = self.check_and_parse_playlists(
+                            playlists_to_add, playlists_to_remove
+                        )
+                        new_data_check = self.check_and_parse_out_of_date_data(update_data)
+                        parse_results["playlists_skipped"] = len(self.skipped_playlists)
+
+                    self.sync_stats["items_renamed"] = renamed_items.count
+                    if new_playlist_check or new_data_check or self.changed_plex_playlists:
+                        with self.progress.stage("write") as write_results:
+                            self.commit_changes_to_db()
+                            write_results.update(
+                                items_added=self.sync_stats["items_added"],
+                                items_removed=self.sync_stats["items_removed"],
+                            )
+
+                    self.sync_stats["playlists_skipped"] = len(self.skipped_playlists)
+                    if self.skipped_playlists:
+                        logger.warning(
+                            f"Skipped {len(self.skipped_playlists)} playlists that failed to sync; "
+                            "they will be retried on the next run."
+                        )
+                    logger.info(
+                        f"Plex parent lookups: {self.parent_cache.hits} hits, "
+                        f"{self.parent_cache.misses} misses ({self.parent_cache.hit_rate:.0%} hit rate)"
+                    )
+
+            except Exception as e:
+                logger.error("An error occurred during the database population process.", exc_info=True)
+                traceback.print_exc()
+                db.session.rollback()
+                self.progress.finish_run("failed", error=str(e))
+                raise e
+
+            finally:
+                self.sync_stats["commits"] = transactions.counts["commit"]
+                logger.info(f"Database transactions: {transactions.summary()}")
+
+        self.progress.finish_run("finished", **self.sync_stats)
+        return self.sync_stats
+
+    def get_playlists_to_add_and_remove(self) -> Tuple[Set[int], Set[int]]:
         """
         Gets the playlists to add and remove.
 
         Returns:
-            Tuple[List[Playlist], List[Playlist]]: Playlists to add and remove.
+            Tuple[Set[int], Set[int]]: Plex ratingKeys of the playlists to add and remove.
         """
         logger.info("Getting playlists to add and remove")
-        return get_playlists_to_add_and_remove(self.db_playlists, self.plex_playlists)
+        return get_playlists_to_add_and_remove(self.db_playlists, self.plex_snapshot)
+
+    def rename_playlists(self) -> bool:
+        """
+        Updates the title of every playlist that was renamed on the Plex server.
+
+        Returns:
+            bool: True if any playlist was renamed, False otherwise.
+        """
+        renamed_playlists = get_renamed_playlists(self.db_playlist_dict, self.plex_snapshot)
+        for db_playlist, plex_playlist in renamed_playlists:
+            logger.info(f"Renaming playlist: {db_playlist.title} -> {plex_playlist.title}")
+            db_playlist.title = plex_playlist.title
+        self.sync_stats["playlists_renamed"] = len(renamed_playlists)
+        return bool(renamed_playlists)
 
     def check_and_parse_playlists(
-        self, playlists_to_add: List[Playlist], playlists_to_remove: List[Playlist]
+        self, playlists_to_add: Set[int], playlists_to_remove: Set[int]
     ) -> bool:
         """
         Checks and parses playlists to add and remove.
 
         Args:
-            playlists_to_add (List[Playlist]): Playlists to add.
-            playlists_to_remove (List[Playlist]): Playlists to remove.
+            playlists_to_add (Set[int]): Plex ratingKeys of the playlists to add.
+            playlists_to_remove (Set[int]): Plex ratingKeys of the playlists to remove.
 
         Returns:
             bool: True if there are playlists to add or remove, False otherwise.
@@ -126,7 +345,7 @@ class DatabasePopulator:
         parse_playlists(
             playlists_to_add,
             playlists_to_remove,
-            self.plex_playlists,
+            self.plex_snapshot,
             self.db_playlist_dict,
             self.db_tracks_dict,
             self.playlist_tracks_dict,
@@ -135,19 +354,28 @@ class DatabasePopulator:
             self.playlist_videos_dict,
             self.db_photo_dict,
             self.playlist_photos_dict,
+            self.parent_cache,
+            self.skipped_playlists,
         )
+        self.sync_stats["playlists_added"] = sum(
+            key in self.db_playlist_dict for key in playlists_to_add
+        )
+        self.sync_stats["playlists_removed"] = len(playlists_to_remove)
         return True
 
-    def check_and_parse_out_of_date_data(self) -> bool:
+    def check_and_parse_out_of_date_data(
+        self, update_data: Dict[Playlist, Tuple[List[object], List[object]]]
+    ) -> bool:
         """
         Checks and parses out-of-date data.
 
+        Args:
+            update_data (Dict): Items to add and remove per out-of-date playlist, from
+                get_out_of_date_data.
+
         Returns:
             bool: True if there is out-of-date data, False otherwise.
         """
-        logger.info("Getting out of date data")
-        update_data = get_out_of_date_data(self.db_playlists, self.plex_playlists)
-
         if not update_data:
             logger.info("No playlist item updates.")
             return False
@@ -163,29 +391,130 @@ class DatabasePopulator:
             self.db_photo_dict,
             self.playlist_photos_dict,
             self.remove_item_dict,
-            self.plex_playlists,
+            self.plex_snapshot,
+            self.parent_cache,
+            self.skipped_playlists,
+        )
+        self.sync_stats["playlists_updated"] = sum(
+            db_playlist.rating_key not in self.skipped_playlists for db_playlist in update_data
         )
         return True
 
     def commit_changes_to_db(self) -> None:
         """
         Commits changes to the database by saving new objects and associating/disassociating items with playlists.
+
+        Every write is flushed into the run's transaction, which is committed once at the end. The
+        playlists are first written together inside one savepoint; if that fails, it is rolled back
+        and each playlist is written again inside its own savepoint, so one that fails is rolled
+        back, left out of the sync and its ratingKey added to skipped_playlists.
         """
         logger.info("Committing changes to the database")
+        # Removed and renamed playlists are flushed first, outside the savepoints written below
+        db.session.flush()
+
+        saved_stats = self._save_write_stats()
+        try:
+            with db.session.begin_nested():
+                self.write_playlists()
+        except SQLAlchemyError:
+            logger.warning(
+                "Writing the playlists together failed; writing them one at a time", exc_info=True
+            )
+            self._restore_write_stats(saved_stats)
+            self.write_playlists_separately()
+            self.db_playlists = {
+                playlist.rating_key: playlist for playlist in db.session.query(Playlist).all()
+            }
+
+        self.update_playlist_fingerprints()
+        self.report_playlist_writes()
+
+        if any(self.sync_stats[name] for name in DATA_CHANGE_STATS):
+            DatabaseGeneration.bump()
+        db.session.commit()
 
-        self.bulk_save_objects(self.playlist_tracks_dict, "audio playlists")
-        self.bulk_save_objects(self.playlist_videos_dict, "video playlists")
-        self.bulk_save_objects(self.playlist_photos_dict, "photo playlists")
+    def write_playlists(self, rating_keys: Optional[Set[int]] = None) -> None:
+        """
+        Writes the new playlists, their new items and the membership changes of the parsed playlists.
 
-        self.db_playlists = {playlist.title: playlist for playlist in db.session.query(Playlist).all()}
+        Args:
+            rating_keys (Optional[Set[int]]): Plex ratingKeys of the playlists to write. Defaults
+                to every parsed playlist.
+        """
+        playlist_dicts = [
+            self.playlist_tracks_dict,
+            self.playlist_videos_dict,
+            self.playlist_photos_dict,
+            self.remove_item_dict,
+        ]
+        if rating_keys is not None:
+            playlist_dicts = [
+                {
+                    playlist: items
+                    for playlist, items in playlist_dict.items()
+                    if playlist.rating_key in rating_keys
+                }
+                for playlist_dict in playlist_dicts
+            ]
+        tracks_dict, videos_dict, photos_dict, remove_item_dict = playlist_dicts
+
+        self.bulk_save_objects(tracks_dict, "audio playlists")
+        self.bulk_save_objects(videos_dict, "video playlists")
+        self.bulk_save_objects(photos_dict, "photo playlists")
+
+        self.db_playlists = {
+            playlist.rating_key: playlist for playlist in db.session.query(Playlist).all()
+        }
 
-        self.associate_items_with_playlists(self.playlist_tracks_dict, "tracks")
-        self.associate_items_with_playlists(self.playlist_videos_dict, "videos")
-        self.associate_items_with_playlists(self.playlist_photos_dict, "photos")
+        self.associate_items_with_playlists(tracks_dict, "tracks")
+        self.associate_items_with_playlists(videos_dict, "videos")
+        self.associate_items_with_playlists(photos_dict, "photos")
 
-        self.disassociate_items_from_playlists()
+        self.disassociate_items_from_playlists(remove_item_dict)
+        self.update_playlist_counts(
+            None
+            if rating_keys is None
+            else [self.db_playlists[key].id for key in rating_keys if key in self.db_playlists]
+        )
 
-        db.session.commit()
+    def write_playlists_separately(self) -> None:
+        """
+        Writes each parsed playlist inside its own savepoint, skipping the ones that fail.
+        """
+        playlists = {
+            playlist.rating_key: playlist
+            for playlist_dict in (
+                self.playlist_tracks_dict,
+                self.playlist_videos_dict,
+                self.playlist_photos_dict,
+                self.remove_item_dict,
+            )
+            for playlist in playlist_dict
+        }
+        for rating_key, playlist in playlists.items():
+            saved_stats = self._save_write_stats()
+            try:
+                with db.session.begin_nested():
+                    self.write_playlists({rating_key})
+            except SQLAlchemyError:
+                logger.error(f"Skipping playlist: {playlist.title} (write failed)", exc_info=True)
+                self._restore_write_stats(saved_stats)
+                self.skipped_playlists.add(rating_key)
+
+    def _save_write_stats(self) -> Tuple[Dict[str, int], Dict[int, Dict[str, int]]]:
+        return dict(self.sync_stats), {
+            playlist_id: dict(changes) for playlist_id, changes in self.playlist_changes.items()
+        }
+
+    def _restore_write_stats(
+        self, saved_stats: Tuple[Dict[str, int], Dict[int, Dict[str, int]]]
+    ) -> None:
+        # Counters of writes that a rolled-back savepoint undid
+        sync_stats, playlist_changes = saved_stats
+        self.sync_stats.update(sync_stats)
+        self.playlist_changes.clear()
+        self.playlist_changes.update(playlist_changes)
 
     def bulk_save_objects(
         self, playlist_dict: Dict[Playlist, List[Track | Episode | Movie | Photo]], playlist_type: str
@@ -199,7 +528,6 @@ class DatabasePopulator:
         """
         logger.info(f"Adding/Updating {len(playlist_dict)} {playlist_type} to the database")
         db.session.bulk_save_objects(list(playlist_dict.keys()))
-        db.session.commit()
 
     def associate_items_with_playlists(
         self, playlist_dict: Dict[Playlist, List[Track | Episode | Movie | Photo]], item_type: str
@@ -207,42 +535,251 @@ class DatabasePopulator:
         """
         Associates items with playlists.
 
+        The wanted memberships are diffed in memory against the association tables, which are read
+        once per table, and the missing rows are written with one executemany INSERT OR IGNORE per
+        table instead of a membership query and append per item.
+
         Args:
             playlist_dict (Dict): Dictionary of playlists and their items.
             item_type (str): Type of item (tracks, videos, photos).
         """
         logger.info(f"Associating {item_type} with playlists")
+        self.save_new_items(playlist_dict)
+
+        wanted_links: Dict[type, Set[Tuple[int, int]]] = defaultdict(set)
         for db_playlist, items in playlist_dict.items():
-            db_playlist = self.db_playlists[db_playlist.title]
+            playlist_id = self.db_playlists[db_playlist.rating_key].id
+            for item in items:
+                wanted_links[type(item)].add((playlist_id, _get_primary_key(item)))
+
+        for model, links in wanted_links.items():
+            table, item_column = playlist_item_tables[model]
+            existing_links = _get_playlist_links(table, item_column, {link[0] for link in links})
+            new_links = sorted(links - existing_links)
+            if new_links:
+                db.session.execute(
+                    insert(table).prefix_with("OR IGNORE"),
+                    [
+                        {"playlist_id": playlist_id, item_column: item_id}
+                        for playlist_id, item_id in new_links
+                    ],
+                )
+            self.sync_stats["items_added"] += len(new_links)
+            for playlist_id, _ in new_links:
+                self.playlist_changes[playlist_id]["items_added"] += 1
+            logger.info(f"Added {len(new_links)} rows to {table.name}")
+
+    def save_new_items(
+        self, playlist_dict: Dict[Playlist, List[Track | Episode | Movie | Photo]]
+    ) -> None:
+        """
+        Upserts the items that are not in the database yet by their ratingKey, so every item has an
+        id before its playlist memberships are written.
+
+        Args:
+            playlist_dict (Dict): Dictionary of playlists and their items.
+        """
+        new_items: Dict[type, Dict[int, Track | Episode | Movie | Photo]] = defaultdict(dict)
+        for items in playlist_dict.values():
             for item in items:
-                if item_type == "tracks" and item not in db_playlist.tracks:
-                    db_playlist.tracks.append(item)
-                elif item_type == "videos":
-                    if isinstance(item, Episode) and item not in db_playlist.episodes:
-                        db_playlist.episodes.append(item)
-                    elif isinstance(item, Movie) and item not in db_playlist.movies:
-                        db_playlist.movies.append(item)
-                elif item_type == "photos" and item not in db_playlist.photos:
-                    db_playlist.photos.append(item)
-            db.session.add(db_playlist)
-
-    def disassociate_items_from_playlists(self) -> None:
+                # An id left by a rolled-back write is stale, so every transient item is written
+                if inspect(item).transient:
+                    new_items[type(item)][id(item)] = item
+
+        for model, items in new_items.items():
+            _upsert_items(model, list(items.values()))
+            logger.info(f"Saved {len(items)} new rows to {model.__tablename__}")
+
+    def disassociate_items_from_playlists(
+        self, remove_item_dict: Optional[Dict[Playlist, List[Track | Episode | Movie | Photo]]] = None
+    ) -> None:
         """
         Disassociates items from playlists.
+
+        Removals are grouped per playlist and association table and applied as chunked
+        DELETE ... WHERE playlist_id = ? AND item_id IN (...) statements.
+
+        Args:
+            remove_item_dict (Optional[Dict]): Items to remove per playlist. Defaults to every
+                playlist's removals.
         """
         logger.info("Disassociating items from playlists")
-        for db_playlist, items in self.remove_item_dict.items():
+        if remove_item_dict is None:
+            remove_item_dict = self.remove_item_dict
+        removed_links: Dict[Tuple[type, int], List[int]] = defaultdict(list)
+        for db_playlist, items in remove_item_dict.items():
+            playlist_id = _get_primary_key(db_playlist)
             for item in items:
-                if isinstance(item, Track):
-                    db_playlist.tracks.remove(item)
-                elif isinstance(item, Episode):
-                    db_playlist.episodes.remove(item)
-                elif isinstance(item, Movie):
-                    db_playlist.movies.remove(item)
-                elif isinstance(item, Photo):
-                    db_playlist.photos.remove(item)
-                logger.info(f"Disassociating {item.title} with {db_playlist.title}")
-            db.session.add(db_playlist)
+                removed_links[(type(item), playlist_id)].append(_get_primary_key(item))
+
+        removed_count = 0
+        for (model, playlist_id), item_ids in removed_links.items():
+            table, item_column = playlist_item_tables[model]
+            for start in range(0, len(item_ids), SQLITE_MAX_IN_PARAMS):
+                result = db.session.execute(
+                    delete(table).where(
+                        table.c.playlist_id == playlist_id,
+                        table.c[item_column].in_(item_ids[start : start + SQLITE_MAX_IN_PARAMS]),
+                    )
+                )
+                removed_count += result.rowcount
+                self.playlist_changes[playlist_id]["items_removed"] += result.rowcount
+
+        self.sync_stats["items_removed"] += removed_count
+        logger.info(
+            f"Removed {removed_count} items from {len({key[1] for key in removed_links})} playlists"
+        )
+
+    def update_playlist_counts(self, playlist_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Recounts the item columns of every playlist whose memberships changed in this run, in the
+        same transaction as the membership writes, so readers never need the association tables
+        for counts.
+
+        Args:
+            playlist_ids (Optional[Iterable[int]]): Limits the recount to these playlists.
+        """
+        candidates = self.playlist_changes.keys() if playlist_ids is None else set(playlist_ids)
+        playlist_ids = sorted(
+            playlist_id
+            for playlist_id in candidates
+            if self.playlist_changes.get(playlist_id, {}).get("items_added")
+            or self.playlist_changes.get(playlist_id, {}).get("items_removed")
+        )
+        counts = playlist_count_expressions()
+        for start in range(0, len(playlist_ids), SQLITE_MAX_IN_PARAMS):
+            db.session.execute(
+                update(Playlist.__table__)
+                .where(Playlist.id.in_(playlist_ids[start : start + SQLITE_MAX_IN_PARAMS]))
+                .values(**counts)
+            )
+        logger.info(f"Updated item counts for {len(playlist_ids)} playlists")
+
+    def update_playlist_fingerprints(self) -> None:
+        """
+        Records the fingerprint of every changed playlist whose items were fetched and synced,
+        so the next run can skip it while it stays unchanged on the Plex server. Skipped playlists
+        keep their old fingerprint and are retried.
+        """
+        updated = 0
+        for plex_playlist in self.changed_plex_playlists:
+            if (
+                not self.plex_snapshot.has_items(plex_playlist.ratingKey)
+                or plex_playlist.ratingKey in self.skipped_playlists
+            ):
+                continue
+            db_playlist = self.db_playlists.get(plex_playlist.ratingKey)
+            if db_playlist is None:
+                continue
+            if db_playlist.fingerprint is None:
+                db_playlist.fingerprint = PlaylistFingerprint()
+            db_playlist.fingerprint.update_from(plex_playlist)
+            updated += 1
+        logger.info(f"Updated fingerprints for {updated} playlists")
+
+    def report_playlist_writes(self) -> None:
+        """
+        Reports the items added to and removed from each playlist written in this run.
+        """
+        playlists_by_id = {
+            _get_primary_key(playlist): playlist for playlist in self.db_playlists.values()
+        }
+        for playlist_id, changes in self.playlist_changes.items():
+            playlist = playlists_by_id.get(playlist_id)
+            if playlist is None:
+                continue
+            items = self.plex_snapshot.get_items(playlist.rating_key)
+            self.progress.playlist(
+                "write",
+                playlist.title,
+                items_processed=len(items) if items is not None else 0,
+                **changes,
+            )
+
+
+def _get_primary_key(instance: Playlist | Track | Episode | Movie | Photo) -> int:
+    """
+    Returns the primary key of a persisted instance from its identity, without reloading it if the
+    session expired its attributes on an earlier commit. Items written by _upsert_items are not
+    attached to the session and carry their id directly.
+    """
+    identity = inspect(instance).identity
+    return identity[0] if identity is not None else instance.id
+
+
+def _upsert_items(model: type, items: List[Track | Episode | Movie | Photo]) -> None:
+    """
+    Writes items with INSERT ... ON CONFLICT (rating_key) DO UPDATE ... RETURNING id, batched into
+    multi-row statements, and assigns each item the id of its row.
+
+    Items are identified by their Plex ratingKey like everywhere else in the sync, so two items that
+    share a natural key, such as two tracks of the same title and number on one album, keep their
+    own rows.
+    """
+    table = model.__table__
+    columns = [
+        column.name for column in table.columns if column.name not in ("id", "created_at", "updated_at")
+    ]
+
+    rows = {}
+    for item in items:
+        rows.setdefault(item.rating_key, {name: getattr(item, name) for name in columns})
+
+    statement = sqlite_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.rating_key],
+        set_={
+            **{name: statement.excluded[name] for name in columns if name != "rating_key"},
+            "updated_at": func.current_timestamp(),
+        },
+    ).returning(table.c.id, table.c.rating_key)
+
+    ids = {
+        rating_key: item_id for item_id, rating_key in db.session.execute(statement, list(rows.values()))
+    }
+    for item in items:
+        item.id = ids[item.rating_key]
+
+
+def _get_playlist_links(
+    table: Table, item_column: str, playlist_ids: Iterable[int]
+) -> Set[Tuple[int, int]]:
+    """
+    Returns the existing (playlist_id, item_id) rows of an association table for the given playlists,
+    selected in chunks of SQLITE_MAX_IN_PARAMS playlists.
+    """
+    playlist_ids = sorted(playlist_ids)
+    links = set()
+    for start in range(0, len(playlist_ids), SQLITE_MAX_IN_PARAMS):
+        rows = db.session.execute(
+            select(table.c.playlist_id, table.c[item_column]).where(
+                table.c.playlist_id.in_(playlist_ids[start : start + SQLITE_MAX_IN_PARAMS])
+            )
+        )
+        links.update((playlist_id, item_id) for playlist_id, item_id in rows)
+    return links
+
+
+def _fetch_playlist_items(plex_playlist: object) -> Optional[List[object]]:
+    """
+    Fetches the items of a single Plex playlist, returning None if it is gone from the server.
+    """
+    try:
+        return plex_playlist.items()
+    except plex_exceptions.NotFound:
+        logger.error(f"Skipping playlist: {plex_playlist.title} (not found on Plex server)")
+        return None
+
+
+def _fetch_playlist_records(server: object, plex_playlist: object) -> Optional[List[object]]:
+    """
+    Like _fetch_playlist_items, but streams the items as PlexItemRecords.
+    """
+    try:
+        return fetch_playlist_records(server, plex_playlist)
+    except plex_exceptions.NotFound:
+        logger.error(f"Skipping playlist: {plex_playlist.title} (not found on Plex server)")
+        return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("app_logger")
+
+ProgressSink = Callable[[List[Dict[str, Any]]], None]
+
+
+class SyncProgress:
+    """
+    Collects structured progress events of a sync run and hands them to a sink in batches.
+
+    Events are buffered and flushed at most every min_interval seconds, or once max_batch events are
+    waiting, so a sync over thousands of playlists sends a handful of messages instead of one per
+    playlist. Run and stage boundaries always flush. Without a sink every call is a no-op.
+    """
+
+    def __init__(
+        self, sink: Optional[ProgressSink] = None, min_interval: float = 0.25, max_batch: int = 200
+    ) -> None:
+        self.sink = sink
+        self.min_interval = min_interval
+        self.max_batch = max_batch
+        self._buffer: List[Dict[str, Any]] = []
+        self._run_started = time.perf_counter()
+        self._last_flush = 0.0
+
+    def start_run(self) -> None:
+        self._run_started = time.perf_counter()
+        self._buffer.clear()
+        self._emit({"type": "run", "status": "started"}, flush=True)
+
+    def finish_run(self, status: str, **details: Any) -> None:
+        self._emit({"type": "run", "status": status, **details}, flush=True)
+
+    @contextmanager
+    def stage(self, name: str, **details: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Wraps a sync stage in started/finished events. Counts added to the yielded dict are sent
+        with the finished event.
+        """
+        self._emit({"type": "stage", "stage": name, "status": "started", **details}, flush=True)
+        stage_started = time.perf_counter()
+        results: Dict[str, Any] = {}
+        yield results
+        self._emit(
+            {
+                "type": "stage",
+                "stage": name,
+                "status": "finished",
+                "duration": round(time.perf_counter() - stage_started, 3),
+                **details,
+                **results,
+            },
+            flush=True,
+        )
+
+    def playlist(self, stage: str, title: str, **counts: Any) -> None:
+        self._emit({"type": "playlist", "stage": stage, "playlist": title, **counts})
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self._last_flush = time.perf_counter()
+        try:
+            self.sink(batch)
+        except Exception:
+            logger.warning("Failed to send sync progress", exc_info=True)
+
+    def _emit(self, event: Dict[str, Any], flush: bool = False) -> None:
+        if self.sink is None:
+            return
+        now = time.perf_counter()
+        event["elapsed"] = round(now - self._run_started, 3)
+        self._buffer.append(event)
+        if flush or len(self._buffer) >= self.max_batch or now - self._last_flush >= self.min_interval:
+            self.flush()
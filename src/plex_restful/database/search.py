@@ -0,0 +1,189 @@
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import MetaData, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from .extensions import db
+from .models import (
+    Episode,
+    Movie,
+    Photo,
+    Track,
+    item_key,
+    items_select,
+    playlist_item_types,
+    split_item_key,
+)
+
+logger = logging.getLogger("app_logger")
+
+SEARCH_TABLE = "item_search"
+
+# Indexed columns of the search table and their bm25 weights; a title match outranks the rest
+SEARCH_COLUMNS = {"title": 10.0, "artist": 5.0, "album": 3.0, "show": 5.0}
+
+# Item columns feeding each search column; columns a model lacks are indexed as NULL
+SEARCH_SOURCES = {
+    Track: {"title": "title", "artist": "artist_name", "album": "album_title"},
+    Episode: {"title": "title", "show": "show_title"},
+    Movie: {"title": "title"},
+    Photo: {"title": "title"},
+}
+
+# Rows are keyed by item_key, so a hit names its item table and id without a lookup table.
+# The prefix indexes serve the 2 and 3 character prefix queries that type-ahead search sends.
+_CREATE_SEARCH_TABLE = f"""
+CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+    {", ".join(SEARCH_COLUMNS)},
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+
+class SearchUnavailable(RuntimeError):
+    """
+    Raised when the search table is missing because SQLite was built without FTS5.
+    """
+
+
+def register_search_index(metadata: MetaData) -> None:
+    """
+    Creates the search table and the triggers that keep it in step with the item tables whenever
+    the metadata's tables are created.
+    """
+    if not event.contains(metadata, "after_create", _install_search_index):
+        event.listen(metadata, "after_create", _install_search_index)
+
+
+def _install_search_index(metadata: MetaData, connection: Connection, **kw) -> None:
+    if connection.dialect.name != "sqlite" or _search_table_exists(connection):
+        return
+
+    try:
+        connection.exec_driver_sql(_CREATE_SEARCH_TABLE)
+    except OperationalError:
+        logger.warning("SQLite was built without FTS5, search is disabled", exc_info=True)
+        return
+
+    for model in SEARCH_SOURCES:
+        for statement in _trigger_statements(model):
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) "
+            f"SELECT {_search_values(model, '')} FROM {model.__tablename__}"
+        )
+    logger.info(f"Created the {SEARCH_TABLE} search index")
+
+
+def _search_table_exists(connection: Connection) -> bool:
+    return (
+        connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+        ).first()
+        is not None
+    )
+
+
+def _search_values(model: type, prefix: str) -> str:
+    sources = SEARCH_SOURCES[model]
+    values = [f"{item_key(model, 0)} + {prefix}id"]
+    values += [
+        f"{prefix}{sources[column]}" if column in sources else "NULL" for column in SEARCH_COLUMNS
+    ]
+    return ", ".join(values)
+
+
+def _trigger_statements(model: type) -> List[str]:
+    table = model.__tablename__
+    insert_row = (
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) "
+        f"VALUES ({_search_values(model, 'new.')});"
+    )
+    delete_row = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {item_key(model, 0)} + old.id;"
+    watched = ", ".join(["id", *SEARCH_SOURCES[model].values()])
+    return [
+        f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN {insert_row} END",
+        f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN {delete_row} END",
+        f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {watched} ON {table} "
+        f"BEGIN {delete_row} {insert_row} END",
+    ]
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query that matches items containing every word as a prefix.
+
+    Every word is quoted, so FTS5 operators and punctuation in the input are searched for literally
+    instead of being parsed.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_items(
+    query: str, limit: int, offset: int = 0, item_type: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Runs a ranked prefix search over the titles, artists, albums and shows of every item.
+
+    The search table is read for one page of ranked keys, and the page's items are then loaded with
+    a single UNION ALL over the item tables. Raises SearchUnavailable if there is no search table.
+
+    Args:
+        query (str): Free text to search for.
+        limit (int): Maximum number of results.
+        offset (int): Number of higher-ranked results to skip.
+        item_type (Optional[str]): Only return items of this type (track, episode, movie, photo).
+
+    Returns:
+        Tuple[List[Dict[str, Any]], bool]: The results as dicts of item fields plus their score,
+            best match first, and whether more results follow.
+    """
+    if not _search_table_exists(db.session.connection()):
+        raise SearchUnavailable("Search is unavailable: this SQLite build has no FTS5 support")
+
+    match = build_match_query(query)
+    if match is None:
+        return [], False
+
+    weights = ", ".join(str(weight) for weight in SEARCH_COLUMNS.values())
+    conditions = f"{SEARCH_TABLE} MATCH :match"
+    params: Dict[str, Any] = {"match": match, "limit": limit + 1, "offset": offset}
+    if item_type is not None:
+        model = {name: model for model, name in playlist_item_types.items()}[item_type]
+        # The rowid range of one item table, which FTS5 applies while scanning the index
+        conditions += " AND rowid >= :low AND rowid < :high"
+        params.update(low=item_key(model, 0), high=item_key(model, 0) + (1 << 32))
+
+    hits = db.session.execute(
+        text(
+            f"SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS score FROM {SEARCH_TABLE} "
+            f"WHERE {conditions} ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        params,
+    ).all()
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    if not hits:
+        return [], False
+
+    ids_by_model: Dict[type, List[int]] = defaultdict(list)
+    for key, _ in hits:
+        model, item_id = split_item_key(key)
+        ids_by_model[model].append(item_id)
+    items = {row.item_key: row._asdict() for row in db.session.execute(items_select(ids_by_model))}
+
+    results = []
+    for key, score in hits:
+        item = items.get(key)
+        if item is not None:
+            item.pop("item_key")
+            results.append({**item, "score": round(-score, 4)})
+    return results, has_more
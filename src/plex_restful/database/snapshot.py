@@ -0,0 +1,43 @@
+from typing import Dict, Iterator, List, Optional, Set
+
+
+class PlexSnapshot:
+    """
+    Indexed view of the Plex playlists and their items, built once per sync run and shared by the
+    diff and parse stages.
+    """
+
+    def __init__(self, plex_playlists: List[object]) -> None:
+        self.playlists: List[object] = list(plex_playlists)
+        self.by_rating_key: Dict[int, object] = {pl.ratingKey: pl for pl in self.playlists}
+        self.by_title: Dict[str, object] = {pl.title: pl for pl in self.playlists}
+        self.items: Dict[int, List[object]] = {}
+        self.item_keys: Dict[int, Set[int]] = {}
+
+    def __iter__(self) -> Iterator[object]:
+        return iter(self.playlists)
+
+    def __len__(self) -> int:
+        return len(self.playlists)
+
+    def rating_keys(self) -> Set[int]:
+        return set(self.by_rating_key)
+
+    def get(self, rating_key: int) -> Optional[object]:
+        return self.by_rating_key.get(rating_key)
+
+    def get_by_title(self, title: str) -> Optional[object]:
+        return self.by_title.get(title)
+
+    def set_items(self, rating_key: int, items: List[object]) -> None:
+        self.items[rating_key] = items
+        self.item_keys[rating_key] = {item.ratingKey for item in items}
+
+    def get_items(self, rating_key: int) -> Optional[List[object]]:
+        return self.items.get(rating_key)
+
+    def get_item_keys(self, rating_key: int) -> Optional[Set[int]]:
+        return self.item_keys.get(rating_key)
+
+    def has_items(self, rating_key: int) -> bool:
+        return rating_key in self.items
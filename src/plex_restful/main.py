@@ -4,17 +4,45 @@ import time
 
 import click
 
-from .app import app
+from .app import get_app
+from .apps.refresh.jobs import run_sync
+from .apps.refresh.scheduler import SyncScheduler, parse_interval
+from .config import SyncConfig
+from .database.consistency import check_playlist_counts
 from .database.extensions import db
 from .utils import create_logger
 
 
-@click.command()
+def _parse_interval_option(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return parse_interval(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def _parse_sync_interval_option(ctx, param, value):
+    # Unlike --sync-every, 0 cannot disable anything here and would sync in a tight loop
+    interval = _parse_interval_option(ctx, param, value)
+    if interval is not None and interval <= 0:
+        raise click.BadParameter("must be greater than 0; leave it out to sync once")
+    return interval
+
+
+@click.group(invoke_without_command=True)
 @click.option("-d", "--debugger", is_flag=True, help="Runs the server with debugger.")
 @click.option("-h", "--host", default="127.0.0.1", help="Specify the host IP address.")
 @click.option("-p", "--port", default=5090, help="Specify the port to run on.")
 @click.option("-v", "--verbose", count=True, help="Increase verbosity level")
-def main(debugger, host, port, verbose):
+@click.option(
+    "--sync-every",
+    callback=_parse_interval_option,
+    help="Interval of the background sync, e.g. 900, 15m or 1h; 0 disables it. "
+    "Defaults to PLEX_SYNC_INTERVAL.",
+)
+@click.pass_context
+def main(ctx, debugger, host, port, verbose, sync_every):
     if verbose == 0:
         log_level = logging.WARNING
     elif verbose == 1:
@@ -23,8 +51,12 @@ def main(debugger, host, port, verbose):
         log_level = logging.DEBUG
 
     logger = create_logger(level=log_level)
+    app = get_app()
     app.logger = logger
 
+    if ctx.invoked_subcommand is not None:
+        return
+
     init_db()
 
     os.environ["FLASK_APP"] = "plex_restful.app"
@@ -33,18 +65,71 @@ def main(debugger, host, port, verbose):
     if debugger:
         os.environ["FLASK_DEBUG"] = "1"
 
+    interval = SyncConfig.INTERVAL if sync_every is None else sync_every
+    # With the debugger, the reloader parent process only watches files; sync in the child
+    if interval > 0 and (not debugger or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        SyncScheduler(app, interval=interval).start()
+
     app.run(host=host, port=port, debug=debugger)
 
 
-def init_db():
-    from .database import DatabasePopulator
+@main.command()
+@click.option(
+    "--every",
+    callback=_parse_sync_interval_option,
+    help="Keep syncing on this interval, e.g. 900, 15m or 1h. Without it, syncs once.",
+)
+def sync(every):
+    """Runs an incremental sync without starting the server."""
+    app = get_app()
+    with app.app_context():
+        db.create_all()
+
+    if every is None:
+        with app.app_context():
+            sync_run = run_sync("cli")
+            click.echo(
+                f"Sync finished in {sync_run.duration:.2f} seconds: "
+                f"{sync_run.playlists_added} playlists added, {sync_run.playlists_removed} removed, "
+                f"{sync_run.playlists_updated} updated; {sync_run.items_added} items added, "
+                f"{sync_run.items_removed} removed"
+            )
+        return
+
+    scheduler = SyncScheduler(app, interval=every, trigger="cli")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
 
-    populator = DatabasePopulator()
-    db.init_app(app)
+@main.command("check-counts")
+@click.option("--fix", is_flag=True, help="Overwrite drifted counts with the recomputed ones.")
+def check_counts(fix):
+    """Recomputes the playlist item counts and reports any drift."""
+    with get_app().app_context():
+        drift = check_playlist_counts(fix=fix)
+        for entry in drift:
+            details = ", ".join(
+                f"{name} {values['stored']} -> {values['actual']}"
+                for name, values in entry["counts"].items()
+            )
+            click.echo(f"{entry['title']} (id {entry['id']}): {details}")
+
+    if not drift:
+        click.echo("All playlist item counts are consistent")
+    elif fix:
+        click.echo(f"Fixed item counts of {len(drift)} playlists")
+    else:
+        raise click.ClickException(f"{len(drift)} playlists have drifted item counts; rerun with --fix")
+
+
+def init_db():
+    app = get_app()
     with app.app_context():
         db.create_all()
         start_time = time.time()
-        populator.run_db_population()
+        run_sync("startup")
         end_time = time.time()
         elapsed_time = end_time - start_time
         app.logger.info(f"populate_db function executed in {elapsed_time:.2f} seconds")
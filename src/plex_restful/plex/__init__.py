@@ -1,24 +1,26 @@
-import json
-import logging
-import os
-
 import plexapi.exceptions as plex_exceptions
 
-from ..config import PlexConfig
-from .server import get_server
-
-logger = logging.getLogger("app_logger")
-
-__all__ = ["get_server", "plex_exceptions"]
-
-
-try:
-    with open(PlexConfig.CRED_PATH, "r") as f:
-        data = json.load(f)
-        plex_data = data.get("plex", {})
-        os.environ["PLEX_BASEURL"] = plex_data.get("baseurl", "")
-        os.environ["PLEX_TOKEN"] = plex_data.get("token", "")
-        logger.debug("Loaded Plex credentials")
+from .async_client import AsyncPlexClient
+from .cache import CachingSession, DiskResponseCache, PlexCacheMiss
+from .server import PlexConnectionManager, connection_manager, get_server
+from .xml_stream import (
+    PlexItemRecord,
+    fetch_playlist_records,
+    iter_media_container,
+    playlist_items_path,
+)
 
-except FileNotFoundError as e:
-    raise RuntimeError("Failed to load Plex credentials") from e
+__all__ = [
+    "AsyncPlexClient",
+    "CachingSession",
+    "DiskResponseCache",
+    "PlexCacheMiss",
+    "PlexConnectionManager",
+    "PlexItemRecord",
+    "connection_manager",
+    "fetch_playlist_records",
+    "get_server",
+    "iter_media_container",
+    "plex_exceptions",
+    "playlist_items_path",
+]
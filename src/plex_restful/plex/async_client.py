@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import math
+from typing import List, Optional, Sequence
+
+from plexapi import utils as plex_utils
+from plexapi.exceptions import BadRequest, NotFound, Unauthorized
+from plexapi.server import PlexServer
+
+from ..config import PlexConfig
+from .xml_stream import playlist_items_path
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is optional; without it the fetch stage uses plexapi threads
+    aiohttp = None
+
+logger = logging.getLogger("app_logger")
+
+
+class AsyncPlexClient:
+    """
+    Fetches playlist items over asyncio, paging each playlist's container.
+
+    Every playlist is read in pages of page_size items with X-Plex-Container-Start and
+    X-Plex-Container-Size, and the pages after the first are requested together, so large playlists
+    arrive in parallel pieces instead of one long response. At most max_concurrency requests are in
+    flight at once, each bounded by timeout seconds. Items are built into plexapi objects by the
+    wrapped PlexServer, so callers see exactly what playlist.items() returns.
+    """
+
+    def __init__(
+        self,
+        server: PlexServer,
+        page_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if aiohttp is None:
+            raise RuntimeError("The async Plex client requires aiohttp (pip install aiohttp)")
+        self.server = server
+        self.page_size = page_size if page_size is not None else PlexConfig.PAGE_SIZE
+        self.max_concurrency = (
+            max_concurrency if max_concurrency is not None else PlexConfig.ASYNC_CONCURRENCY
+        )
+        self.timeout = timeout if timeout is not None else PlexConfig.REQUEST_TIMEOUT
+
+    def fetch_playlist_items(self, plex_playlists: Sequence[object]) -> List[Optional[List[object]]]:
+        """
+        Fetches the items of every playlist, in the order given.
+
+        Returns:
+            List[Optional[List[object]]]: The items of each playlist, or None for playlists that
+                are no longer found on the server.
+        """
+        return asyncio.run(self._fetch_all(plex_playlists))
+
+    async def _fetch_all(self, plex_playlists: Sequence[object]) -> List[Optional[List[object]]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        async with aiohttp.ClientSession(
+            headers=self.server._headers(), timeout=timeout, connector=connector
+        ) as session:
+            return await asyncio.gather(
+                *(self._fetch_playlist(session, semaphore, playlist) for playlist in plex_playlists)
+            )
+
+    async def _fetch_playlist(
+        self, session: "aiohttp.ClientSession", semaphore: asyncio.Semaphore, plex_playlist: object
+    ) -> Optional[List[object]]:
+        key = playlist_items_path(plex_playlist)
+        try:
+            first_page = await self._fetch_page(session, semaphore, key, 0)
+            total_size = int(first_page.attrib.get("totalSize", len(first_page)))
+            pages = [first_page]
+            if len(first_page) < total_size:
+                pages += await asyncio.gather(
+                    *(
+                        self._fetch_page(session, semaphore, key, page * self.page_size)
+                        for page in range(1, math.ceil(total_size / self.page_size))
+                    )
+                )
+        except NotFound:
+            logger.error(f"Skipping playlist: {plex_playlist.title} (not found on Plex server)")
+            return None
+
+        items = []
+        for page in pages:
+            items.extend(self.server.findItems(page, initpath=key))
+        return items
+
+    async def _fetch_page(
+        self, session: "aiohttp.ClientSession", semaphore: asyncio.Semaphore, key: str, start: int
+    ):
+        headers = {
+            "X-Plex-Container-Start": str(start),
+            "X-Plex-Container-Size": str(self.page_size),
+        }
+        async with semaphore:
+            async with session.get(self.server.url(key), headers=headers) as response:
+                text = await response.text()
+                status = response.status
+
+        if status == 401:
+            raise Unauthorized(f"({status}) {key}")
+        if status == 404:
+            raise NotFound(f"({status}) {key}")
+        if status not in (200, 201, 204):
+            raise BadRequest(f"({status}) {key} {text[:200]}")
+        return plex_utils.parseXMLString(text)
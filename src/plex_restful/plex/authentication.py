@@ -1,7 +1,10 @@
+import json
 import logging
 import os
 from typing import Any, Dict, Optional
 
+from ..config import PlexConfig
+
 logger = logging.getLogger("app_logger")
 
 
@@ -14,14 +17,33 @@ class Authentication:
         self.auth_data = auth_data if auth_data else self._load_auth_data()
 
     def _load_auth_data(self) -> Dict[str, Any]:
+        # Environment variables take precedence; the credentials file fills in whatever is unset.
         plex_baseurl = os.getenv("PLEX_BASEURL")
         plex_token = os.getenv("PLEX_TOKEN")
 
         if not plex_baseurl or not plex_token:
-            raise AuthenticationError("PLEX_BASEURL or PLEX_TOKEN environment variables not set")
+            plex_data = self._load_credentials_file(PlexConfig.CRED_PATH).get("plex", {})
+            plex_baseurl = plex_baseurl or plex_data.get("baseurl")
+            plex_token = plex_token or plex_data.get("token")
+
+        if not plex_baseurl or not plex_token:
+            raise AuthenticationError(
+                "PLEX_BASEURL or PLEX_TOKEN not set in the environment or the credentials file"
+            )
 
         return {"plex": {"baseurl": plex_baseurl, "token": plex_token}}
 
+    @staticmethod
+    def _load_credentials_file(path: str) -> Dict[str, Any]:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.debug(f"No Plex credentials file at {path}")
+            return {}
+        logger.debug("Loaded Plex credentials")
+        return data
+
     @staticmethod
     def mask_auth_data(auth_data: Dict[str, Any]) -> Dict[str, Any]:
         masked_data = {
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger("app_logger")
+
+# Response headers kept with a cached body; the rest describe the original transfer
+_STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "X-Plex-Protocol")
+
+# Request headers that select a different response from the same URL (plexapi pages with them)
+_KEY_HEADERS = ("X-Plex-Container-Start", "X-Plex-Container-Size")
+
+
+class PlexCacheMiss(requests.ConnectionError):
+    """
+    Raised in offline mode for a request that has no cached response.
+    """
+
+
+class DiskResponseCache:
+    """
+    Size-bounded LRU of response bodies on disk.
+
+    Each entry is a body file and a JSON metadata file named after the entry's key. Entries are
+    indexed in memory when the cache is opened; once the bodies exceed max_bytes, the least
+    recently used entries are deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            try:
+                with open(self._path(key, "json"), "r") as f:
+                    meta = json.load(f)
+                with open(self._path(key, "body"), "rb") as f:
+                    body = f.read()
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            self._index[key] = (len(body), time.time())
+            return meta, body
+
+    def put(self, key: str, meta: Dict[str, Any], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._write(self._path(key, "body"), body)
+            self._write(self._path(key, "json"), json.dumps(meta).encode())
+            if key in self._index:
+                self._size -= self._index[key][0]
+            self._index[key] = (len(body), time.time())
+            self._size += len(body)
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (self._index[key][0], time.time())
+                os.utime(self._path(key, "json"))
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def _load_index(self) -> None:
+        for name in os.listdir(self.directory):
+            key, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            try:
+                size = os.path.getsize(self._path(key, "body"))
+                last_used = os.path.getmtime(self._path(key, "json"))
+            except OSError:
+                continue
+            self._index[key] = (size, last_used)
+            self._size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda entry: entry[1][1]):
+            self._remove(key)
+            if self._size <= self.max_bytes:
+                break
+
+    def _remove(self, key: str) -> None:
+        size, _ = self._index.pop(key, (0, 0.0))
+        self._size -= size
+        for extension in ("body", "json"):
+            try:
+                os.remove(self._path(key, extension))
+            except FileNotFoundError:
+                pass
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        # Write then rename, so a crash never leaves a truncated entry behind
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+
+
+class CachingSession(requests.Session):
+    """
+    requests.Session that answers repeated Plex GETs from a DiskResponseCache.
+
+    Entries are keyed by URL, container paging headers and a hash of the Plex token, so two
+    accounts never share a body. A cached response is revalidated with If-None-Match and
+    If-Modified-Since when it carries an ETag or Last-Modified, and a 304 is answered with the
+    cached body. Plex leaves those headers off most XML endpoints, so callers can also hint the
+    updatedAt of a container with hint_updated_at; a cached body recorded under the same updatedAt
+    is served without a request. In offline mode every request is answered from the cache, and a
+    miss raises PlexCacheMiss.
+    """
+
+    def __init__(self, cache: DiskResponseCache, offline: bool = False) -> None:
+        super().__init__()
+        self.cache = cache
+        self.offline = offline
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._updated_at_hints: Dict[str, float] = {}
+
+    def hint_updated_at(self, path: str, updated_at: Optional[Union[datetime, float]]) -> None:
+        """
+        Records the updatedAt the next response for path is expected to have.
+        """
+        if updated_at is None:
+            self._updated_at_hints.pop(path, None)
+            return
+        if isinstance(updated_at, datetime):
+            updated_at = updated_at.timestamp()
+        self._updated_at_hints[path] = float(updated_at)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET":
+            if self.offline:
+                raise PlexCacheMiss(f"Offline mode does not send {request.method} {request.url}")
+            return super().send(request, **kwargs)
+
+        key = self._cache_key(request)
+        path = urlsplit(request.url).path
+        cached = self.cache.get(key)
+
+        if cached is not None:
+            meta, body = cached
+            hint = self._updated_at_hints.get(path)
+            if self.offline or (hint is not None and meta.get("updated_at") == hint):
+                self.stats["hits"] += 1
+                return self._build_response(request, meta, body, "HIT")
+            if meta["headers"].get("ETag"):
+                request.headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                request.headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        elif self.offline:
+            raise PlexCacheMiss(f"No cached response for {request.url}")
+
+        kwargs["stream"] = False
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.stats["revalidated"] += 1
+            self.cache.touch(key)
+            return self._build_response(request, meta, body, "REVALIDATED")
+
+        self.stats["misses"] += 1
+        if response.status_code == 200:
+            headers = {
+                name: response.headers[name] for name in _STORED_HEADERS if name in response.headers
+            }
+            meta = {
+                "url": request.url.split("?")[0],
+                "headers": headers,
+                "updated_at": self._updated_at_hints.get(path),
+                "stored_at": time.time(),
+            }
+            self.cache.put(key, meta, response.content)
+        return response
+
+    @staticmethod
+    def _cache_key(request: requests.PreparedRequest) -> str:
+        token = request.headers.get("X-Plex-Token", "")
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        paging = ",".join(request.headers.get(name, "") for name in _KEY_HEADERS)
+        return hashlib.sha256(f"{request.url}\n{paging}\n{token_hash}".encode()).hexdigest()
+
+    @staticmethod
+    def _build_response(
+        request: requests.PreparedRequest, meta: Dict[str, Any], body: bytes, status: str
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.headers["X-Plex-Cache"] = status
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        return response
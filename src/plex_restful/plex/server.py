@@ -1,14 +1,146 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+import requests
+from plexapi.exceptions import PlexApiException
 from plexapi.server import PlexServer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from ..config import PlexConfig
 from .authentication import AuthenticationError, PlexAuthentication
+from .cache import CachingSession, DiskResponseCache
+
+logger = logging.getLogger("app_logger")
+
+# Answered by the server without touching its library, so it is a cheap liveness probe
+HEALTH_CHECK_PATH = "/identity"
+HEALTH_CHECK_TIMEOUT = 5
+
+
+class PlexConnectionManager:
+    """
+    Process-wide owner of the Plex HTTP session and PlexServer handle.
+
+    Every request goes through one requests.Session whose pooled adapter keeps connections alive
+    and retries GETs with exponential backoff on connection errors, timeouts and 5xx responses.
+    The PlexServer is built once and reused; a handle idle for longer than health_interval seconds
+    is first probed with a request to /identity, and rebuilt if the probe fails or the server answers
+    with a different machine identifier. The credentials are read when the first handle is built and
+    kept until reset().
+
+    With PlexConfig.RESPONSE_CACHE the session is a CachingSession over PlexConfig.RESPONSE_CACHE_DIR,
+    and with PlexConfig.OFFLINE it never touches the network.
+    """
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+        timeout: Optional[float] = None,
+        health_interval: Optional[float] = None,
+    ) -> None:
+        self.pool_size = pool_size if pool_size is not None else PlexConfig.POOL_SIZE
+        self.max_retries = max_retries if max_retries is not None else PlexConfig.MAX_RETRIES
+        self.backoff_factor = backoff_factor if backoff_factor is not None else PlexConfig.RETRY_BACKOFF
+        self.timeout = timeout if timeout is not None else PlexConfig.REQUEST_TIMEOUT
+        self.health_interval = (
+            health_interval if health_interval is not None else PlexConfig.HEALTH_CHECK_INTERVAL
+        )
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._server: Optional[PlexServer] = None
+        self._auth: Optional[PlexAuthentication] = None
+        self._checked_at = 0.0
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def get_server(self) -> PlexServer:
+        """
+        Returns the shared PlexServer, connecting on first use and whenever the health check fails.
+        """
+        with self._lock:
+            if self._server is not None and self._is_healthy():
+                return self._server
+
+            if self._auth is None:
+                self._auth = PlexAuthentication()
+            logger.info(f"Connecting to the Plex server at {self._auth.baseurl}")
+            self._server = PlexServer(
+                baseurl=self._auth.baseurl,
+                token=self._auth.token,
+                session=self.session,
+                timeout=self.timeout,
+            )
+            self._checked_at = time.monotonic()
+            return self._server
+
+    def reset(self) -> None:
+        """
+        Drops the server handle and the credentials, and closes the pooled connections.
+        """
+        with self._lock:
+            self._server = None
+            self._auth = None
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _is_healthy(self) -> bool:
+        if time.monotonic() - self._checked_at < self.health_interval or PlexConfig.OFFLINE:
+            return True
+        try:
+            identity = self._server.query(HEALTH_CHECK_PATH, timeout=HEALTH_CHECK_TIMEOUT)
+        except (PlexApiException, requests.RequestException):
+            logger.warning("Plex server health check failed; reconnecting", exc_info=True)
+            return False
+
+        if (
+            identity is None
+            or identity.attrib.get("machineIdentifier") != self._server.machineIdentifier
+        ):
+            logger.warning("Plex server identity changed; reconnecting")
+            return False
+        self._checked_at = time.monotonic()
+        return True
+
+    def _create_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry
+        )
+        if PlexConfig.RESPONSE_CACHE:
+            cache = DiskResponseCache(PlexConfig.RESPONSE_CACHE_DIR, PlexConfig.RESPONSE_CACHE_MAX_BYTES)
+            session = CachingSession(cache, offline=PlexConfig.OFFLINE)
+            logger.info(
+                f"Caching Plex responses in {PlexConfig.RESPONSE_CACHE_DIR}"
+                + (" (offline)" if PlexConfig.OFFLINE else "")
+            )
+        else:
+            session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+connection_manager = PlexConnectionManager()
 
 
 def get_server():
-    # Initialize Plex Authentication
     try:
-        plex_auth = PlexAuthentication()
-        # Create the Plex Server instance
-        plex_server = PlexServer(baseurl=plex_auth.baseurl, token=plex_auth.token)
-        return plex_server
+        return connection_manager.get_server()
     except AuthenticationError as e:
         raise RuntimeError("Failed to initialize Plex server") from e
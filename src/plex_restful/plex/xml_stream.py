@@ -0,0 +1,166 @@
+import codecs
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from xml.etree.ElementTree import XMLPullParser
+
+from plexapi import utils as plex_utils
+from plexapi.exceptions import NotFound
+
+# Container children that describe playlist items
+ITEM_TAGS = {"Track", "Video", "Photo"}
+
+_INT_ATTRIBUTES = (
+    "ratingKey",
+    "index",
+    "parentIndex",
+    "duration",
+    "year",
+    "parentRatingKey",
+    "grandparentRatingKey",
+)
+_STR_ATTRIBUTES = (
+    "type",
+    "key",
+    "title",
+    "thumb",
+    "parentTitle",
+    "grandparentTitle",
+    "parentKey",
+    "grandparentKey",
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class PartRecord(NamedTuple):
+    file: Optional[str]
+
+
+class MediaRecord(NamedTuple):
+    parts: Tuple[PartRecord, ...]
+
+
+class PlexItemRecord:
+    """
+    Compact stand-in for a plexapi Track, Episode, Movie or Photo, holding only the attributes the
+    diff and parse stages read.
+
+    Parent lookups (album, artist, season, show) fetch the parent through the server the record
+    was read from, like the plexapi methods of the same name.
+    """
+
+    __slots__ = (*_INT_ATTRIBUTES, *_STR_ATTRIBUTES, "media", "_server")
+
+    def __init__(self, attrib: dict, media: Tuple[MediaRecord, ...], server: Optional[object]) -> None:
+        for name in _INT_ATTRIBUTES:
+            value = attrib.get(name)
+            setattr(self, name, int(value) if value else None)
+        for name in _STR_ATTRIBUTES:
+            setattr(self, name, attrib.get(name))
+        self.media = media
+        self._server = server
+
+    @property
+    def trackNumber(self) -> Optional[int]:
+        return self.index
+
+    def album(self):
+        return self._fetch(self.parentKey)
+
+    def artist(self):
+        return self._fetch(self.grandparentKey)
+
+    def season(self):
+        return self._fetch(self.parentKey)
+
+    def show(self):
+        return self._fetch(self.grandparentKey)
+
+    def _fetch(self, key: Optional[str]):
+        if self._server is None or key is None:
+            return None
+        return self._server.fetchItem(key)
+
+    def __repr__(self) -> str:
+        return f"<PlexItemRecord(type={self.type}, ratingKey={self.ratingKey}, title={self.title})>"
+
+
+def iter_media_container(
+    source: Union[IO[bytes], Iterable[bytes]], server: Optional[object] = None
+) -> Iterator[PlexItemRecord]:
+    """
+    Streams the items of a Plex MediaContainer XML document as PlexItemRecords.
+
+    The document is decoded and passed through plexapi's cleanXMLString chunk by chunk, then fed to
+    an incremental (iterparse-style) parser. Each item element is turned into a record when it
+    closes and is then dropped from the tree, so memory stays flat however many items the
+    container holds.
+
+    Args:
+        source (Union[IO[bytes], Iterable[bytes]]): A binary file or an iterable of byte chunks,
+            such as a streamed HTTP response.
+        server (Optional[object]): The PlexServer the records fetch their parents from.
+
+    Returns:
+        Iterator[PlexItemRecord]: The container's tracks, videos and photos in document order.
+    """
+    chunks = iter(lambda: source.read(CHUNK_SIZE), b"") if hasattr(source, "read") else source
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = XMLPullParser(events=("start", "end"))
+    depth = 0
+    container = None
+    media: list = []
+
+    def drain() -> Iterator[PlexItemRecord]:
+        nonlocal depth, container, media
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    container = elem
+                continue
+
+            depth -= 1
+            if depth == 2 and elem.tag == "Media":
+                media.append(
+                    MediaRecord(tuple(PartRecord(part.get("file")) for part in elem.iter("Part")))
+                )
+            elif depth == 1:
+                if elem.tag in ITEM_TAGS:
+                    yield PlexItemRecord(elem.attrib, tuple(media), server)
+                media = []
+                container.remove(elem)
+
+    for chunk in chunks:
+        parser.feed(plex_utils.cleanXMLString(decoder.decode(chunk)))
+        yield from drain()
+    parser.feed(plex_utils.cleanXMLString(decoder.decode(b"", final=True)))
+    parser.close()
+    yield from drain()
+
+
+def playlist_items_path(plex_playlist: object) -> str:
+    """
+    Returns the path of a playlist's items container; the playlist's own key is its metadata.
+    """
+    return f"{plex_playlist.key}/items"
+
+
+def fetch_playlist_records(
+    server: object, plex_playlist: object, timeout: Optional[float] = None
+) -> List[PlexItemRecord]:
+    """
+    Fetches a playlist's items as PlexItemRecords from a streamed response, without building the
+    plexapi objects.
+    """
+    path = playlist_items_path(plex_playlist)
+    response = server._session.get(
+        server.url(path),
+        headers=server._headers(),
+        stream=True,
+        timeout=timeout or server._timeout,
+    )
+    with response:
+        if response.status_code == 404:
+            raise NotFound(f"(404) {path}")
+        response.raise_for_status()
+        return list(iter_media_container(response.iter_content(CHUNK_SIZE), server))
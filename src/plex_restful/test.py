@@ -1,11 +1,11 @@
-from sqlalchemy import MetaData, Table, create_engine
+from sqlalchemy import MetaData, Table
 from sqlalchemy.orm import sessionmaker
 
+from .database.engine import create_db_engine
 from .database.models import Playlist
 
-db_path = "sqlite:///src/instance/plex_restful.db"
 # Create an engine and connect to the database
-engine = create_engine(db_path)
+engine = create_db_engine()
 metadata = MetaData()
 metadata.reflect(bind=engine)
 # Create a session
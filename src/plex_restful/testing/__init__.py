@@ -0,0 +1,11 @@
+from .environment import database_memberships, fake_plex_environment, membership_differences
+from .fake_server import FakePlexServer
+from .synthetic import SyntheticLibrary
+
+__all__ = [
+    "FakePlexServer",
+    "SyntheticLibrary",
+    "database_memberships",
+    "fake_plex_environment",
+    "membership_differences",
+]
@@ -0,0 +1,66 @@
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import select
+
+from ..config import PlexConfig
+from ..database.extensions import db
+from ..database.models import Playlist, playlist_items_select
+from ..plex.server import connection_manager
+from .fake_server import FakePlexServer
+from .synthetic import SyntheticLibrary
+
+
+@contextmanager
+def fake_plex_environment(server: FakePlexServer, **config) -> Iterator[None]:
+    """
+    Points the Plex connection at a FakePlexServer and overrides PlexConfig attributes inside the
+    block, restoring both afterwards.
+    """
+    saved_environ = {name: os.environ.get(name) for name in server.environ()}
+    saved_config = {name: getattr(PlexConfig, name) for name in config}
+    os.environ.update(server.environ())
+    for name, value in config.items():
+        setattr(PlexConfig, name, value)
+    connection_manager.reset()
+    try:
+        yield
+    finally:
+        connection_manager.reset()
+        for name, value in saved_config.items():
+            setattr(PlexConfig, name, value)
+        for name, value in saved_environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def database_memberships() -> Dict[int, Tuple[str, str, List[int]]]:
+    """
+    Returns each synced playlist's title, type and item ratingKeys, in the shape of
+    SyntheticLibrary.memberships.
+    """
+    items = playlist_items_select().subquery()
+    rating_keys = defaultdict(list)
+    for playlist_id, rating_key in db.session.execute(select(items.c.playlist_id, items.c.rating_key)):
+        rating_keys[playlist_id].append(rating_key)
+    return {
+        playlist.rating_key: (playlist.title, playlist.playlist_type, sorted(rating_keys[playlist.id]))
+        for playlist in db.session.query(Playlist)
+    }
+
+
+def membership_differences(library: SyntheticLibrary) -> List[int]:
+    """
+    Returns the ratingKeys of the playlists whose database rows do not match the library.
+    """
+    expected = library.memberships()
+    synced = database_memberships()
+    return sorted(
+        rating_key
+        for rating_key in expected.keys() | synced.keys()
+        if expected.get(rating_key) != synced.get(rating_key)
+    )
@@ -0,0 +1,268 @@
+import logging
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import quoteattr
+
+from .synthetic import SyntheticItem, SyntheticLibrary, SyntheticParent, SyntheticPlaylist
+
+logger = logging.getLogger("app_logger")
+
+MACHINE_IDENTIFIER = "plex-restful-fake-server"
+SERVER_VERSION = "1.40.0.0000-fake"
+
+_ITEM_TAGS = {"track": "Track", "episode": "Video", "movie": "Video", "photo": "Photo"}
+
+
+class FakePlexServer:
+    """
+    Local stand-in for a Plex Media Server that serves a SyntheticLibrary over HTTP.
+
+    It answers the requests a sync makes: the server root and /identity, /playlists, each
+    playlist's metadata and items container, and /library/metadata/{ratingKey} for the parent
+    lookups of tracks and episodes. Containers honour X-Plex-Container-Start and
+    X-Plex-Container-Size, as headers or query parameters, and report totalSize, so plexapi, the
+    streaming reader and the async client all page through it as they do through Plex. Requests
+    without the token are answered with 401.
+
+    The library is read on every request, so it can be mutated between syncs while the server is
+    running. latency adds a fixed delay to every response, to stand in for a remote server.
+    """
+
+    def __init__(
+        self,
+        library: SyntheticLibrary,
+        token: str = "fake-token",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+    ) -> None:
+        self.library = library
+        self.token = token
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self._requests_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _FakePlexHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake_server = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def baseurl(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environ(self) -> Dict[str, str]:
+        """
+        Returns the environment variables that point PlexAuthentication at this server.
+        """
+        return {"PLEX_BASEURL": self.baseurl, "PLEX_TOKEN": self.token}
+
+    def start(self) -> "FakePlexServer":
+        """
+        Serves from a background thread until stop() is called.
+        """
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-plex-server", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Fake Plex server listening on {self.baseurl}")
+        return self
+
+    def serve_forever(self) -> None:
+        logger.info(f"Fake Plex server listening on {self.baseurl}")
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakePlexServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def respond(self, path: str, query: Dict[str, str], headers) -> Tuple[int, str]:
+        """
+        Returns the status and XML body for a GET of path, counting it in requests by route.
+        """
+        token = headers.get("X-Plex-Token") or query.get("X-Plex-Token")
+        if token != self.token:
+            return 401, "<html><head><title>Unauthorized</title></head></html>"
+
+        parts = [part for part in path.split("/") if part]
+        if not parts or parts == ["identity"]:
+            self._count_request("root")
+            return 200, self._root_xml(identity_only=bool(parts))
+
+        if parts[0] == "playlists":
+            if len(parts) == 1:
+                self._count_request("playlists")
+                playlists = list(self.library.playlists.values())
+                if "playlistType" in query:
+                    playlists = [pl for pl in playlists if pl.playlist_type == query["playlistType"]]
+                return 200, self._container(playlists, _playlist_xml, query, headers)
+
+            playlist = self.library.playlists.get(_int(parts[1]))
+            if playlist is None:
+                return 404, ""
+            if len(parts) == 2:
+                self._count_request("playlist")
+                return 200, self._container([playlist], _playlist_xml, query, headers)
+            if parts[2:] == ["items"]:
+                self._count_request("items")
+                return 200, self._container(
+                    playlist.items,
+                    _item_xml,
+                    query,
+                    headers,
+                    leafCount=playlist.leaf_count,
+                    playlistType=playlist.playlist_type,
+                    ratingKey=playlist.rating_key,
+                    title=playlist.title,
+                )
+
+        if parts[:2] == ["library", "metadata"] and len(parts) == 3:
+            self._count_request("metadata")
+            rating_key = _int(parts[2])
+            if rating_key in self.library.parents:
+                return 200, self._container(
+                    [self.library.parents[rating_key]], _parent_xml, query, headers
+                )
+            if rating_key in self.library.items:
+                return 200, self._container([self.library.items[rating_key]], _item_xml, query, headers)
+
+        return 404, ""
+
+    def _root_xml(self, identity_only: bool) -> str:
+        attributes = {"machineIdentifier": MACHINE_IDENTIFIER, "version": SERVER_VERSION}
+        if not identity_only:
+            attributes.update(friendlyName="Fake Plex", platform="Linux", myPlex="0")
+        return f'<MediaContainer size="0"{_attributes(attributes)}></MediaContainer>'
+
+    def _count_request(self, route: str) -> None:
+        with self._requests_lock:
+            self.requests[route] += 1
+
+    @staticmethod
+    def _container(
+        elements: Sequence[object],
+        render: Callable[[object], str],
+        query: Dict[str, str],
+        headers,
+        **attributes,
+    ) -> str:
+        # Only the requested page is rendered, so paging through a large playlist stays linear
+        start = _int(headers.get("X-Plex-Container-Start") or query.get("X-Plex-Container-Start")) or 0
+        size = _int(headers.get("X-Plex-Container-Size") or query.get("X-Plex-Container-Size"))
+        page = elements[start : start + size if size is not None else None]
+        attributes.update(size=len(page), totalSize=len(elements), offset=start)
+        return f"<MediaContainer{_attributes(attributes)}>{''.join(map(render, page))}</MediaContainer>"
+
+
+class _FakePlexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakePlex"
+
+    def do_GET(self) -> None:
+        fake_server: FakePlexServer = self.server.fake_server
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, body = fake_server.respond(url.path, query, self.headers)
+        if fake_server.latency:
+            time.sleep(fake_server.latency)
+
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml;charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"Fake Plex server: {format % args}")
+
+
+def _playlist_xml(playlist: SyntheticPlaylist) -> str:
+    attributes = {
+        "ratingKey": playlist.rating_key,
+        "key": f"/playlists/{playlist.rating_key}/items",
+        "guid": f"com.plexapp.agents.none://{playlist.rating_key}",
+        "type": "playlist",
+        "title": playlist.title,
+        "smart": 0,
+        "playlistType": playlist.playlist_type,
+        "composite": f"/playlists/{playlist.rating_key}/composite/{playlist.updated_at}",
+        "thumb": f"/playlists/{playlist.rating_key}/composite/{playlist.updated_at}",
+        "leafCount": playlist.leaf_count,
+        "duration": playlist.duration,
+        "addedAt": playlist.added_at,
+        "updatedAt": playlist.updated_at,
+    }
+    return f"<Playlist{_attributes(attributes)}/>"
+
+
+def _item_xml(item: SyntheticItem) -> str:
+    attributes = {
+        "ratingKey": item.rating_key,
+        "key": f"/library/metadata/{item.rating_key}",
+        "type": item.type,
+        "title": item.title,
+        "thumb": f"/library/metadata/{item.rating_key}/thumb/1700000000",
+        "index": item.index,
+        "parentIndex": item.parent_index,
+        "year": item.year,
+        "duration": item.duration,
+    }
+    for prefix, parent in (("parent", item.parent), ("grandparent", item.grandparent)):
+        if parent is not None:
+            attributes[f"{prefix}RatingKey"] = parent.rating_key
+            attributes[f"{prefix}Key"] = f"/library/metadata/{parent.rating_key}"
+            attributes[f"{prefix}Title"] = parent.title
+    if item.type == "track" and item.parent is not None:
+        attributes["parentYear"] = item.parent.year
+
+    tag = _ITEM_TAGS[item.type]
+    media = ""
+    if item.file is not None:
+        media = (
+            f'<Media id="{item.rating_key}"{_attributes({"duration": item.duration})}>'
+            f'<Part id="{item.rating_key}" key="/library/parts/{item.rating_key}/file"'
+            f"{_attributes({'file': item.file, 'duration': item.duration})}/></Media>"
+        )
+    return f"<{tag}{_attributes(attributes)}>{media}</{tag}>"
+
+
+def _parent_xml(parent: SyntheticParent) -> str:
+    attributes = {
+        "ratingKey": parent.rating_key,
+        "key": f"/library/metadata/{parent.rating_key}/children",
+        "type": parent.type,
+        "title": parent.title,
+        "index": parent.index,
+        "year": parent.year,
+    }
+    if parent.parent_rating_key is not None:
+        attributes["parentRatingKey"] = parent.parent_rating_key
+        attributes["parentKey"] = f"/library/metadata/{parent.parent_rating_key}"
+    return f"<Directory{_attributes(attributes)}/>"
+
+
+def _attributes(attributes: Dict[str, object]) -> str:
+    return "".join(
+        f" {name}={quoteattr(str(value))}" for name, value in attributes.items() if value is not None
+    )
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,408 @@
+import itertools
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# The item types each playlist type holds, as Plex assigns them
+PLAYLIST_ITEM_TYPES = {
+    "audio": ("track",),
+    "video": ("episode", "movie"),
+    "photo": ("photo",),
+}
+
+# Generated libraries have this many tracks per album, albums per artist, episodes per season and
+# seasons per show, so parent lookups repeat the way they do on a real server
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 4
+EPISODES_PER_SEASON = 10
+SEASONS_PER_SHOW = 4
+
+# Share of generated video items that are movies rather than episodes
+MOVIE_SHARE = 0.2
+
+# Relative frequency of each kind of change mutate applies
+MUTATION_WEIGHTS = {
+    "add": 4,
+    "add_new": 3,
+    "remove": 4,
+    "reorder": 2,
+    "rename": 1,
+    "rename_items": 2,
+    "new_playlist": 1,
+    "delete": 1,
+}
+
+# Epoch seconds the generated library is created at; each mutation advances the clock by a second
+EPOCH = 1_700_000_000
+
+
+@dataclass
+class SyntheticParent:
+    """
+    An album, artist, season or show that items refer to by ratingKey.
+    """
+
+    rating_key: int
+    type: str
+    title: str
+    index: Optional[int] = None
+    year: Optional[int] = None
+    parent_rating_key: Optional[int] = None
+
+
+@dataclass(eq=False)
+class SyntheticItem:
+    """
+    A track, episode, movie or photo, with the attributes Plex sends for it in a playlist.
+    """
+
+    rating_key: int
+    type: str
+    title: str
+    duration: Optional[int] = None
+    index: Optional[int] = None
+    parent_index: Optional[int] = None
+    year: Optional[int] = None
+    parent: Optional[SyntheticParent] = None
+    grandparent: Optional[SyntheticParent] = None
+    file: Optional[str] = None
+
+
+@dataclass(eq=False)
+class SyntheticPlaylist:
+    rating_key: int
+    title: str
+    playlist_type: str
+    items: List[SyntheticItem] = field(default_factory=list)
+    added_at: int = EPOCH
+    updated_at: int = EPOCH
+
+    @property
+    def leaf_count(self) -> int:
+        return len(self.items)
+
+    @property
+    def duration(self) -> int:
+        return sum(item.duration or 0 for item in self.items)
+
+
+class SyntheticLibrary:
+    """
+    In-memory Plex library of generated playlists, served over HTTP by FakePlexServer.
+
+    Items live in one pool per playlist type and are shared between the playlists of that type,
+    like the same track in several playlists on a real server. Every mutation moves the library's
+    clock forward and stamps the playlists it touches with the new updatedAt, so their leafCount,
+    duration and updatedAt fingerprint changes the way Plex reports it. All randomness comes from
+    the seed, so two libraries generated and mutated with the same arguments are identical.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        self.random = random.Random(seed)
+        self.clock = EPOCH
+        self.playlists: Dict[int, SyntheticPlaylist] = {}
+        self.items: Dict[int, SyntheticItem] = {}
+        self.parents: Dict[int, SyntheticParent] = {}
+        self.pools: Dict[str, List[SyntheticItem]] = {
+            playlist_type: [] for playlist_type in PLAYLIST_ITEM_TYPES
+        }
+        self._rating_keys = itertools.count(1)
+        self._playlist_numbers = itertools.count(1)
+        self._item_numbers = {
+            item_type: itertools.count() for item_type in ("track", "episode", "movie", "photo")
+        }
+        self._parents_by_number: Dict[Tuple[str, int], SyntheticParent] = {}
+
+    @classmethod
+    def generate(
+        cls,
+        playlists: int = 10,
+        items: int = 100,
+        playlist_types: Sequence[str] = ("audio", "video", "photo"),
+        shared: float = 0.5,
+        seed: int = 0,
+    ) -> "SyntheticLibrary":
+        """
+        Generates a library of playlists with the given number of items each.
+
+        Args:
+            playlists (int): Number of playlists, spread over playlist_types in turn.
+            items (int): Number of items in each playlist.
+            playlist_types (Sequence[str]): The playlist types to generate ("audio", "video", "photo").
+            shared (float): Fraction of a playlist's items that, on average, also appear in another
+                playlist of the same type; 0 gives every playlist its own items.
+            seed (int): Seed for titles, durations, item choice and later mutations.
+
+        Returns:
+            SyntheticLibrary: The generated library.
+        """
+        library = cls(seed)
+        types = [playlist_types[i % len(playlist_types)] for i in range(playlists)]
+        for playlist_type in PLAYLIST_ITEM_TYPES:
+            count = types.count(playlist_type)
+            if count:
+                pool_size = max(items, math.ceil(items * count * (1 - shared)))
+                library.create_items(playlist_type, pool_size)
+        for playlist_type in types:
+            library.add_playlist(playlist_type, items)
+        return library
+
+    def create_items(self, playlist_type: str, count: int) -> List[SyntheticItem]:
+        """
+        Adds count new items of a playlist type to its pool.
+        """
+        new_items = [self._create_item(playlist_type) for _ in range(count)]
+        self.pools[playlist_type].extend(new_items)
+        for item in new_items:
+            self.items[item.rating_key] = item
+        return new_items
+
+    def add_playlist(
+        self, playlist_type: str, items: int, title: Optional[str] = None
+    ) -> SyntheticPlaylist:
+        """
+        Adds a playlist of items drawn from the pool of its type, growing the pool if it is too small.
+        """
+        pool = self.pools[playlist_type]
+        if len(pool) < items:
+            self.create_items(playlist_type, items - len(pool))
+        number = next(self._playlist_numbers)
+        playlist = SyntheticPlaylist(
+            rating_key=self._next_rating_key(),
+            title=title or f"{playlist_type.title()} Playlist {number}",
+            playlist_type=playlist_type,
+            items=self.random.sample(pool, items),
+            added_at=self._tick(),
+        )
+        playlist.updated_at = playlist.added_at
+        self.playlists[playlist.rating_key] = playlist
+        return playlist
+
+    def remove_playlist(self, playlist: SyntheticPlaylist) -> None:
+        self._tick()
+        del self.playlists[playlist.rating_key]
+
+    def add_items(
+        self, playlist: SyntheticPlaylist, count: int, new: bool = False
+    ) -> List[SyntheticItem]:
+        """
+        Appends count items to a playlist; existing pool items it does not hold yet, or new items.
+        """
+        if new:
+            added = self.create_items(playlist.playlist_type, count)
+        else:
+            held = {item.rating_key for item in playlist.items}
+            candidates = [
+                item for item in self.pools[playlist.playlist_type] if item.rating_key not in held
+            ]
+            if len(candidates) < count:
+                candidates += self.create_items(playlist.playlist_type, count - len(candidates))
+            added = self.random.sample(candidates, count)
+        playlist.items.extend(added)
+        self._touch(playlist)
+        return added
+
+    def remove_items(self, playlist: SyntheticPlaylist, count: int) -> List[SyntheticItem]:
+        """
+        Removes count random items from a playlist.
+        """
+        removed = self.random.sample(playlist.items, min(count, len(playlist.items)))
+        removed_keys = {item.rating_key for item in removed}
+        playlist.items = [item for item in playlist.items if item.rating_key not in removed_keys]
+        self._touch(playlist)
+        return removed
+
+    def reorder(self, playlist: SyntheticPlaylist) -> None:
+        """
+        Shuffles a playlist's items. Plex moves the updatedAt of a reordered playlist, but its
+        leafCount and duration stay the same.
+        """
+        self.random.shuffle(playlist.items)
+        self._touch(playlist)
+
+    def rename_playlist(self, playlist: SyntheticPlaylist, title: Optional[str] = None) -> str:
+        playlist.title = title or f"{playlist.title} (renamed {self.clock - EPOCH})"
+        self._touch(playlist)
+        return playlist.title
+
+    def rename_items(self, items: Iterable[SyntheticItem]) -> None:
+        """
+        Renames items and touches every playlist that holds one of them.
+        """
+        renamed = set()
+        for item in items:
+            item.title = f"{item.title} (renamed {self.clock - EPOCH})"
+            renamed.add(item.rating_key)
+        for playlist in self.playlists.values():
+            if any(item.rating_key in renamed for item in playlist.items):
+                self._touch(playlist)
+
+    def mutate(self, changes: int = 5) -> List[str]:
+        """
+        Applies changes random mutations (add, remove, reorder, rename, new or deleted playlist)
+        and returns a description of each.
+
+        Args:
+            changes (int): Number of mutations to apply.
+
+        Returns:
+            List[str]: One line per mutation, in the order they were applied.
+        """
+        log = []
+        for _ in range(changes):
+            if not self.playlists:
+                playlist = self.add_playlist(self.random.choice(list(PLAYLIST_ITEM_TYPES)), 10)
+                log.append(f"added playlist {playlist.title}")
+                continue
+
+            playlist = self.random.choice(list(self.playlists.values()))
+            step = max(1, playlist.leaf_count // 10)
+            action = self.random.choices(list(MUTATION_WEIGHTS), weights=MUTATION_WEIGHTS.values())[0]
+
+            if action in ("add", "add_new"):
+                self.add_items(playlist, step, new=action == "add_new")
+                log.append(
+                    f"added {step} {'new ' if action == 'add_new' else ''}items to {playlist.title}"
+                )
+            elif action == "remove":
+                removed = self.remove_items(playlist, step)
+                log.append(f"removed {len(removed)} items from {playlist.title}")
+            elif action == "reorder":
+                self.reorder(playlist)
+                log.append(f"reordered {playlist.title}")
+            elif action == "rename":
+                old_title = playlist.title
+                log.append(f"renamed {old_title} to {self.rename_playlist(playlist)}")
+            elif action == "rename_items":
+                items = self.random.sample(playlist.items, min(step, playlist.leaf_count))
+                self.rename_items(items)
+                log.append(f"renamed {len(items)} items in {playlist.title}")
+            elif action == "new_playlist":
+                playlist = self.add_playlist(playlist.playlist_type, playlist.leaf_count or 10)
+                log.append(f"added playlist {playlist.title}")
+            else:
+                self.remove_playlist(playlist)
+                log.append(f"deleted playlist {playlist.title}")
+        return log
+
+    def memberships(self) -> Dict[int, Tuple[str, str, List[int]]]:
+        """
+        Returns each playlist's title, type and item ratingKeys, to compare a synced database with.
+        """
+        return {
+            playlist.rating_key: (
+                playlist.title,
+                playlist.playlist_type,
+                sorted(item.rating_key for item in playlist.items),
+            )
+            for playlist in self.playlists.values()
+        }
+
+    def _create_item(self, playlist_type: str) -> SyntheticItem:
+        if playlist_type == "audio":
+            return self._create_track()
+        if playlist_type == "video":
+            return self._create_movie() if self.random.random() < MOVIE_SHARE else self._create_episode()
+        return self._create_photo()
+
+    def _create_track(self) -> SyntheticItem:
+        number = next(self._item_numbers["track"])
+        artist_number = number // (TRACKS_PER_ALBUM * ALBUMS_PER_ARTIST)
+        album_number = number // TRACKS_PER_ALBUM
+        artist = self._parent("artist", artist_number, f"Artist {artist_number}")
+        album = self._parent(
+            "album", album_number, f"Album {album_number}", year=1960 + album_number % 60, parent=artist
+        )
+        track_number = number % TRACKS_PER_ALBUM + 1
+        return SyntheticItem(
+            rating_key=self._next_rating_key(),
+            type="track",
+            title=f"Track {number}",
+            duration=self.random.randint(120, 420) * 1000,
+            index=track_number,
+            parent=album,
+            grandparent=artist,
+            file=f"/music/{artist.title}/{album.title}/{track_number:02d} Track {number}.flac",
+        )
+
+    def _create_episode(self) -> SyntheticItem:
+        number = next(self._item_numbers["episode"])
+        show_number = number // (EPISODES_PER_SEASON * SEASONS_PER_SHOW)
+        season_number = number // EPISODES_PER_SEASON % SEASONS_PER_SHOW + 1
+        show = self._parent("show", show_number, f"Show {show_number}", year=1990 + show_number % 30)
+        season = self._parent(
+            "season",
+            number // EPISODES_PER_SEASON,
+            f"Season {season_number}",
+            index=season_number,
+            parent=show,
+        )
+        episode_number = number % EPISODES_PER_SEASON + 1
+        return SyntheticItem(
+            rating_key=self._next_rating_key(),
+            type="episode",
+            title=f"Episode {number}",
+            duration=self.random.randint(20, 60) * 60 * 1000,
+            index=episode_number,
+            parent_index=season_number,
+            parent=season,
+            grandparent=show,
+            file=(
+                f"/tv/{show.title}/Season {season_number:02d}/"
+                f"S{season_number:02d}E{episode_number:02d}.mkv"
+            ),
+        )
+
+    def _create_movie(self) -> SyntheticItem:
+        number = next(self._item_numbers["movie"])
+        return SyntheticItem(
+            rating_key=self._next_rating_key(),
+            type="movie",
+            title=f"Movie {number}",
+            duration=self.random.randint(80, 180) * 60 * 1000,
+            year=1950 + number % 75,
+            file=f"/movies/Movie {number}.mkv",
+        )
+
+    def _create_photo(self) -> SyntheticItem:
+        number = next(self._item_numbers["photo"])
+        return SyntheticItem(
+            rating_key=self._next_rating_key(),
+            type="photo",
+            title=f"Photo {number}",
+            file=f"/photos/{2000 + number % 25}/IMG_{number:06d}.jpg",
+        )
+
+    def _parent(
+        self,
+        parent_type: str,
+        number: int,
+        title: str,
+        index: Optional[int] = None,
+        year: Optional[int] = None,
+        parent: Optional[SyntheticParent] = None,
+    ) -> SyntheticParent:
+        existing = self._parents_by_number.get((parent_type, number))
+        if existing is None:
+            existing = SyntheticParent(
+                rating_key=self._next_rating_key(),
+                type=parent_type,
+                title=title,
+                index=index,
+                year=year,
+                parent_rating_key=parent.rating_key if parent else None,
+            )
+            self._parents_by_number[(parent_type, number)] = existing
+            self.parents[existing.rating_key] = existing
+        return existing
+
+    def _touch(self, playlist: SyntheticPlaylist) -> None:
+        playlist.updated_at = self._tick()
+
+    def _tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def _next_rating_key(self) -> int:
+        return next(self._rating_keys)
@@ -0,0 +1,116 @@
+import pytest
+from flask import g
+
+from plex_restful.api.cache import response_cache
+from plex_restful.app import create_app
+from plex_restful.database.extensions import db
+from plex_restful.database.models import Episode, Movie, Photo, Playlist, Track
+from plex_restful.database.populate import DatabasePopulator
+from plex_restful.testing import FakePlexServer, SyntheticLibrary, fake_plex_environment
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'plex_restful.db'}"})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    # The response cache is process-wide, and every test starts its database at generation 0
+    response_cache.clear()
+
+    # Requests share the app context the app fixture pushed, and with it g, where a served request
+    # would get its own
+    @app.teardown_request
+    def _clear_request_globals(error):
+        g.__dict__.clear()
+
+    return app.test_client()
+
+
+@pytest.fixture
+def library():
+    return SyntheticLibrary.generate(playlists=6, items=40, seed=7)
+
+
+@pytest.fixture
+def plex_server(library):
+    with FakePlexServer(library) as server:
+        with fake_plex_environment(server):
+            yield server
+
+
+@pytest.fixture
+def sync(app, plex_server):
+    """
+    Runs one sync against the fake server and returns its SYNC_STATS counters.
+    """
+
+    def run(**options):
+        stats = DatabasePopulator(**options).run_db_population()
+        db.session.expire_all()
+        return stats
+
+    return run
+
+
+@pytest.fixture
+def catalog(app):
+    """
+    Fills the database with a few playlists of every item type, built directly through the models.
+    """
+    tracks = [
+        Track(
+            rating_key=100 + number,
+            title=f"Track {number}",
+            track_number=number,
+            duration=200_000,
+            album_title="Discovery",
+            album_year=2001,
+            artist_name="Daft Punk",
+        )
+        for number in range(1, 6)
+    ]
+    episodes = [
+        Episode(
+            rating_key=200 + number,
+            title=f"Episode {number}",
+            episode_number=number,
+            season_number=1,
+            show_title="Planet Earth",
+            show_year=2006,
+            duration=3_000_000,
+        )
+        for number in range(1, 3)
+    ]
+    movies = [
+        Movie(rating_key=301, title="Arrival", year=2016, duration=7_000_000),
+        Movie(rating_key=302, title="Heat", year=1995, duration=10_000_000),
+    ]
+    photos = [
+        Photo(rating_key=400 + number, title=f"Beach {number}", file=f"beach{number}.jpg")
+        for number in (1, 2)
+    ]
+
+    playlists = {
+        "Road Trip": Playlist(rating_key=1, title="Road Trip", playlist_type="audio"),
+        "Workout": Playlist(rating_key=2, title="Workout", playlist_type="audio"),
+        "Weekend": Playlist(rating_key=3, title="Weekend", playlist_type="video"),
+        "Holiday": Playlist(rating_key=4, title="Holiday", playlist_type="photo"),
+        "Empty": Playlist(rating_key=5, title="Empty", playlist_type="audio"),
+    }
+    db.session.add_all([*tracks, *episodes, *movies, *photos, *playlists.values()])
+    for track in tracks:
+        playlists["Road Trip"].tracks.append(track)
+    for track in tracks[:2]:
+        playlists["Workout"].tracks.append(track)
+    for item in [*movies, *episodes]:
+        getattr(playlists["Weekend"], type(item).__tablename__).append(item)
+    for photo in photos:
+        playlists["Holiday"].photos.append(photo)
+    db.session.commit()
+    return playlists
@@ -0,0 +1,221 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from plex_restful.api import endpoints
+from plex_restful.config import APIConfig
+from plex_restful.database.extensions import db
+from plex_restful.database.models import SyncRun
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def test_playlists_are_paged_by_keyset(client, catalog):
+    ids, after, pages = [], None, 0
+    while True:
+        response = client.get(
+            "/api/playlists", query_string={"limit": 2, "after": after} if after else {"limit": 2}
+        )
+        assert response.status_code == 200
+        ids += [playlist["id"] for playlist in response.get_json()]
+        pages += 1
+        if "X-Next-After" not in response.headers:
+            assert "Link" not in response.headers
+            break
+        after = int(response.headers["X-Next-After"])
+        assert f"after={after}" in response.headers["Link"]
+
+    assert pages == 3
+    assert ids == sorted(playlist.id for playlist in catalog.values())
+
+
+def test_after_starts_past_the_given_key(client, catalog):
+    first_id = catalog["Road Trip"].id
+    response = client.get(f"/api/playlists?after={first_id}")
+
+    assert [playlist["id"] for playlist in response.get_json()] == sorted(
+        playlist.id for playlist in catalog.values() if playlist.id > first_id
+    )
+    assert "Link" not in response.headers
+
+
+def test_the_type_filter_is_kept_across_pages(client, catalog):
+    response = client.get("/api/playlists?type=audio&limit=1")
+    next_page = client.get(response.headers["Link"].split(";")[0].strip("<>"))
+
+    assert "type=audio" in response.headers["Link"]
+    assert [playlist["title"] for playlist in response.get_json() + next_page.get_json()] == [
+        "Road Trip",
+        "Workout",
+    ]
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=1001", "limit=ten", "after=first"])
+def test_bad_page_arguments_are_rejected(client, catalog, query):
+    response = client.get(f"/api/playlists?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_fields_select_the_returned_columns(client, catalog):
+    response = client.get("/api/playlists?fields=title,rating_key&limit=1")
+
+    assert response.get_json() == [{"title": "Road Trip", "rating_key": 1}]
+
+
+def test_default_fields_are_returned_without_a_projection(client, catalog):
+    (playlist,) = client.get("/api/playlists?limit=1").get_json()
+
+    assert set(playlist) == set(endpoints.DEFAULT_PLAYLIST_FIELDS)
+
+
+def test_unknown_fields_are_rejected(client, catalog):
+    response = client.get("/api/playlists?fields=title,secret")
+
+    assert response.status_code == 400
+    assert "secret" in response.get_json()["error"]
+
+
+def test_playlist_tracks_are_paged_and_projected(client, catalog):
+    playlist_id = catalog["Road Trip"].id
+    first = client.get(f"/api/playlists/{playlist_id}/tracks?limit=3&fields=title")
+    rest = client.get(f"/api/playlists/{playlist_id}/tracks?after={first.headers['X-Next-After']}")
+
+    assert first.get_json() == [{"title": f"Track {number}"} for number in (1, 2, 3)]
+    assert [track["track_number"] for track in rest.get_json()] == [4, 5]
+
+
+def test_playlist_items_cover_every_item_type(client, catalog):
+    response = client.get(f"/api/playlists/{catalog['Weekend'].id}/items")
+
+    items = response.get_json()
+    assert [item["type"] for item in items] == ["episode", "episode", "movie", "movie"]
+    assert [item["title"] for item in items] == ["Episode 1", "Episode 2", "Arrival", "Heat"]
+    assert set(items[0]) == set(endpoints.DEFAULT_ITEM_FIELDS)
+
+
+def test_playlist_items_are_paged_across_item_types(client, catalog):
+    playlist_id = catalog["Weekend"].id
+    first = client.get(f"/api/playlists/{playlist_id}/items?limit=3&fields=type,show_title,year")
+    rest = client.get(first.headers["Link"].split(";")[0].strip("<>"))
+
+    assert first.get_json() == [
+        {"type": "episode", "show_title": "Planet Earth", "year": None},
+        {"type": "episode", "show_title": "Planet Earth", "year": None},
+        {"type": "movie", "show_title": None, "year": 2016},
+    ]
+    assert rest.get_json() == [{"type": "movie", "show_title": None, "year": 1995}]
+    assert "Link" not in rest.headers
+
+
+def test_playlist_items_of_a_missing_playlist_are_not_found(client, catalog):
+    assert client.get("/api/playlists/999/items").status_code == 404
+    assert client.get("/api/playlists/999/tracks").status_code == 404
+    assert client.get(f"/api/playlists/{catalog['Empty'].id}/items").get_json() == []
+
+
+def test_playlist_types_are_distinct(client, catalog):
+    response = client.get("/api/playlist_types")
+
+    assert response.get_json() == [{"name": "audio"}, {"name": "photo"}, {"name": "video"}]
+
+
+def test_sync_runs_limit_is_clamped(client, monkeypatch):
+    monkeypatch.setattr(endpoints, "MAX_SYNC_RUNS_LIMIT", 3)
+    started_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db.session.add_all(
+        SyncRun(
+            trigger="scheduled",
+            status="succeeded",
+            started_at=started_at + timedelta(minutes=n),
+            duration=1.0,
+        )
+        for n in range(5)
+    )
+    db.session.commit()
+
+    assert len(client.get("/api/sync_runs?limit=0").get_json()) == 1
+    assert len(client.get("/api/sync_runs?limit=-5").get_json()) == 1
+    assert len(client.get("/api/sync_runs?limit=100000").get_json()) == 3
+    assert len(client.get("/api/sync_runs").get_json()) == 3
+
+
+def test_ndjson_streams_every_row_after_the_key(client, catalog, monkeypatch):
+    monkeypatch.setattr(APIConfig, "NDJSON_BATCH", 2)
+    response = client.get("/api/playlists?fields=title", headers=NDJSON)
+
+    assert response.mimetype == "application/x-ndjson"
+    assert response.is_streamed
+    lines = response.get_data().splitlines()
+    assert [json.loads(line)["title"] for line in lines] == [
+        "Road Trip",
+        "Workout",
+        "Weekend",
+        "Holiday",
+        "Empty",
+    ]
+
+
+def test_ndjson_honours_an_explicit_limit_and_after(client, catalog):
+    after = catalog["Road Trip"].id
+    items = client.get(
+        f"/api/playlists/{catalog['Weekend'].id}/items?limit=2&fields=title", headers=NDJSON
+    )
+    assert [json.loads(line) for line in items.get_data().splitlines()] == [
+        {"title": "Episode 1"},
+        {"title": "Episode 2"},
+    ]
+
+    playlists = client.get(f"/api/playlists?after={after}&limit=2&fields=id", headers=NDJSON)
+    assert [json.loads(line)["id"] for line in playlists.get_data().splitlines()] == [
+        after + 1,
+        after + 2,
+    ]
+
+
+def test_json_is_returned_unless_ndjson_is_preferred(client, catalog):
+    response = client.get(
+        "/api/playlists", headers={"Accept": "application/json, application/x-ndjson;q=0.5"}
+    )
+
+    assert response.mimetype == "application/json"
+    assert len(response.get_json()) == len(catalog)
+
+
+def test_large_responses_are_gzipped(client, catalog):
+    url = f"/api/playlists?fields={','.join(endpoints.PLAYLIST_FIELDS)}"
+    plain = client.get(url)
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert len(plain.get_data()) >= APIConfig.COMPRESS_MIN_SIZE
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+
+def test_small_responses_are_sent_uncompressed(client, catalog):
+    response = client.get("/api/playlist_types", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.get_json()
+
+
+def test_streamed_ndjson_is_gzipped(client, catalog):
+    plain = client.get("/api/playlists", headers=NDJSON).get_data()
+    response = client.get("/api/playlists", headers={**NDJSON, "Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_brotli_is_preferred_when_available(client, catalog):
+    brotli = pytest.importorskip("brotli")
+    plain = client.get("/api/playlists", headers=NDJSON).get_data()
+    response = client.get("/api/playlists", headers={**NDJSON, "Accept-Encoding": "gzip, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.get_data()) == plain
@@ -0,0 +1,111 @@
+from plex_restful.api.cache import ResponseCache
+from plex_restful.database.extensions import db
+from plex_restful.database.models import DatabaseGeneration
+
+
+def _bump_generation():
+    DatabaseGeneration.bump()
+    db.session.commit()
+
+
+def test_repeated_requests_are_served_from_the_cache(client, catalog):
+    first = client.get("/api/playlists")
+    second = client.get("/api/playlists")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_data() == first.get_data()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+
+def test_json_and_ndjson_are_cached_apart(client, catalog):
+    client.get("/api/playlists")
+    response = client.get("/api/playlists", headers={"Accept": "application/x-ndjson"})
+
+    assert response.mimetype == "application/x-ndjson"
+    assert response.get_data().count(b"\n") == len(catalog)
+
+
+def test_a_matching_etag_is_answered_with_304(client, catalog):
+    etag = client.get("/api/playlists").headers["ETag"]
+    response = client.get("/api/playlists", headers={"If-None-Match": etag})
+
+    assert etag.startswith('W/"')
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_etags_differ_by_url(client, catalog):
+    etag = client.get("/api/playlists").headers["ETag"]
+    response = client.get("/api/playlists?limit=1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_a_generation_bump_invalidates_etags_and_cached_responses(client, catalog):
+    first = client.get("/api/playlists")
+    catalog["Workout"].title = "Cool Down"
+    _bump_generation()
+
+    response = client.get("/api/playlists", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert "Cool Down" in [playlist["title"] for playlist in response.get_json()]
+
+
+def test_errors_are_not_cached(client, catalog):
+    client.get("/api/playlists?limit=0")
+    response = client.get("/api/playlists?limit=0")
+
+    assert response.status_code == 400
+    assert "X-Cache" not in response.headers
+    assert "ETag" not in response.headers
+
+
+def test_sync_runs_are_uncached(client):
+    response = client.get("/api/sync_runs")
+
+    assert "ETag" not in response.headers
+    assert "X-Cache" not in response.headers
+
+
+def test_a_newer_generation_resets_the_cache():
+    cache = ResponseCache(max_entries=10, max_bytes=1024)
+    cache.put(1, "/a", (b"one", 200, []))
+    assert cache.get(1, "/a") == (b"one", 200, [])
+
+    assert cache.get(2, "/a") is None
+    cache.put(2, "/a", (b"two", 200, []))
+    assert cache.get(2, "/a") == (b"two", 200, [])
+
+
+def test_an_older_generation_neither_resets_nor_fills_the_cache():
+    cache = ResponseCache(max_entries=10, max_bytes=1024)
+    cache.put(2, "/a", (b"two", 200, []))
+
+    # A request that read the database before the latest sync committed
+    assert cache.get(1, "/a") is None
+    cache.put(1, "/a", (b"one", 200, []))
+    cache.put(1, "/b", (b"one", 200, []))
+
+    assert cache.get(2, "/a") == (b"two", 200, [])
+    assert cache.get(2, "/b") is None
+
+
+def test_the_cache_evicts_the_least_recently_used_entries():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put(1, "/a", (b"aaaa", 200, []))
+    cache.put(1, "/b", (b"bbbb", 200, []))
+    cache.get(1, "/a")
+    cache.put(1, "/c", (b"cccc", 200, []))
+    cache.put(1, "/big", (b"x" * 11, 200, []))
+
+    assert cache.get(1, "/a") is not None
+    assert cache.get(1, "/b") is None
+    assert cache.get(1, "/c") is not None
+    assert cache.get(1, "/big") is None
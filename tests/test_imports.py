@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from plex_restful.benchmarks import FORBIDDEN_IMPORTS, IMPORT_TARGETS
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Fails any connection attempt, then reports the modules the import loaded
+IMPORT_SCRIPT = """
+import json, socket, sys
+
+def refuse(*args, **kwargs):
+    raise AssertionError("network access at import time")
+
+socket.socket.connect = socket.socket.connect_ex = socket.create_connection = refuse
+import {module}
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+@pytest.mark.parametrize("module", IMPORT_TARGETS)
+def test_entry_points_import_without_side_effects(module, tmp_path):
+    database = tmp_path / "plex_restful.db"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")])),
+    }
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    modules = set(json.loads(completed.stdout))
+    assert modules.isdisjoint(FORBIDDEN_IMPORTS)
+    assert not database.exists()
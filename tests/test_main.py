@@ -0,0 +1,10 @@
+from click.testing import CliRunner
+
+from plex_restful.main import main
+
+
+def test_sync_rejects_a_zero_interval():
+    result = CliRunner().invoke(main, ["sync", "--every", "0"])
+
+    assert result.exit_code == 2
+    assert "must be greater than 0" in result.output
@@ -0,0 +1,37 @@
+import pytest
+
+from plex_restful.plex import AsyncPlexClient, fetch_playlist_records, get_server, plex_exceptions
+
+
+def _library_items(library, plex_playlist):
+    return [item.rating_key for item in library.playlists[plex_playlist.ratingKey].items]
+
+
+def test_async_client_fetches_the_items_container(library, plex_server):
+    pytest.importorskip("aiohttp")
+    plex_playlists = get_server().playlists()
+    gone = plex_playlists[-1]
+    library.remove_playlist(library.playlists[gone.ratingKey])
+    playlist_requests = plex_server.requests["playlist"]
+
+    results = AsyncPlexClient(get_server(), page_size=7).fetch_playlist_items(plex_playlists)
+
+    assert results[-1] is None
+    for plex_playlist, items in zip(plex_playlists[:-1], results):
+        assert [item.ratingKey for item in items] == _library_items(library, plex_playlist)
+    assert plex_server.requests["playlist"] == playlist_requests
+
+
+def test_streamed_records_come_from_the_items_container(library, plex_server):
+    server = get_server()
+    plex_playlists = server.playlists()
+    playlist_requests = plex_server.requests["playlist"]
+
+    for plex_playlist in plex_playlists:
+        records = fetch_playlist_records(server, plex_playlist)
+        assert [record.ratingKey for record in records] == _library_items(library, plex_playlist)
+    assert plex_server.requests["playlist"] == playlist_requests
+
+    library.remove_playlist(library.playlists[plex_playlists[0].ratingKey])
+    with pytest.raises(plex_exceptions.NotFound):
+        fetch_playlist_records(server, plex_playlists[0])
@@ -0,0 +1,182 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from plex_restful.apps.refresh import jobs, scheduler
+from plex_restful.apps.refresh.jobs import RefreshJob, RefreshJobRunner
+from plex_restful.apps.refresh.scheduler import SyncScheduler
+from plex_restful.database.models import DatabaseGeneration, Playlist, SyncRun
+from plex_restful.database.populate import DatabasePopulator
+
+
+@pytest.fixture
+def run_sync(app, plex_server, monkeypatch):
+    monkeypatch.setattr(jobs, "_populator", None)
+    return jobs.run_sync
+
+
+def test_only_syncs_that_change_data_bump_the_generation(run_sync, library, monkeypatch):
+    run_sync("manual")
+    generation = DatabaseGeneration.current()
+
+    run_sync("manual")
+    assert DatabaseGeneration.current() == generation
+
+    monkeypatch.setattr(DatabasePopulator, "run_db_population", _fail)
+    with pytest.raises(RuntimeError):
+        run_sync("manual")
+    assert DatabaseGeneration.current() == generation
+
+    monkeypatch.undo()
+    monkeypatch.setattr(jobs, "_populator", None)
+    library.mutate(4)
+    run_sync("manual")
+    assert DatabaseGeneration.current() > generation
+
+
+def test_renamed_items_are_served_fresh_after_a_sync(client, run_sync, library):
+    run_sync("manual")
+    playlist = next(iter(library.playlists.values()))
+    url = f"/api/playlists/{Playlist.query.filter_by(rating_key=playlist.rating_key).one().id}/items"
+    first = client.get(url)
+    assert client.get(url).headers["X-Cache"] == "HIT"
+
+    library.rename_items(playlist.items[:1])
+    sync_run = run_sync("manual")
+    response = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert sync_run.items_renamed == 1
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert playlist.items[0].title in [item["title"] for item in response.get_json()]
+
+
+def test_sync_runs_are_not_served_from_the_response_cache(client, run_sync):
+    run_sync("manual")
+    assert len(client.get("/api/sync_runs").get_json()) == 1
+    run_sync("scheduled")
+    response = client.get("/api/sync_runs")
+
+    assert [run["trigger"] for run in response.get_json()] == ["scheduled", "manual"]
+    assert "X-Cache" not in response.headers
+
+
+def _fail(self):
+    raise RuntimeError("sync failed")
+
+
+def test_overlapping_refreshes_are_coalesced_into_one_run():
+    release = threading.Event()
+    runs = []
+
+    def run():
+        runs.append(threading.current_thread().name)
+        release.wait(5)
+        return "done"
+
+    runner = RefreshJobRunner(run)
+    job, started = runner.submit(Flask(__name__))
+    joined = [runner.submit(Flask(__name__)) for _ in range(3)]
+    release.set()
+    _wait_for(lambda: job.done)
+
+    assert started
+    assert all(other is job and not started for other, started in joined)
+    assert job.coalesced == 3
+    assert job.status == RefreshJob.SUCCEEDED and job.message == "done"
+    assert len(runs) == 1
+    assert runner.get(job.id) is job
+
+    next_job, started = runner.submit(Flask(__name__))
+    _wait_for(lambda: next_job.done)
+    assert started and next_job is not job
+    assert len(runs) == 2
+
+
+def test_a_failed_refresh_is_recorded_on_its_job():
+    def run():
+        raise RuntimeError("sync failed")
+
+    job, _ = RefreshJobRunner(run).submit(Flask(__name__))
+    _wait_for(lambda: job.done)
+
+    assert job.status == RefreshJob.FAILED
+    assert job.error == "sync failed"
+
+
+def test_syncs_wait_for_the_sync_lock(app, monkeypatch):
+    synced = threading.Event()
+
+    def run_db_population():
+        synced.set()
+        return {}
+
+    monkeypatch.setattr(
+        jobs, "get_populator", lambda: SimpleNamespace(run_db_population=run_db_population)
+    )
+
+    def sync():
+        with app.app_context():
+            jobs.run_sync("manual")
+
+    with jobs.sync_lock:
+        thread = threading.Thread(target=sync, daemon=True)
+        thread.start()
+        assert not synced.wait(0.2)
+    thread.join(5)
+
+    assert synced.is_set()
+    assert SyncRun.query.one().status == "succeeded"
+
+
+def test_the_scheduler_runs_until_stopped(monkeypatch):
+    runs = []
+
+    def fake_run_sync(trigger):
+        runs.append(trigger)
+        return SimpleNamespace(duration=0.0, playlists_updated=0, items_added=0, items_removed=0)
+
+    monkeypatch.setattr(scheduler, "run_sync", fake_run_sync)
+    sync_scheduler = SyncScheduler(Flask(__name__), interval=0.01, jitter=0, slow_run=60)
+    sync_scheduler.start(initial_delay=0)
+    _wait_for(lambda: len(runs) >= 3)
+    sync_scheduler.stop(timeout=5)
+
+    assert not sync_scheduler._thread.is_alive()
+    stopped_at = len(runs)
+    time.sleep(0.05)
+    assert len(runs) == stopped_at
+    assert set(runs) == {"scheduled"}
+
+
+def test_stopping_the_scheduler_interrupts_its_wait(monkeypatch):
+    runs = []
+    monkeypatch.setattr(scheduler, "run_sync", runs.append)
+    sync_scheduler = SyncScheduler(Flask(__name__), interval=3600, jitter=0)
+    sync_scheduler.start()
+
+    start_time = time.perf_counter()
+    sync_scheduler.stop(timeout=5)
+
+    assert not sync_scheduler._thread.is_alive()
+    assert time.perf_counter() - start_time < 1
+    assert runs == []
+
+
+def test_failed_and_slow_syncs_back_off_until_a_healthy_run():
+    sync_scheduler = SyncScheduler(Flask(__name__), interval=60, jitter=0, slow_run=30, max_backoff=300)
+
+    assert sync_scheduler.next_delay(1, failed=True) == 120
+    assert sync_scheduler.next_delay(45, failed=False) == 240
+    assert sync_scheduler.next_delay(1, failed=True) == 300
+    assert sync_scheduler.next_delay(1, failed=False) == 60
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
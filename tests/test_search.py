@@ -0,0 +1,82 @@
+from plex_restful.database.extensions import db
+from plex_restful.database.models import Movie, Track
+from plex_restful.database.search import SEARCH_TABLE, build_match_query, search_items
+
+
+def _titles(query, **options):
+    results, _ = search_items(query, limit=options.pop("limit", 10), **options)
+    return [result["title"] for result in results]
+
+
+def test_words_are_matched_as_quoted_prefixes():
+    assert build_match_query('daft "pu') == '"daft"* "pu"*'
+    assert build_match_query("AND OR *") == '"AND"* "OR"*'
+    assert build_match_query("  ?! ") is None
+
+
+def test_search_matches_prefixes_of_every_indexed_column(catalog):
+    assert _titles("arr") == ["Arrival"]
+    assert sorted(_titles("daft disc")) == [f"Track {number}" for number in range(1, 6)]
+    assert sorted(_titles("planet")) == ["Episode 1", "Episode 2"]
+
+
+def test_title_matches_outrank_other_columns(catalog):
+    db.session.add(
+        Track(
+            rating_key=150,
+            title="Planet Caravan",
+            track_number=1,
+            album_title="Paranoid",
+            artist_name="Black Sabbath",
+        )
+    )
+    db.session.commit()
+
+    assert _titles("planet")[0] == "Planet Caravan"
+
+
+def test_search_is_filtered_by_type_and_paged(catalog):
+    first, has_more = search_items("track", limit=2, item_type="track")
+    rest, more_after_rest = search_items("track", limit=10, offset=2, item_type="track")
+
+    assert has_more and not more_after_rest
+    assert len(first) == 2 and len(rest) == 3
+    assert {result["type"] for result in first + rest} == {"track"}
+    assert _titles("beach", item_type="movie") == []
+
+
+def test_triggers_keep_the_index_in_step_with_the_items(catalog):
+    movie = Movie.query.filter_by(title="Heat").one()
+    movie.title = "Ronin"
+    db.session.add(Movie(rating_key=303, title="Heatwave", year=2022))
+    db.session.commit()
+    assert _titles("heat") == ["Heatwave"]
+    assert _titles("ronin") == ["Ronin"]
+
+    db.session.delete(movie)
+    db.session.commit()
+    assert _titles("ronin") == []
+
+
+def test_the_search_endpoint_returns_ranked_pages(client, catalog):
+    response = client.get("/api/search?q=track&type=track&limit=2&fields=title,score")
+    results = response.get_json()
+
+    assert response.headers["X-Next-After"] == "2"
+    assert [set(result) for result in results] == [{"title", "score"}] * 2
+    assert results[0]["score"] >= results[1]["score"]
+
+
+def test_the_search_endpoint_validates_its_arguments(client, catalog):
+    assert client.get("/api/search").status_code == 400
+    assert client.get("/api/search?q=heat&type=song").status_code == 400
+
+
+def test_search_without_fts5_is_unavailable(client, catalog):
+    db.session.execute(db.text(f"DROP TABLE {SEARCH_TABLE}"))
+    db.session.commit()
+
+    response = client.get("/api/search?q=heat")
+
+    assert response.status_code == 503
+    assert "FTS5" in response.get_json()["error"]
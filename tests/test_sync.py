@@ -0,0 +1,176 @@
+import pytest
+from sqlalchemy import text
+
+from plex_restful.database.extensions import db
+from plex_restful.database.populate import DatabasePopulator
+from plex_restful.testing import fake_plex_environment, membership_differences
+
+FETCH_MODES = {
+    "threads": {"async_fetch": False, "stream_items": False},
+    "stream": {"async_fetch": False, "stream_items": True},
+    "async": {"async_fetch": True, "stream_items": False},
+}
+
+
+def test_initial_sync_matches_library(sync, library):
+    stats = sync()
+
+    assert stats["playlists_added"] == len(library.playlists)
+    assert stats["playlists_skipped"] == 0
+    assert membership_differences(library) == []
+
+
+@pytest.mark.parametrize("mode", FETCH_MODES)
+def test_mutation_rounds_stay_in_sync(sync, library, mode):
+    if mode == "async":
+        pytest.importorskip("aiohttp")
+
+    sync(**FETCH_MODES[mode])
+    for _ in range(4):
+        library.mutate(8)
+        stats = sync(**FETCH_MODES[mode])
+        assert stats["playlists_skipped"] == 0
+        assert membership_differences(library) == []
+
+
+def test_unchanged_playlists_are_not_refetched(sync, library, plex_server):
+    sync()
+    fetched = plex_server.requests["items"]
+    playlist = next(iter(library.playlists.values()))
+    library.reorder(playlist)
+
+    sync()
+
+    assert plex_server.requests["items"] == fetched + 1
+    assert membership_differences(library) == []
+
+
+def test_cached_responses_replay_offline(app, library, plex_server, tmp_path):
+    cache_dir = str(tmp_path / "plex_cache")
+    with fake_plex_environment(plex_server, RESPONSE_CACHE=True, RESPONSE_CACHE_DIR=cache_dir):
+        DatabasePopulator().run_db_population()
+
+    db.drop_all()
+    db.create_all()
+    plex_server.stop()
+    with fake_plex_environment(
+        plex_server, RESPONSE_CACHE=True, RESPONSE_CACHE_DIR=cache_dir, OFFLINE=True
+    ):
+        DatabasePopulator().run_db_population()
+
+    db.session.expire_all()
+    assert membership_differences(library) == []
+
+
+def test_recreated_playlist_keeps_its_title(sync, library):
+    sync()
+    playlist = next(iter(library.playlists.values()))
+    library.remove_playlist(playlist)
+    library.add_playlist(playlist.playlist_type, 20, title=playlist.title)
+
+    stats = sync()
+
+    assert (stats["playlists_added"], stats["playlists_removed"]) == (1, 1)
+    assert stats["playlists_skipped"] == 0
+    assert membership_differences(library) == []
+
+
+def test_playlist_renamed_to_a_deleted_playlists_title(sync, library):
+    sync()
+    deleted, renamed = list(library.playlists.values())[:2]
+    library.remove_playlist(deleted)
+    library.rename_playlist(renamed, deleted.title)
+
+    stats = sync()
+
+    assert (stats["playlists_renamed"], stats["playlists_removed"]) == (1, 1)
+    assert membership_differences(library) == []
+
+
+def test_playlists_swap_titles(sync, library):
+    sync()
+    first, second = list(library.playlists.values())[:2]
+    first_title, second_title = first.title, second.title
+    library.rename_playlist(first, second_title)
+    library.rename_playlist(second, first_title)
+
+    stats = sync()
+
+    assert stats["playlists_renamed"] == 2
+    assert membership_differences(library) == []
+
+
+LINK_TABLES = ("playlist_track", "playlist_episode", "playlist_movie", "playlist_photo")
+
+
+def _fail_inserts(table, condition):
+    db.session.execute(
+        text(
+            f"CREATE TRIGGER fail_{table} BEFORE INSERT ON {table} WHEN {condition} "
+            "BEGIN SELECT RAISE(ABORT, 'write failed'); END"
+        )
+    )
+    db.session.commit()
+
+
+def _allow_inserts(*tables):
+    for table in tables:
+        db.session.execute(text(f"DROP TRIGGER fail_{table}"))
+    db.session.commit()
+
+
+def test_failed_playlist_write_skips_only_that_playlist(sync, library):
+    sync()
+    broken = library.add_playlist("audio", 10, title="Broken")
+    library.mutate(6)
+    _fail_inserts("playlists", "NEW.title = 'Broken'")
+
+    stats = sync()
+
+    assert stats["playlists_skipped"] == 1
+    assert membership_differences(library) == [broken.rating_key]
+
+    _allow_inserts("playlists")
+    assert sync()["playlists_skipped"] == 0
+    assert membership_differences(library) == []
+
+
+def test_failed_membership_write_is_retried_next_run(sync, library):
+    sync()
+    broken, other = list(library.playlists.values())[:2]
+    library.add_items(broken, 3, new=True)
+    library.add_items(other, 3, new=True)
+    for table in LINK_TABLES:
+        _fail_inserts(
+            table, f"NEW.playlist_id = (SELECT id FROM playlists WHERE rating_key = {broken.rating_key})"
+        )
+
+    stats = sync()
+
+    assert stats["playlists_skipped"] == 1
+    assert membership_differences(library) == [broken.rating_key]
+
+    _allow_inserts(*LINK_TABLES)
+    assert sync()["playlists_skipped"] == 0
+    assert membership_differences(library) == []
+
+
+def test_items_sharing_a_natural_key_keep_their_own_rows(sync, library):
+    playlist = library.add_playlist("audio", 2)
+    first, second = playlist.items
+    second.title, second.index = first.title, first.index
+    second.parent, second.grandparent = first.parent, first.grandparent
+
+    sync()
+
+    assert membership_differences(library) == []
+
+
+def test_sync_in_small_parameter_chunks(sync, library, monkeypatch):
+    monkeypatch.setattr("plex_restful.database.populate.SQLITE_MAX_IN_PARAMS", 2)
+
+    sync()
+    library.mutate(8)
+    sync()
+
+    assert membership_differences(library) == []